@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+
+# A partir de esta cantidad de filas los puntos se agregan en lugar de
+# dibujarse uno por uno
+UMBRAL_AGREGACION = int(os.environ.get("REGRESSION_AGGREGATE_THRESHOLD", 500))
+
+# Resolución (columnas, filas) de la malla de densidad
+RESOLUCION_DENSIDAD = (160, 90)
+
+# Cantidad máxima de segmentos de error representativos
+NUM_RESIDUOS = 40
+
+
+def requiere_agregacion(num_filas, umbral=UMBRAL_AGREGACION):
+    """Indica si los puntos deben agregarse en lugar de dibujarse uno por uno."""
+    return num_filas > umbral
+
+
+def agrega_escena(config):
+    """
+    Indica si la escena de regresión agrega los puntos de su configuración:
+    por la cantidad de filas o por `max_puntos`, que la aplicación pone en 0
+    cuando los puntos son una muestra de un archivo grande.
+    """
+    return requiere_agregacion(len(config.get("X", [])), config.get("max_puntos", UMBRAL_AGREGACION))
+
+
+def densidad_puntos(X, Y, x_range, y_range, resolucion=RESOLUCION_DENSIDAD):
+    """
+    Cuenta los puntos que caen en cada celda de una malla regular sobre el
+    rango de los ejes. Retorna un arreglo de forma (columnas, filas).
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    columnas, filas = resolucion
+    dentro = (X >= x_range[0]) & (X <= x_range[1]) & (Y >= y_range[0]) & (Y <= y_range[1])
+
+    # Índice de celda de cada punto (más rápido que np.histogram2d para millones de filas)
+    ix = ((X[dentro] - x_range[0]) * (columnas / (x_range[1] - x_range[0]))).astype(np.intp)
+    iy = ((Y[dentro] - y_range[0]) * (filas / (y_range[1] - y_range[0]))).astype(np.intp)
+    np.clip(ix, 0, columnas - 1, out=ix)
+    np.clip(iy, 0, filas - 1, out=iy)
+    conteos = np.bincount(ix * filas + iy, minlength=columnas * filas)
+    return conteos.reshape(columnas, filas).astype(float)
+
+
+def celdas_densidad(X, Y, x_range, y_range, resolucion=RESOLUCION_DENSIDAD):
+    """
+    Centros de las celdas no vacías de la malla de densidad y la cantidad de
+    puntos en cada una. Retorna una tupla (x_centros, y_centros, conteos).
+    """
+    conteos = densidad_puntos(X, Y, x_range, y_range, resolucion)
+    ancho = (x_range[1] - x_range[0]) / resolucion[0]
+    alto = (y_range[1] - y_range[0]) / resolucion[1]
+    columnas, filas = np.nonzero(conteos)
+    return (
+        x_range[0] + (columnas + 0.5) * ancho,
+        y_range[0] + (filas + 0.5) * alto,
+        conteos[columnas, filas],
+    )
+
+
+def imagen_densidad(conteos, color_rgb):
+    """
+    Convierte los conteos de la malla en una imagen RGBA (filas de arriba
+    hacia abajo) cuya opacidad crece con el logaritmo de la densidad.
+    """
+    densidad = np.log1p(conteos.T[::-1])
+    if densidad.max() > 0:
+        densidad = densidad / densidad.max()
+    imagen = np.zeros(densidad.shape + (4,), dtype=np.uint8)
+    imagen[..., :3] = color_rgb
+    imagen[..., 3] = np.round(densidad * 255).astype(np.uint8)
+    return imagen
+
+
+def residuos_representativos(X, Y, coeficientes, num=NUM_RESIDUOS):
+    """
+    Selecciona a lo sumo `num` filas representativas para dibujar los errores:
+    divide el eje x en `num` tramos y toma de cada uno la fila con el residuo
+    absoluto mediano.
+
+    Retorna una tupla (X, Y, Y_pred) con las filas elegidas.
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    Y_pred = np.polyval(coeficientes, X)
+    residuos = np.abs(Y - Y_pred)
+
+    ancho = (X.max() - X.min()) / num or 1.0
+    tramos = np.clip(((X - X.min()) / ancho).astype(np.intp), 0, num - 1)
+
+    # Agrupar las filas por tramo y buscar la mediana de cada grupo con una
+    # selección parcial (el número de tramos es fijo, no depende de las filas)
+    orden = np.argsort(tramos, kind="stable")
+    limites = np.cumsum(np.bincount(tramos, minlength=num))
+    elegidos = []
+    for inicio, fin in zip(np.concatenate([[0], limites[:-1]]), limites):
+        if fin > inicio:
+            grupo = orden[inicio:fin]
+            mitad = (fin - inicio) // 2
+            elegidos.append(grupo[np.argpartition(residuos[grupo], mitad)[mitad]])
+    elegidos = np.array(elegidos, dtype=np.intp)
+    return X[elegidos], Y[elegidos], Y_pred[elegidos]
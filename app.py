@@ -1,29 +1,681 @@
+import time
+
+# Inicio de la importación de la aplicación, para el reporte de arranque
+_INICIO_IMPORTACION = time.perf_counter()
+
 import streamlit as st
-import subprocess
 import os
 import json
-import pandas as pd
-import numpy as np
-import google.generativeai as genai
-import streamlit_lottie as st_lottie
 import random
+from cache_render import CacheRender
+from datos_servidor import lectura_habilitada, resolver_ruta_datos
+from interpretacion import BACKEND_INTERPRETACION, ServicioInterpretacion, crear_backend
+from calidades import plan_de_calidad
+from entrega_video import MODO_ENTREGA, EntregaVideos, html_video
+from memo import MemoCompartida, clave_memo, huella_tabla
+from metricas import ARCHIVO_METRICAS, REGISTRO, inicio_proceso
+from trabajos_render import ColaRender, ColaLlena
+
+# pandas, numpy, streamlit_lottie, el ajuste incremental y la vista previa
+# se importan al usarse por primera vez: la primera página se dibuja sin
+# esperar a que carguen
+
+# Duración de la importación de la aplicación (solo se mide en la primera carga)
+DURACION_IMPORTACION = time.perf_counter() - _INICIO_IMPORTACION
+
+# Opción de datos que lee un archivo grande por bloques
+OPCION_ARCHIVO = "Cargar Archivo (CSV/Parquet)"
+
+# Métodos de ajuste de la regresión: None es mínimos cuadrados (ponderados si
+# se indican pesos por fila); los demás se ajustan por IRLS en regresion_robusta
+METODOS_AJUSTE = {
+    "Mínimos cuadrados": None,
+    "Robusto (Huber)": "huber",
+    "Robusto (Tukey)": "tukey",
+}
+
+# Columna de pesos por fila de las tablas editables
+COLUMNA_PESOS = "Peso"
+
+# Estado de cada sesión, con un prefijo por sección. Los resultados en sí
+# (ajustes, residuos, textos) viven en la memo compartida por las sesiones;
+# la sesión solo guarda lo que identifica su último modelo
+ESTADO_INICIAL = {
+    "mle_model_generated": False,
+    "mle_n": None,
+    "mle_x": None,
+    "regression_model_generated": False,
+    "regression_type": "Lineal",
+    "regression_grado": None,
+    "regression_coeficientes": None,
+}
+
+# Muestra el panel de administración con las métricas de render en la barra lateral
+PANEL_ADMINISTRACION = os.environ.get("ADMIN_PANEL", "0") == "1"
+
+@st.cache_resource
+def obtener_cache_render():
+    """
+    Devuelve la caché de videos compartida por todas las sesiones del proceso.
+    """
+    return CacheRender()
+
+@st.cache_resource
+def obtener_cola_render():
+    """
+    Devuelve la cola de render compartida por todas las sesiones del proceso.
+    """
+    return ColaRender(cache=obtener_cache_render())
+
+@st.cache_resource
+def obtener_memo():
+    """
+    Devuelve la memoización de ajustes y artefactos derivados compartida por
+    todas las sesiones del proceso.
+    """
+    return MemoCompartida()
+
+@st.cache_resource
+def obtener_entrega_videos():
+    """
+    Devuelve la capa de entrega de videos (servidor de archivos estáticos y
+    codificación de variantes) compartida por todas las sesiones del proceso.
+    """
+    return EntregaVideos()
+
+def generar_video(scene_name, config, vista_previa=None, mejorar=True):
+    """
+    Devuelve el video de la escena para la configuración dada, sirviéndolo
+    desde la caché si ya fue generado o encolando un render de Manim en su
+    propio directorio de trabajo. Mientras espera, muestra la posición en la
+    cola y, si se proporciona, la especificación Vega-Lite `vista_previa`,
+    que se reemplaza por el video cuando está listo.
+
+    Se entrega primero el nivel de calidad más rápido y, si la carga y el tope
+    del administrador lo permiten, se encola en segundo plano la mejora a la
+    calidad objetivo. Si la calidad objetivo ya está en la caché, se sirve
+    directamente. Con `mejorar=False` no se encola la mejora.
+
+    Retorna una tupla (éxito, ruta_del_video, mensaje, trabajo_de_mejora).
+    """
+    cola = obtener_cola_render()
+    nivel_inicial, nivel_mejora = plan_de_calidad(cola.estadisticas()["en_cola"])
+    if nivel_mejora is not None and cola.en_cache(scene_name, config, nivel_mejora.nombre):
+        nivel_inicial, nivel_mejora = nivel_mejora, None
+    if not mejorar:
+        nivel_mejora = None
+
+    try:
+        trabajo = cola.enviar(scene_name, config, nivel_inicial.nombre)
+    except ColaLlena as e:
+        return False, None, str(e), None
+
+    estado_cola = st.empty()
+    contenedor_vista_previa = st.empty()
+    if vista_previa is not None and not trabajo.terminado:
+        with contenedor_vista_previa.container():
+            st.caption("Vista previa: el video se mostrará aquí en cuanto esté listo.")
+            st.vega_lite_chart(vista_previa)
+
+    while not trabajo.esperar(timeout=0.5):
+        posicion = cola.posicion(trabajo)
+        if posicion:
+            estado_cola.info(f"Tu video está en la cola de render (posición {posicion}).")
+        else:
+            estado_cola.info("Generando tu video...")
+    estado_cola.empty()
+
+    # Si el render falló se conserva la vista previa como respaldo
+    if trabajo.exito:
+        contenedor_vista_previa.empty()
+
+    # Encolar la mejora de calidad sin esperarla
+    mejora = None
+    if trabajo.exito and nivel_mejora is not None:
+        try:
+            mejora = cola.enviar(scene_name, config, nivel_mejora.nombre)
+        except ColaLlena:
+            mejora = None
+
+    return trabajo.exito, trabajo.video_path, trabajo.mensaje, mejora
+
+def mostrar_video(video_url):
+    """
+    Muestra el video midiendo cuánto tarda la aplicación en entregarlo. Con
+    `VIDEO_DELIVERY=estatico` el navegador lo descarga por rangos desde el
+    servidor de archivos estáticos, con sus variantes WebM y GIF; si no, se
+    carga en st.video (Streamlit lee el archivo completo para servirlo).
+    """
+    inicio = time.perf_counter()
+    if MODO_ENTREGA == "estatico":
+        st.html(html_video(obtener_entrega_videos().publicar(video_url)))
+    else:
+        st.video(video_url)
+    REGISTRO.observar(
+        "app_carga_video_segundos", time.perf_counter() - inicio,
+        ayuda="Tiempo de carga del video en la página.", modo=MODO_ENTREGA,
+    )
+
+def mostrar_panel_administracion():
+    """
+    Muestra en la barra lateral el estado de la cola y de las cachés, y las
+    fases de los últimos renders de este proceso.
+    """
+    with st.sidebar.expander("Panel de administración", expanded=False):
+        cola = obtener_cola_render().estadisticas()
+        cache = obtener_cache_render().estadisticas()
+        interpretaciones = obtener_servicio_interpretacion().estadisticas()
+        memo = obtener_memo().estadisticas()
+
+        col1, col2 = st.columns(2)
+        col1.metric("En cola", cola["en_cola"])
+        col2.metric("Ejecutando", f"{cola['ejecutando']}/{cola['max_concurrentes']}")
+        col1.metric("Caché de videos", f"{cache['tasa_aciertos']:.0%}")
+        col2.metric("Caché de interpretaciones", f"{interpretaciones['tasa_aciertos']:.0%}")
+        col1.metric("Memo de ajustes", f"{memo['tasa_aciertos']:.0%}")
+        st.caption(f"{cache['entradas']} videos, {cache['bytes'] / 2**20:.1f} de {cache['max_bytes'] / 2**20:.0f} MB")
+        st.caption(f"Memo: {memo['entradas']} resultados ({memo['mb']:.1f} MB), {memo['calculos']} ajustes calculados")
+        if st.button("Vaciar la memo de ajustes", key="vaciar_memo"):
+            st.caption(f"{obtener_memo().invalidar()} resultados eliminados.")
+
+        arranque = REGISTRO.arranque
+        if arranque:
+            st.caption(
+                f"Arranque en frío: {arranque['arranque_segundos']:.2f} s "
+                f"(importación de la app: {arranque['importacion_segundos']:.2f} s) · "
+                f"última ejecución: {REGISTRO.ultima_ejecucion:.2f} s"
+            )
+
+        renders = list(REGISTRO.renders_recientes)
+        if renders:
+            st.write("**Últimos renders (segundos por fase)**")
+            filas = [
+                {
+                    "escena": r["escena"],
+                    "calidad": r["calidad"],
+                    "estado": r["estado"],
+                    "caché": r["desde_cache"],
+                    "cola": r["cola_segundos"],
+                    "total": r["total_segundos"],
+                    **r["fases"],
+                }
+                for r in reversed(renders)
+            ]
+            import pandas as pd
+
+            st.dataframe(pd.DataFrame(filas), hide_index=True)
+
+        st.download_button(
+            "Descargar métricas (Prometheus)",
+            REGISTRO.texto_prometheus(),
+            file_name=os.path.basename(ARCHIVO_METRICAS),
+            mime="text/plain",
+        )
+
+def repetir_seccion(seccion):
+    """
+    Indica si la sección debe volver a mostrarse porque terminó la mejora de
+    calidad de su video (ver `reproducir_video`). La marca se consume al leerla.
+    """
+    return st.session_state.pop(f"repetir_{seccion}", False)
+
+def reproducir_video(video_path, mejora=None, seccion=None):
+    """
+    Reproduce el video y, si hay una mejora de calidad en curso, consulta cada
+    2 s si terminó. Al terminar vuelve a ejecutar la aplicación marcando la
+    `seccion` para repetirla: la sección se sirve desde la memo y la caché de
+    renders con el video mejorado, y la consulta se cancela al no volver a
+    registrarse el fragmento.
+    """
+    if mejora is not None and mejora.terminado and mejora.exito and os.path.exists(mejora.video_path):
+        video_path = mejora.video_path
+    mostrar_video(video_path.replace("\\", "/"))  # Compatibilidad con Windows
+    if mejora is None or mejora.terminado or seccion is None:
+        return
+
+    # Solo el aviso se redibuja en cada consulta, no el video
+    @st.fragment(run_every=2)
+    def esperar_mejora():
+        if mejora.terminado:
+            st.session_state[f"repetir_{seccion}"] = True
+            st.rerun()
+        st.caption(f"Mejorando el video a calidad {mejora.nivel.nombre} ({mejora.nivel.subdirectorio})...")
+
+    esperar_mejora()
+
+@st.cache_resource
+def obtener_flujo_lanzamientos():
+    """
+    Devuelve el flujo de lanzamientos en vivo, compartido por todas las
+    sesiones del proceso (el socket local solo puede abrirse una vez).
+    """
+    from flujo_lanzamientos import FlujoLanzamientos
+
+    return FlujoLanzamientos()
+
+def mostrar_flujo_lanzamientos():
+    """
+    Lanzamientos en vivo: lee un archivo del directorio de datos o recibe un
+    socket local y muestra p̂, sus intervalos y, opcionalmente, la posterior
+    Beta. La fuente se controla solo desde el panel de administración. Las
+    estimaciones y el gráfico se actualizan cada `FLIPS_REFRESH_SECONDS`
+    mientras la fuente está activa, sin importar cuántos lanzamientos
+    lleguen, y la animación se vuelve a generar como mucho cada
+    `FLIPS_VIDEO_SECONDS`.
+    """
+    from flujo_lanzamientos import HOST_FLUJO, INTERVALO_REFRESCO, INTERVALO_VIDEO, PUERTO_FLUJO
+
+    flujo = obtener_flujo_lanzamientos()
+
+    # El flujo es uno solo para todo el proceso: solo el panel de administración lo controla
+    if PANEL_ADMINISTRACION:
+        fuentes = (["Archivo"] if lectura_habilitada() else []) + ["Socket local"]
+        fuente = st.radio("Fuente de los lanzamientos", fuentes, horizontal=True, key="flujo_fuente")
+        if fuente == "Archivo":
+            ruta = st.text_input("Ruta del archivo, relativa al directorio de datos del servidor", key="flujo_ruta")
+            seguir = st.checkbox("Seguir leyendo mientras el archivo crece", key="flujo_seguir")
+        else:
+            st.caption(f"Envía los lanzamientos por TCP a {HOST_FLUJO}:{PUERTO_FLUJO}.")
+        st.caption("Un carácter por lanzamiento: `1`, `C` o `H` es cara; `0`, `S` o `T` es sello. Los demás caracteres se ignoran.")
+
+        col1, col2, col3 = st.columns(3)
+        try:
+            if col1.button("Iniciar", key="flujo_iniciar"):
+                if fuente == "Archivo":
+                    flujo.leer_archivo(resolver_ruta_datos(ruta), seguir)
+                else:
+                    flujo.escuchar()
+            if col2.button("Detener", key="flujo_detener"):
+                flujo.detener()
+            if col3.button("Reiniciar conteo", key="flujo_reiniciar"):
+                flujo.reiniciar()
+        except OSError as e:
+            st.error(f"No se pudo iniciar la fuente: {e}")
+    else:
+        st.caption("El flujo de lanzamientos se inicia y se detiene desde el panel de administración.")
+
+    usar_posterior = st.checkbox("Mostrar la posterior Beta", key="flujo_posterior")
+    if usar_posterior:
+        col1, col2 = st.columns(2)
+        alfa_prior = col1.number_input("α de la prior", min_value=0.01, value=1.0, key="flujo_alfa")
+        beta_prior = col2.number_input("β de la prior", min_value=0.01, value=1.0, key="flujo_beta")
+    animar = st.checkbox(
+        f"Actualizar la animación (como mucho cada {INTERVALO_VIDEO:.0f} s)", key="flujo_animar"
+    )
+
+    # Solo se refresca mientras la fuente está activa; al detenerse, una
+    # ejecución completa vuelve a registrar el fragmento sin refresco
+    refrescar = flujo.instantanea().activo
+
+    @st.fragment(run_every=INTERVALO_REFRESCO if refrescar else None)
+    def estimaciones_en_vivo():
+        estado = flujo.instantanea()
+        if refrescar and not estado.activo:
+            st.rerun()
+        if estado.error:
+            st.error(f"La fuente se detuvo: {estado.error}")
+        elif estado.fuente:
+            st.caption(f"Fuente: {estado.fuente} ({'activa' if estado.activo else 'detenida'})")
+        if estado.n == 0:
+            st.info("Todavía no llegaron lanzamientos.")
+            return
+
+        from flujo_lanzamientos import intervalo_credibilidad_beta, posterior_beta
+        from intervalos import NIVEL_CONFIANZA, intervalo_wilson
+        from vista_previa import grafico_posterior_beta, grafico_verosimilitud
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Lanzamientos", f"{estado.n:,}")
+        col2.metric("Caras", f"{estado.x:,}")
+        col3.metric("p̂", f"{estado.x / estado.n:.4f}")
+        col4.metric("Lanzamientos/s", f"{estado.tasa:,.0f}")
+        inferior, superior = intervalo_wilson(estado.n, estado.x)
+        st.write(f"Intervalo de Wilson al {NIVEL_CONFIANZA:.0%}: **[{inferior:.4f}, {superior:.4f}]**")
+        st.vega_lite_chart(grafico_verosimilitud(estado.n, estado.x))
+
+        if usar_posterior:
+            alfa, beta = posterior_beta(estado.n, estado.x, alfa_prior, beta_prior)
+            credibilidad = intervalo_credibilidad_beta(alfa, beta, NIVEL_CONFIANZA)
+            st.write(
+                f"Media posterior: **{alfa / (alfa + beta):.4f}**; intervalo de credibilidad al "
+                f"{NIVEL_CONFIANZA:.0%}: **[{credibilidad[0]:.4f}, {credibilidad[1]:.4f}]**"
+            )
+            st.vega_lite_chart(grafico_posterior_beta(alfa, beta, credibilidad))
+
+        if animar:
+            # Encolar la animación sin esperarla, con los valores del momento
+            ahora = time.time()
+            datos = (estado.n, estado.x)
+            if (
+                ahora - st.session_state.get("flujo_ultimo_envio", 0) >= INTERVALO_VIDEO
+                and datos != st.session_state.get("flujo_datos_enviados")
+            ):
+                cola = obtener_cola_render()
+                nivel, _ = plan_de_calidad(cola.estadisticas()["en_cola"])
+                try:
+                    st.session_state.flujo_trabajo = cola.enviar(
+                        "LikelihoodFunction", {"n": estado.n, "x": estado.x}, nivel.nombre
+                    )
+                    st.session_state.flujo_ultimo_envio = ahora
+                    st.session_state.flujo_datos_enviados = datos
+                except ColaLlena:
+                    pass
+
+        trabajo = st.session_state.get("flujo_trabajo")
+        if trabajo is not None and trabajo.terminado and trabajo.exito:
+            st.session_state.flujo_video = trabajo.video_path
+        if st.session_state.get("flujo_video") and os.path.exists(st.session_state.flujo_video):
+            mostrar_video(st.session_state.flujo_video.replace("\\", "/"))
+
+    estimaciones_en_vivo()
+
+def fuente_archivo(ruta_servidor, archivo_subido):
+    """
+    Archivo de datos de la regresión: la ruta del servidor, resuelta dentro
+    del directorio de datos, o el archivo subido.
+    """
+    if ruta_servidor.strip():
+        return resolver_ruta_datos(ruta_servidor.strip())
+    return archivo_subido
+
+def opciones_modelo(grado_maximo):
+    """Opciones del selector de modelo, de la regresión lineal al grado máximo."""
+    return ["Lineal"] + [f"Polinomial (grado {g})" for g in range(2, grado_maximo + 1)]
+
+def grado_del_modelo(modelo):
+    """Grado del polinomio de una opción del selector de modelo."""
+    return 1 if modelo == "Lineal" else int(modelo.rsplit(" ", 1)[1].rstrip(")"))
+
+def mostrar_comparacion_grados(df, data_option, fuente, columna_x, columna_y):
+    """
+    Compara todos los grados hasta el máximo configurado y muestra la tabla
+    de R², AIC, BIC y error de validación cruzada, sin renderizar videos.
+    """
+    import pandas as pd
+    from seleccion_modelo import PLIEGUES_CV, comparar_grados, comparar_grados_archivo
+
+    if data_option == OPCION_ARCHIVO:
+        if not fuente:
+            st.error("Por favor, carga un archivo o indica su ruta en el servidor.")
+            return
+        comparacion = comparar_grados_archivo(fuente, columna_x, columna_y)
+    elif df.empty or df.isnull().values.any():
+        st.error("Por favor, asegúrate de que no haya celdas vacías en los datos.")
+        return
+    else:
+        comparacion = obtener_memo().obtener(
+            clave_memo("grados", tabla=huella_tabla(df[['Producción (x)', 'Horas Trabajadas (y)']])),
+            lambda: comparar_grados(
+                df['Producción (x)'].to_numpy(dtype=float), df['Horas Trabajadas (y)'].to_numpy(dtype=float)
+            ),
+        )
+
+    recomendado = comparacion["recomendado"]
+    st.dataframe(
+        pd.DataFrame({
+            "Grado": comparacion["grado"],
+            "R²": comparacion["r2"],
+            "AIC": comparacion["aic"],
+            "BIC": comparacion["bic"],
+            f"ECM (CV {PLIEGUES_CV} pliegues)": comparacion["ecm_cv"],
+            "Recomendado": ["⭐" if g == recomendado else "" for g in comparacion["grado"]],
+        }),
+        hide_index=True,
+    )
+    st.success(f"Grado recomendado: **{recomendado}** (menor error de validación cruzada).")
+
+def ajustar_tabla(df, grado, clave_tabla, metodo=None):
+    """
+    Ajusta el polinomio de la tabla editable. Por mínimos cuadrados sin
+    pesos se reutiliza el ajuste anterior de la sesión: solo se procesan las
+    filas agregadas, borradas o editadas. Con la columna de pesos o un
+    método robusto, la tabla se ajusta completa (es pequeña).
+
+    Retorna una tupla (X, Y, coeficientes, pesos_robustos), donde
+    pesos_robustos es None salvo en los ajustes robustos.
+    """
+    import numpy as np
+    from regresion_incremental import AcumuladorMinimosCuadrados, AjusteIncrementalTabla
+
+    X = np.array(df['Producción (x)'], dtype=float)
+    Y = np.array(df['Horas Trabajadas (y)'], dtype=float)
+    pesos = np.array(df[COLUMNA_PESOS], dtype=float) if COLUMNA_PESOS in df else None
+
+    if metodo is not None:
+        from regresion_robusta import ajustar_robusto, bloques_de_arreglos
+
+        ajuste = ajustar_robusto(bloques_de_arreglos(X, Y, pesos), grado, metodo)
+        return X, Y, ajuste.coeficientes(), ajuste.pesos(X, Y)
+    if pesos is not None:
+        acumulador = AcumuladorMinimosCuadrados(grado)
+        acumulador.agregar(X, Y, pesos)
+        return X, Y, acumulador.coeficientes(), None
+
+    clave = f"ajuste_tabla_{clave_tabla}_{grado}"
+    if clave not in st.session_state:
+        st.session_state[clave] = AjusteIncrementalTabla(grado, 'Producción (x)', 'Horas Trabajadas (y)')
+    coeficientes = st.session_state[clave].actualizar(df).coeficientes()
+    return X, Y, coeficientes, None
+
+def ajustar_archivo(fuente, grado, columna_x, columna_y, metodo=None, columna_pesos=None):
+    """
+    Ajusta el polinomio leyendo el archivo por bloques y muestra el avance
+    (filas procesadas, filas por segundo y coeficientes) tras cada bloque.
+    Con un método robusto, el archivo se vuelve a recorrer en cada
+    iteración de IRLS.
+
+    Retorna una tupla (X, Y, coeficientes, pesos_robustos, filas_totales)
+    donde X e Y son una muestra representativa de las filas, usada para los
+    gráficos, pesos_robustos son los pesos de esa muestra (None si el ajuste
+    no es robusto) y filas_totales es la cantidad de filas del archivo.
+    """
+    from regresion_incremental import ajustar_por_bloques, leer_por_bloques
 
-def run_manim(scene_name):
+    columnas = [columna_x, columna_y] + ([columna_pesos] if columna_pesos else [])
+
+    progreso = st.empty()
+
+    def mostrar_progreso(acumulador):
+        if acumulador.n >= grado + 1:
+            coeficientes = ", ".join(f"{c:.4f}" for c in acumulador.coeficientes())
+            progreso.info(
+                f"{acumulador.n:,} filas procesadas · {acumulador.filas_por_segundo():,.0f} filas/s · "
+                f"coeficientes: [{coeficientes}]"
+            )
+
+    acumulador, muestra = ajustar_por_bloques(
+        leer_por_bloques(fuente, columnas),
+        grado,
+        columna_x,
+        columna_y,
+        columna_pesos=columna_pesos,
+        al_procesar=mostrar_progreso,
+    )
+    st.caption(
+        f"Ajuste sobre {acumulador.n:,} filas a {acumulador.filas_por_segundo():,.0f} filas/s. "
+        f"Los gráficos muestran una muestra aleatoria de {len(muestra.x):,} filas."
+    )
+    if metodo is None:
+        return muestra.x, muestra.y, acumulador.coeficientes(), None, acumulador.n
+
+    from regresion_robusta import ajustar_robusto
+
+    def recorrer():
+        # Los archivos subidos se rebobinan para cada pasada
+        if hasattr(fuente, "seek"):
+            fuente.seek(0)
+        for bloque in leer_por_bloques(fuente, columnas):
+            bloque = bloque.dropna(subset=columnas)
+            pesos = bloque[columna_pesos].to_numpy() if columna_pesos else None
+            yield bloque[columna_x].to_numpy(), bloque[columna_y].to_numpy(), pesos
+
+    def mostrar_iteracion(ajuste):
+        coeficientes = ", ".join(f"{c:.4f}" for c in ajuste.coeficientes())
+        progreso.info(
+            f"Iteración {ajuste.iteraciones} de IRLS · escala robusta {ajuste.escala:.4g} · "
+            f"coeficientes: [{coeficientes}]"
+        )
+
+    ajuste = ajustar_robusto(recorrer, grado, metodo, al_iterar=mostrar_iteracion)
+    st.caption(
+        f"Ajuste robusto en {ajuste.iteraciones} iteraciones ({ajuste.segundos:.1f} s, "
+        f"{ajuste.filas_por_segundo():,.0f} filas/s){'' if ajuste.convergio else ' sin llegar a converger'}."
+    )
+    return muestra.x, muestra.y, ajuste.coeficientes(), ajuste.pesos(muestra.x, muestra.y), acumulador.n
+
+def derivar_mle(n, x, mostrar_intervalo):
+    """
+    Calcula lo que muestra la sección de MLE para n lanzamientos y x caras:
+    p̂, sus intervalos, la interpretación, los parámetros de la escena y la
+    vista previa.
+
+    Retorna un diccionario.
     """
-    Ejecuta el script de Manim para generar el video de la escena especificada.
+    from intervalos import intervalo_verosimilitud_perfil, intervalo_wilson
+    from vista_previa import grafico_verosimilitud
+
+    p_hat = x / n
+    intervalo_perfil_p = intervalo_verosimilitud_perfil(n, x)
+
+    # Parámetros de la escena
+    config = {
+        "n": n,
+        "x": x
+    }
+    if mostrar_intervalo:
+        config["intervalo"] = list(intervalo_perfil_p)
+
+    return {
+        "p_hat": p_hat,
+        "intervalo_wilson": intervalo_wilson(n, x),
+        "intervalo_perfil": intervalo_perfil_p,
+        "interpretacion": interpretar_p_hat(p_hat),
+        "config": config,
+        "vista_previa": grafico_verosimilitud(n, x),
+    }
+
+def derivar_regresion(datos_regresion, grado, bootstrap, mostrar_banda, filas_totales=None):
+    """
+    Calcula a partir de un ajuste todo lo que muestra la sección de
+    regresión: residuos, intervalos bootstrap (si `bootstrap`), texto de los
+    coeficientes, parámetros de la escena y vista previa. El resultado se
+    comparte entre sesiones, así que no se modifica después de crearlo.
+
+    Si los datos son una muestra de un archivo, `filas_totales` es su
+    cantidad de filas: la escena y la vista previa agregan los puntos
+    según el tamaño del archivo, no el de la muestra.
+
+    Retorna un diccionario.
     """
-    command = [
-        "manim",
-        "-pqh",                # Flags para reproducción y alta calidad
-        "manim.py",            # Nombre del script de Manim
-        scene_name             # Nombre de la clase de la escena
+    import numpy as np
+    from agregacion import requiere_agregacion
+    from vista_previa import grafico_regresion
+
+    # Datos a graficar (una muestra si provienen de un archivo), coeficientes
+    # del ajuste y pesos robustos de cada punto (solo en los ajustes robustos)
+    X, Y, coeficientes, pesos_robustos = datos_regresion
+    residuos = Y - np.poly1d(coeficientes)(X)
+
+    # Intervalos bootstrap de los coeficientes (los archivos solo se
+    # recorren por bloques, así que no se remuestrean)
+    intervalos_coeficientes = None
+    if bootstrap:
+        from intervalos import bootstrap_regresion
+
+        intervalos_coeficientes = bootstrap_regresion(X, Y, grado)
+
+    # Parámetros de la escena de regresión
+    config_regression = {
+        "X": X.tolist(),
+        "Y": Y.tolist(),
+        "grado": grado,
+        "coeficientes": coeficientes.tolist()
+    }
+    if mostrar_banda and intervalos_coeficientes is not None:
+        from intervalos import banda_bootstrap
+
+        x_banda, inferior_banda, superior_banda = banda_bootstrap(
+            intervalos_coeficientes[2], X.min(), X.max()
+        )
+        config_regression["banda"] = {
+            "x": x_banda.tolist(),
+            "inferior": inferior_banda.tolist(),
+            "superior": superior_banda.tolist(),
+        }
+    if filas_totales is not None and requiere_agregacion(filas_totales):
+        # La muestra representa un archivo grande: se dibuja como densidad
+        config_regression["max_puntos"] = 0
+    if pesos_robustos is not None:
+        # La escena resalta los puntos a los que el ajuste les restó peso
+        config_regression["pesos_robustos"] = np.round(pesos_robustos, 4).tolist()
+
+    # Texto de los coeficientes, de mayor a menor grado (el orden de np.polyfit)
+    terminos = [
+        (f"Coeficiente de $x^{{{grado - i}}}$" if grado - i else "Intersección", coef)
+        for i, coef in enumerate(coeficientes)
     ]
+    if grado == 1:
+        m, b = coeficientes
+        valores = [f"""**Pendiente (m):** **{m:.4f}**  
+                                            **Intersección (b):** **{b:.4f}**"""]
+    else:
+        valores = [f"**{termino}:** **{coef:.4f}**" for termino, coef in terminos]
+
+    return {
+        "X": X,
+        "Y": Y,
+        "coeficientes": coeficientes,
+        "pesos_robustos": pesos_robustos,
+        "residuos": residuos,
+        "suma_errores": float(np.sum(residuos**2)),
+        "intervalos": intervalos_coeficientes,
+        "config": config_regression,
+        "vista_previa": grafico_regresion(X, Y, coeficientes, filas_totales=filas_totales),
+        "formula": "<br>".join(f"**{termino}:** {coef:.4f}" for termino, coef in terminos),
+        "valores": valores,
+    }
+
+@st.cache_resource
+def obtener_servicio_interpretacion():
+    """
+    Devuelve el servicio de interpretaciones compartido por todas las
+    sesiones: el cliente de Gemini se configura una sola vez por proceso.
+    """
+    api_key = st.secrets["GEMINIAPI"]["key"] if BACKEND_INTERPRETACION == "gemini" else None
+    return ServicioInterpretacion(crear_backend(BACKEND_INTERPRETACION, api_key))
 
+@st.cache_resource
+def load_lottie_file(filepath: str):
+    # Se lee del disco una sola vez por proceso
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+def mostrar_logo_gemini():
+    """
+    Muestra la animación Lottie del logo de Gemini.
+    """
+    # Ruta al archivo JSON de Lottie
     try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        return False, e.stderr
+        base_dir = os.getcwd()
+        lottie_path = os.path.join(base_dir, "gemini_logo.json")
+        if os.path.exists(lottie_path):
+            import streamlit_lottie as st_lottie
+
+            gemini_logo = load_lottie_file(lottie_path)
+
+            # Mostrar la animación Lottie con tamaño pequeño
+            st_lottie.st_lottie(
+                gemini_logo, 
+                key='logo', 
+                height=50,  # Ajusta la altura según tus necesidades
+                width=50,   # Ajusta el ancho según tus necesidades
+                loop=True,
+                quality="low"
+            )
+        else:
+            st.warning("El archivo de animación Lottie no se encontró.")    
+    except Exception as e:
+        st.error(f"Error al cargar la animación Lottie: {e}")
 
 def interpretar_p_hat(p_hat):
     """
@@ -51,6 +703,110 @@ def interpretar_valores_lse(m, b):
         interpretation += "Esto indica que no hay una relación lineal entre las horas trabajadas y la producción."
     return interpretation
 
+# Familias de la sección "Otras distribuciones", con la descripción de sus datos
+FAMILIAS_MLE = {
+    "poisson": "Poisson (conteos por intervalo)",
+    "exponencial": "Exponencial (tiempos de espera)",
+    "normal": "Normal (mediciones)",
+    "gamma": "Gamma (tiempos o montos positivos)",
+    "binomial": "Binomial (lanzamientos 0/1)",
+}
+
+def interpretar_estimacion(familia, estimaciones):
+    """
+    Proporciona una interpretación de las estimaciones de un conjunto de datos
+    según la familia.
+    """
+    if familia == "binomial":
+        return interpretar_p_hat(estimaciones["p"])
+    if familia == "poisson":
+        return f"En promedio ocurren **{estimaciones['lambda']:.4f}** eventos por intervalo."
+    if familia == "exponencial":
+        tasa = estimaciones["lambda"]
+        return f"La tasa estimada es **{tasa:.4f}** eventos por unidad de tiempo (espera media de {1 / tasa:.4f})."
+    if familia == "normal":
+        return (
+            f"Las mediciones se centran en **{estimaciones['mu']:.4f}** "
+            f"con una desviación típica de **{estimaciones['sigma']:.4f}**."
+        )
+    if familia == "gamma":
+        k, beta = estimaciones["k"], estimaciones["beta"]
+        return f"Forma **k = {k:.4f}** y tasa **β = {beta:.4f}**: la media es {k / beta:.4f} y la varianza {k / beta**2:.4f}."
+    return "No se pudo determinar una interpretación para esta familia."
+
+def mostrar_otras_familias():
+    """
+    Estimación por máxima verosimilitud para otras familias (Poisson,
+    exponencial, normal, gamma y binomial), de un conjunto de datos o de
+    muchos a la vez desde un CSV con una columna que identifica el conjunto
+    (por ejemplo, el estudiante). Todos los conjuntos se estiman en una sola
+    llamada vectorizada.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from verosimilitud import agrupar, agrupar_por_etiqueta, estimar_mle, obtener_familia
+
+    familia = st.selectbox(
+        "Familia", list(FAMILIAS_MLE), format_func=FAMILIAS_MLE.get, key="familia_mle"
+    )
+    distribucion = obtener_familia(familia)
+    origen = st.radio("Datos", ["Un conjunto", "Varios conjuntos (CSV)"], horizontal=True, key="familia_origen")
+
+    try:
+        if origen == "Un conjunto":
+            texto = st.text_area("Observaciones (separadas por comas o espacios)", key="familia_datos")
+            if not texto.strip():
+                return
+            etiquetas = np.array(["datos"])
+            valores, inicios = agrupar([[float(t) for t in texto.replace(",", " ").split()]])
+        else:
+            archivo = st.file_uploader("CSV con una fila por observación", type="csv", key="familia_csv")
+            if archivo is None:
+                return
+            df_familia = pd.read_csv(archivo)
+            col1, col2 = st.columns(2)
+            columna_conjunto = col1.selectbox("Columna del conjunto", df_familia.columns, key="familia_col_conjunto")
+            columna_valor = col2.selectbox(
+                "Columna de las observaciones", df_familia.columns, index=min(1, len(df_familia.columns) - 1),
+                key="familia_col_valor",
+            )
+            df_familia = df_familia[[columna_conjunto, columna_valor]].dropna()
+            etiquetas, valores, inicios = agrupar_por_etiqueta(
+                df_familia[columna_conjunto].astype(str).to_numpy(), df_familia[columna_valor].to_numpy(dtype=float)
+            )
+
+        resultado = estimar_mle(familia, valores, inicios)
+    except ValueError as e:
+        st.error(f"Error en los datos: {e}")
+        return
+
+    tabla = pd.DataFrame({"conjunto": etiquetas, **resultado})
+    st.write(f"**Estimaciones de máxima verosimilitud ({len(etiquetas)} conjuntos)**")
+    st.dataframe(tabla, hide_index=True)
+
+    conjunto = st.selectbox("Conjunto a graficar", range(len(etiquetas)), format_func=lambda i: str(etiquetas[i]), key="familia_conjunto")
+    estadisticos = {k: float(resultado[k][conjunto]) for k in distribucion.claves}
+    estimaciones = {k: float(v[conjunto]) for k, v in resultado.items()}
+    st.write("**Interpretación:**")
+    st.write(interpretar_estimacion(familia, estimaciones))
+
+    repeticion = repetir_seccion("familia")
+    if st.button("Generar el gráfico", key="familia_generar") or repeticion:
+        from vista_previa import grafico_verosimilitud_familia
+
+        config = {"familia": familia, "estadisticos": estadisticos}
+        with st.spinner(get_funny_spinner_text("mle")):
+            success, video_path, message, mejora = generar_video(
+                "LikelihoodFunction", config, vista_previa=grafico_verosimilitud_familia(familia, estadisticos),
+                mejorar=not repeticion,
+            )
+        if success and os.path.exists(video_path):
+            reproducir_video(video_path, mejora, "familia")
+        else:
+            st.error("No se pudo generar el video.")
+            st.text(message)
+
 def get_funny_spinner_text(section):
     """Generate humorous spinner texts for different sections."""
     if section == "mle":
@@ -81,26 +837,13 @@ def main():
     st.set_page_config(page_title="Métodos de Estimación", page_icon="📈")
     st.title("Análisis y Aplicación de Métodos de Estimación")
 
+    if PANEL_ADMINISTRACION:
+        mostrar_panel_administracion()
+
     # Inicialización de session_state
-    if 'show_mle_interpretation' not in st.session_state:
-        st.session_state.show_mle_interpretation = False
-    if 'show_regression_interpretation' not in st.session_state:
-        st.session_state.show_regression_interpretation = False
-    if 'mle_model_generated' not in st.session_state:
-        st.session_state.mle_model_generated = False
-    if 'regression_model_generated' not in st.session_state:
-        st.session_state.regression_model_generated = False
-    if 'x_value' not in st.session_state:
-        st.session_state.x_value = None
-    if 'n_value' not in st.session_state:
-        st.session_state.n_value = None
-    if 'regression_type' not in st.session_state:
-        st.session_state.regression_type = "Lineal"
-    if 'regression_coeficientes' not in st.session_state:
-        st.session_state.regression_coeficientes = None
-
-    # Configuración de la clave de la API de Gemini
-    key = st.secrets["GEMINIAPI"]["key"]
+    for clave, valor in ESTADO_INICIAL.items():
+        if clave not in st.session_state:
+            st.session_state[clave] = valor
 
     st.header("Sección 1: Máxima Verosimilitud (MLE)")
     st.write(r"""
@@ -127,48 +870,40 @@ def main():
     with st.form(key='parameters_form'):
         col1, col2 = st.columns(2)
         with col1:
-            n = st.number_input("Número de lanzamientos (n)", min_value=1, max_value=1000, value=10, step=1)
+            n = st.number_input("Número de lanzamientos (n)", min_value=1, max_value=1_000_000, value=10, step=1)
         with col2:
             x = st.number_input("Número de caras obtenidas (x)", min_value=0, max_value=n, value=7, step=1)
+        mostrar_intervalo_mle = st.checkbox("Marcar el intervalo de confianza en la animación")
         submit_button = st.form_submit_button(label='Generar el gráfico ')
 
-    if submit_button:
+    repeticion = repetir_seccion("mle")
+    if submit_button or repeticion:
         try:
             with st.spinner(get_funny_spinner_text("mle")):        
                 
-                # Calcular \hat{p}
-                p_hat = x / n
-
-                # Escribir los parámetros en config.json
-                config = {
-                    "n": int(n),
-                    "x": int(x)
-                }
-
-                try:
-                    with open("config.json", "w") as config_file:
-                        json.dump(config, config_file)
-                except Exception as e:
-                    st.error(f"Error al escribir el archivo de configuración: {e}")
-                    st.stop()
+                # \hat{p}, sus intervalos y los parámetros de la escena, compartidos entre sesiones
+                from intervalos import NIVEL_CONFIANZA
 
-                # Crear los directorios necesarios si no existen
-                video_directory = os.path.join("media", "videos", "manim", "1080p60")
-                os.makedirs(video_directory, exist_ok=True)
+                resultado = obtener_memo().obtener(
+                    clave_memo("mle", n=int(n), x=int(x), intervalo=mostrar_intervalo_mle),
+                    lambda: derivar_mle(int(n), int(x), mostrar_intervalo_mle),
+                )
+                p_hat = resultado["p_hat"]
+                intervalo_wilson_p = resultado["intervalo_wilson"]
+                intervalo_perfil_p = resultado["intervalo_perfil"]
 
-                # Ejecutar Manim para generar el video
-                success, message = run_manim("LikelihoodFunction")
+                # Obtener el video desde la caché o ejecutando Manim
+                success, video_path, message, mejora = generar_video(
+                    "LikelihoodFunction", resultado["config"], vista_previa=resultado["vista_previa"],
+                    mejorar=not repeticion,
+                )
 
                 if success:
-                    # Ruta al video generado
-                    video_path = os.path.join("media", "videos", "manim", "1080p60", "LikelihoodFunction.mp4")
-
                     if os.path.exists(video_path):
                         st.success("Gráfico de la función de verosimilitud generado exitosamente.")
 
-                        # Reproducir el video
-                        video_url = video_path.replace("\\", "/")  # Compatibilidad con Windows
-                        st.video(video_url)
+                        # Reproducir el video (se reemplaza por la versión de mayor calidad al estar lista)
+                        reproducir_video(video_path, mejora, "mle")
 
                         # Mostrar las fórmulas relevantes utilizando cadenas crudas
                         st.latex(r"L(p) = p^x (1 - p)^{n - x}")
@@ -177,15 +912,18 @@ def main():
                         # Mostrar el valor calculado de \hat{p}
                         st.subheader(r"Valor Estimado de $\hat{p}$")
                         st.write(f"El valor estimado de $\hat{{p}}$ es: **{p_hat:.4f}**")
+                        st.write(
+                            f"Intervalo de Wilson al {NIVEL_CONFIANZA:.0%}: "
+                            f"**[{intervalo_wilson_p[0]:.4f}, {intervalo_wilson_p[1]:.4f}]**"
+                        )
+                        st.write(
+                            f"Intervalo de verosimilitud perfil al {NIVEL_CONFIANZA:.0%}: "
+                            f"**[{intervalo_perfil_p[0]:.4f}, {intervalo_perfil_p[1]:.4f}]**"
+                        )
 
                         # Proporcionar una interpretación basada en el valor de \hat{p}
-                        interpretacion = interpretar_p_hat(p_hat)
                         st.write("**Interpretación:**")
-                        st.write(interpretacion)
-
-                        # Actualizar el estado para indicar que el modelo ha sido generado
-                        st.session_state.model_generated = True
-                        st.session_state.interpret = False  # Resetear interpretación si se regenera el modelo
+                        st.write(resultado["interpretacion"])
                     else:
                         st.error("El video no se encontró. Asegúrate de que Manim generó el video correctamente.")
                         st.text("Salida de Manim:")
@@ -195,13 +933,19 @@ def main():
                     st.text("Error de Manim:")
                     st.text(message)
 
-                st.session_state.x_value = x
-                st.session_state.n_value = n
+                st.session_state.mle_x = x
+                st.session_state.mle_n = n
                 st.session_state.mle_model_generated = True
 
         except Exception as e:
             st.error(f"Error: {e}")
 
+    with st.expander("📡 Lanzamientos en vivo (archivo o socket)"):
+        mostrar_flujo_lanzamientos()
+
+    with st.expander("📊 Otras distribuciones y lotes de datos"):
+        mostrar_otras_familias()
+
     with st.expander("💡Interpretación del Valor de $p$"):
         if not st.session_state.mle_model_generated:
             st.warning("Primero genera el gráfico de la función de verosimilitud.")
@@ -225,36 +969,17 @@ def main():
 
             if st.button("Generar Interpretación Avanzada", key="mle_interpret_btn"):
                 try:
-                    genai.configure(api_key=key)
-                    model = genai.GenerativeModel('gemini-1.5-flash')
+                    servicio = obtener_servicio_interpretacion()
                     
-                    prompt = f"""Analiza el experimento de lanzamiento de moneda con {st.session_state.n_value} lanzamientos y {st.session_state.x_value} caras. 
+                    prompt = f"""Analiza el experimento de lanzamiento de moneda con {st.session_state.mle_n} lanzamientos y {st.session_state.mle_x} caras. 
                     Proporciona una interpretación detallada del valor estimado de p y su significado estadístico. 
                     Explica qué implica este resultado sobre la naturaleza de la moneda."""
+                    entradas = {"seccion": "mle", "n": st.session_state.mle_n, "x": st.session_state.mle_x}
                     
                     with st.spinner(get_funny_spinner_text("mle")):
-                        response = model.generate_content(prompt)
-                        st.write(response.text)
-                        # Ruta al archivo JSON de Lottie
-                        try:
-                            base_dir = os.getcwd()
-                            lottie_path = os.path.join(base_dir, "gemini_logo.json")
-                            if os.path.exists(lottie_path):
-                                gemini_logo = load_lottie_file(lottie_path)
-
-                                # Mostrar la animación Lottie con tamaño pequeño
-                                st_lottie.st_lottie(
-                                    gemini_logo, 
-                                    key='logo', 
-                                    height=50,  # Ajusta la altura según tus necesidades
-                                    width=50,   # Ajusta el ancho según tus necesidades
-                                    loop=True,
-                                    quality="low"
-                                )
-                            else:
-                                st.warning("El archivo de animación Lottie no se encontró.")    
-                        except Exception as e:
-                            st.error(f"Error al cargar la animación Lottie: {e}")
+                        # El texto se muestra a medida que llega (o al instante si está en caché)
+                        st.write_stream(servicio.interpretar(entradas, prompt))
+                        mostrar_logo_gemini()
                 except Exception as e:
                     st.error(f"Error al generar interpretación: {e}")
 
@@ -262,6 +987,10 @@ def main():
 
     # Sección 2: Mínimos Cuadrados (LSE)
     st.header("Sección 2: Mínimos Cuadrados (LSE)")
+
+    # Se importan aquí para que la sección 1 se muestre antes de cargarlos
+    import numpy as np
+    import pandas as pd
     st.write(r"""
     **Descripción del Problema:**
     
@@ -279,12 +1008,21 @@ def main():
         'Horas Trabajadas (y)': [5, 7.5, 10, 11, 12]
     }
 
-    # Opción para usar datos por defecto o personalizados
+    # Opción para usar datos por defecto, personalizados o de un archivo
     data_option = st.radio(
         "Selecciona los datos", 
-        ["Datos por Defecto", "Ingresar Datos Personalizados"]
+        ["Datos por Defecto", "Ingresar Datos Personalizados", OPCION_ARCHIVO]
     )
 
+    # Pesos por fila (por ejemplo, la duración de cada turno) para mínimos cuadrados ponderados
+    if data_option != OPCION_ARCHIVO:
+        usar_pesos = st.checkbox(
+            f"Ponderar cada fila (columna {COLUMNA_PESOS})",
+            help="Las filas con más peso influyen más en el ajuste, por ejemplo si resumen turnos más largos."
+        )
+        if usar_pesos:
+            default_data[COLUMNA_PESOS] = [1.0] * len(default_data['Producción (x)'])
+
     # Entrada de datos
     if data_option == "Datos por Defecto":
         df = st.data_editor(
@@ -292,12 +1030,33 @@ def main():
             num_rows="dynamic",
             key="regression_data"
         )
-    else:
+    elif data_option == "Ingresar Datos Personalizados":
         df = st.data_editor(
-            pd.DataFrame(columns=['Producción (x)', 'Horas Trabajadas (y)']),
+            pd.DataFrame(columns=['Producción (x)', 'Horas Trabajadas (y)'] + ([COLUMNA_PESOS] if usar_pesos else [])),
             num_rows="dynamic",
             key="custom_regression_data"
         )
+    else:
+        # Archivos grandes: se leen por bloques sin cargarlos completos en memoria
+        df = None
+        archivo_datos = st.file_uploader("Archivo de datos", type=["csv", "parquet"])
+        # Rutas del servidor solo dentro del directorio de datos configurado
+        ruta_servidor = ""
+        if lectura_habilitada():
+            ruta_servidor = st.text_input(
+                "O ruta del archivo, relativa al directorio de datos del servidor",
+                help="Recomendado para archivos muy grandes, que así no pasan por la carga del navegador."
+            )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            columna_x = st.text_input("Columna de x", value="Producción (x)")
+        with col2:
+            columna_y = st.text_input("Columna de y", value="Horas Trabajadas (y)")
+        with col3:
+            columna_pesos = st.text_input(
+                "Columna de pesos (opcional)",
+                help="Pondera cada fila en el ajuste (mínimos cuadrados ponderados)."
+            ).strip() or None
 
     # Preguntas y opciones
     st.write("""
@@ -308,108 +1067,138 @@ def main():
     """)
 
     # Selección de modelo de regresión
-    modelo_regresion = st.selectbox(
-        "Selecciona el modelo de regresión",
-        ["Lineal", "Polinomial (grado 2)", "Polinomial (grado 3)"]
-    )
+    from seleccion_modelo import GRADO_MAXIMO
+
+    col1, col2 = st.columns(2)
+    with col1:
+        modelo_regresion = st.selectbox(
+            "Selecciona el modelo de regresión",
+            opciones_modelo(GRADO_MAXIMO)
+        )
+    with col2:
+        metodo_ajuste = st.selectbox(
+            "Método de ajuste",
+            list(METODOS_AJUSTE),
+            help="Los métodos robustos reducen el peso de los valores atípicos (por ejemplo, errores de registro)."
+        )
     st.session_state.regression_type = modelo_regresion
+    mostrar_banda = st.checkbox("Dibujar la banda de confianza bootstrap en la animación")
+
+    # Comparar todos los grados de una vez, sin generar videos
+    if st.button(f"Comparar grados (1 a {GRADO_MAXIMO})", key="compare_degrees"):
+        try:
+            fuente = fuente_archivo(ruta_servidor, archivo_datos) if data_option == OPCION_ARCHIVO else None
+            mostrar_comparacion_grados(
+                df, data_option, fuente,
+                columna_x if data_option == OPCION_ARCHIVO else None,
+                columna_y if data_option == OPCION_ARCHIVO else None,
+            )
+        except Exception as e:
+            st.error(f"Error: {e}")
 
     # Botón para generar el modelo de regresión
-    if st.button("Generar modelo de regresión", key="generate_regression"):
+    repeticion = repetir_seccion("regresion")
+    if st.button("Generar modelo de regresión", key="generate_regression") or repeticion:
         with st.spinner(get_funny_spinner_text("regression")):
             try:
-                if df.empty or df.isnull().values.any():
+                # Seleccionar el modelo de regresión
+                grado = grado_del_modelo(modelo_regresion)
+                metodo = METODOS_AJUSTE[metodo_ajuste]
+
+                resultado = None
+                if data_option == OPCION_ARCHIVO:
+                    fuente = fuente_archivo(ruta_servidor, archivo_datos)
+                    if not fuente:
+                        st.error("Por favor, carga un archivo o indica su ruta en el servidor.")
+                    else:
+                        # Los archivos se leen por bloques en cada ajuste, sin memoizar
+                        *datos_archivo, filas_totales = ajustar_archivo(
+                            fuente, grado, columna_x, columna_y, metodo, columna_pesos
+                        )
+                        resultado = derivar_regresion(
+                            tuple(datos_archivo), grado, False, mostrar_banda, filas_totales=filas_totales
+                        )
+                elif df.empty or df.isnull().values.any():
                     st.error("Por favor, asegúrate de que no haya celdas vacías en los datos.")
                 else:
-                    # Preparar los datos
-                    X = np.array(df['Producción (x)'])
-                    Y = np.array(df['Horas Trabajadas (y)'])
-                    n = len(X)
-
-                    # Seleccionar el modelo de regresión
-                    if modelo_regresion == "Lineal":
-                        grado = 1
-                    elif modelo_regresion == "Polinomial (grado 2)":
-                        grado = 2
-                    elif modelo_regresion == "Polinomial (grado 3)":
-                        grado = 3
-
-                    # Ajustar el modelo
-                    coeficientes = np.polyfit(X, Y, grado)
-                    polinomio = np.poly1d(coeficientes)
-                    Y_pred = polinomio(X)
-
-                    # Calcular los errores
-                    errores = Y - Y_pred
+                    # El ajuste y sus derivados se comparten entre sesiones con la misma tabla
+                    resultado = obtener_memo().obtener(
+                        clave_memo(
+                            "regresion", tabla=huella_tabla(df), grado=grado, metodo=metodo, banda=mostrar_banda
+                        ),
+                        lambda: derivar_regresion(
+                            ajustar_tabla(df, grado, data_option, metodo),
+                            grado,
+                            # El bootstrap remuestrea el ajuste por mínimos cuadrados sin pesos
+                            metodo is None and COLUMNA_PESOS not in df,
+                            mostrar_banda,
+                        ),
+                    )
+
+                if resultado is not None:
+                    coeficientes = resultado["coeficientes"]
+                    intervalos_coeficientes = resultado["intervalos"]
+                    pesos_robustos = resultado["pesos_robustos"]
 
                     st.session_state.regression_coeficientes = coeficientes.tolist()
                     st.session_state.regression_grado = grado
                     st.session_state.regression_model_generated = True
                     st.session_state.regression_type = modelo_regresion
-                    
-                    # Guardar los parámetros en config_regression.json
-                    config_regression = {
-                        "X": X.tolist(),
-                        "Y": Y.tolist(),
-                        "grado": grado,
-                        "coeficientes": coeficientes.tolist()
-                    }
-                    with open("config_regression.json", "w") as config_file:
-                        json.dump(config_regression, config_file)
-
-                    # Crear los directorios necesarios si no existen
-                    video_directory = os.path.join("media", "videos", "manim", "1080p60")
-                    os.makedirs(video_directory, exist_ok=True)
-
-                    # Ejecutar Manim para generar el video de regresión
-                    success, message = run_manim("RegressionFunction")
 
-                    if success:
-                        # Ruta al video generado
-                        video_path = os.path.join("media", "videos", "manim", "1080p60", "RegressionFunction.mp4")
+                    # Obtener el video de regresión desde la caché o ejecutando Manim
+                    success, video_path, message, mejora = generar_video(
+                        "RegressionFunction", resultado["config"], vista_previa=resultado["vista_previa"],
+                        mejorar=not repeticion,
+                    )
 
+                    if success:
                         if os.path.exists(video_path):
                             st.success("Modelo de regresión generado exitosamente.")
-                            st.session_state.model_generated = True
-                            st.session_state.show_interpretation = False
-                            # Reproducir el video
-                            video_url = video_path.replace("\\", "/")  # Compatibilidad con Windows
-                            st.video(video_url)
+                            # Reproducir el video (se reemplaza por la versión de mayor calidad al estar lista)
+                            reproducir_video(video_path, mejora, "regresion")
 
                             # Mostrar las fórmulas relevantes utilizando cadenas crudas
                             if grado == 1:
                                 st.latex(r"y = mx + b")
                             else:
                                 # Usar Markdown para saltos de línea
-                                coef_list = []
-                                for i, coef in enumerate(coeficientes[::-1]):
-                                    if grado - i == 0:
-                                        coef_list.append(f"**Intersección:** {coef:.4f}")
-                                    else:
-                                        coef_list.append(f"**Coeficiente de $x^{{{grado - i}}}$:** {coef:.4f}")
-                                coef_text = "<br>".join(coef_list)
-                                st.markdown(coef_text, unsafe_allow_html=True)
+                                st.markdown(resultado["formula"], unsafe_allow_html=True)
 
                             # Mostrar los coeficientes únicamente una vez
                             st.subheader("Valores de los Coeficientes")
-                            if grado == 1:
-                                m, b = coeficientes
-                                st.write(f"""**Pendiente (m):** **{m:.4f}**  
-                                            **Intersección (b):** **{b:.4f}**""")
+                            for linea in resultado["valores"]:
+                                st.write(linea)
+                            st.write(f"**Suma de los errores cuadrados:** **{resultado['suma_errores']:.4f}**")
+
+                            if intervalos_coeficientes is not None:
+                                from intervalos import NIVEL_CONFIANZA, REPLICAS_BOOTSTRAP
+
+                                inferiores, superiores, _ = intervalos_coeficientes
+                                st.subheader(f"Intervalos Bootstrap al {NIVEL_CONFIANZA:.0%}")
+                                st.dataframe(
+                                    pd.DataFrame({
+                                        "Término": [f"x^{grado - i}" if grado - i else "Intersección" for i in range(grado + 1)],
+                                        "Estimación": coeficientes,
+                                        "Inferior": inferiores,
+                                        "Superior": superiores,
+                                    }),
+                                    hide_index=True,
+                                )
+                                st.caption(f"{REPLICAS_BOOTSTRAP:,} réplicas bootstrap remuestreando pares (x, y).")
+                            elif data_option == OPCION_ARCHIVO:
+                                st.caption("Los intervalos bootstrap se calculan para las tablas; los archivos se leen por bloques sin remuestrearse.")
                             else:
-                                for i, coef in enumerate(coeficientes[::-1]):
-                                    if grado - i == 0:
-                                        st.write(f"""**Intersección:** **{coef:.4f}**""")
-                                    else:
-                                        st.write(f"""**Coeficiente de $x^{{{grado - i}}}$:** **{coef:.4f}**""")
-
-                            # Almacenar coeficientes y grado en session_state
-                            st.session_state.coeficientes = coeficientes
-                            st.session_state.grado = grado
-
-                            # Actualizar el estado para indicar que el modelo ha sido generado
-                            st.session_state.model_generated = True
-                            st.session_state.interpret = False  # Resetear interpretación si se regenera el modelo
+                                st.caption("Los intervalos bootstrap se calculan para el ajuste por mínimos cuadrados sin pesos.")
+
+                            if pesos_robustos is not None:
+                                from regresion_robusta import UMBRAL_ATIPICO
+
+                                atipicos = int(np.count_nonzero(pesos_robustos < UMBRAL_ATIPICO))
+                                st.caption(
+                                    f"{atipicos:,} de {len(pesos_robustos):,} puntos{' de la muestra' if data_option == OPCION_ARCHIVO else ''} "
+                                    f"quedaron con peso menor a {UMBRAL_ATIPICO:g} (resaltados en la animación)."
+                                )
+
                         else:
                             st.error("El video no se encontró. Asegúrate de que Manim generó el video correctamente.")
                             st.text("Salida de Manim:")
@@ -424,7 +1213,7 @@ def main():
                 st.error(f"Error: {e}")
 
     # Regression Interpretation Expander
-    expander_title = "💡Interpretación de la Regresión Lineal" if st.session_state.regression_type == "Lineal" else f"💡Interpretación de la Regresión Polinomial (Grado {2 if st.session_state.regression_type == 'Polinomial (grado 2)' else 3})"
+    expander_title = "💡Interpretación de la Regresión Lineal" if st.session_state.regression_type == "Lineal" else f"💡Interpretación de la Regresión Polinomial (Grado {grado_del_modelo(st.session_state.regression_type)})"
     
     with st.expander(expander_title):
         if not st.session_state.regression_model_generated:
@@ -440,48 +1229,36 @@ def main():
             # Gemini Interpretation Button (Only for Regression)
             if st.button("Generar Interpretación Avanzada", key="regression_interpret_btn"):
                 try:
-                    genai.configure(api_key=key)
-                    model = genai.GenerativeModel('gemini-1.5-flash')
+                    servicio = obtener_servicio_interpretacion()
                     
                     # Prepare the prompt based on regression type
                     if st.session_state.regression_coeficientes is not None:
                         coeficientes = st.session_state.regression_coeficientes
-                        grado = 1 if st.session_state.regression_type == "Lineal" else (2 if st.session_state.regression_type == "Polinomial (grado 2)" else 3)
+                        grado = st.session_state.regression_grado
                         
                         prompt = f"""Analiza la regresión {'lineal' if grado == 1 else f'polinomial de grado {grado}'} con los siguientes coeficientes: {coeficientes}. 
                         Proporciona una interpretación detallada de estos coeficientes en el contexto de la relación entre variables."""
+                        entradas = {"seccion": "regresion", "grado": grado, "coeficientes": coeficientes}
                         
                         with st.spinner(get_funny_spinner_text("regression")):
-                            response = model.generate_content(prompt)
-                            st.write(response.text)
-                                                # Cargar y mostrar la animación Lottie
-                        def load_lottie_file(filepath: str):
-                            with open(filepath, 'r') as f:
-                                return json.load(f)
-
-                        # Ruta al archivo JSON de Lottie
-                        try:
-                            base_dir = os.getcwd()
-                            lottie_path = os.path.join(base_dir, "gemini_logo.json")
-                            if os.path.exists(lottie_path):
-                                gemini_logo = load_lottie_file(lottie_path)
-
-                                # Mostrar la animación Lottie con tamaño pequeño
-                                st_lottie.st_lottie(
-                                    gemini_logo, 
-                                    key='logo', 
-                                    height=50,  # Ajusta la altura según tus necesidades
-                                    width=50,   # Ajusta el ancho según tus necesidades
-                                    loop=True,
-                                    quality="low"
-                                )
-                            else:
-                                st.warning("El archivo de animación Lottie no se encontró.")    
-                        except Exception as e:
-                            st.error(f"Error al cargar la animación Lottie: {e}")
+                            # El texto se muestra a medida que llega (o al instante si está en caché)
+                            st.write_stream(servicio.interpretar(entradas, prompt))
+                        mostrar_logo_gemini()
                     else:
                         st.error("No se encontraron los coeficientes del modelo.")
                 except Exception as e:
                     st.error(f"Error al generar la interpretación: {e}")
+def ejecutar_y_medir():
+    """
+    Ejecuta main() y registra su duración. En la primera ejecución del
+    proceso también registra el arranque en frío: desde que inició el proceso
+    hasta que terminó de dibujarse la primera página.
+    """
+    inicio = time.perf_counter()
+    try:
+        main()
+    finally:
+        REGISTRO.registrar_ejecucion(time.perf_counter() - inicio, DURACION_IMPORTACION, inicio_proceso())
+
 if __name__ == "__main__":
-    main()
+    ejecutar_y_medir()
@@ -0,0 +1,246 @@
+"""
+Benchmarks reproducibles de los caminos críticos de render y estimación.
+
+Casos disponibles:
+
+- verosimilitud: tiempo de render de LikelihoodFunction según n.
+- regresion: tiempo de render de RegressionFunction según filas y grado.
+- polyfit: tiempo de ajuste (np.polyfit y ajuste incremental) según filas.
+- run_manim: latencia de un render en frío (CLI) frente a un worker caliente.
+- config: serialización de la configuración y cálculo de la clave de caché.
+
+Los resultados se guardan en JSON para comparar corridas. Con `--stub` los
+renders usan el modo `dry_run` de Manim, que construye y anima las escenas
+sin codificar con ffmpeg, para separar el costo de geometría/LaTeX del de
+codificación.
+
+Uso:
+
+    python benchmark.py --salida actual.json --comparar base.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from cache_render import clave_render
+from calidades import obtener_nivel
+from regresion_incremental import AcumuladorMinimosCuadrados
+
+CASOS = ["verosimilitud", "regresion", "polyfit", "run_manim", "config"]
+
+TAMANOS_N = [10, 1_000, 100_000, 1_000_000]
+TAMANOS_FILAS = [10, 100, 1_000, 100_000]
+TAMANOS_POLYFIT = [1_000, 10_000, 100_000, 1_000_000]
+GRADOS = [1, 2, 3]
+
+
+def medir(funcion, repeticiones):
+    """Ejecuta `funcion` varias veces y devuelve los tiempos en segundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def resultado(caso, parametros, tiempos):
+    return {
+        "caso": caso,
+        "parametros": parametros,
+        "segundos": [round(t, 6) for t in tiempos],
+        "mediana": round(statistics.median(tiempos), 6),
+        "minimo": round(min(tiempos), 6),
+    }
+
+
+def datos_regresion(filas, grado, semilla=0):
+    """Dataset sintético reproducible para la escena de regresión."""
+    rng = np.random.default_rng(semilla)
+    X = np.sort(rng.uniform(1, 10, filas))
+    Y = 2 * X + 5 + rng.normal(0, 1, filas)
+    return {
+        "X": X.tolist(),
+        "Y": Y.tolist(),
+        "grado": grado,
+        "coeficientes": np.polyfit(X, Y, grado).tolist(),
+    }
+
+
+def renderizar_en_proceso(escena, parametros, calidad, stub):
+    """Renderiza en este proceso (Manim ya importado) y falla si el render falla."""
+    from worker_manim import renderizar
+
+    with tempfile.TemporaryDirectory() as directorio:
+        opciones = {"dry_run": True} if stub else None
+        exito, _, logs, _ = renderizar(escena, parametros, directorio, obtener_nivel(calidad).calidad_manim, opciones)
+    if not exito:
+        raise RuntimeError(f"Falló el render de {escena}:\n{logs}")
+
+
+def caso_verosimilitud(args):
+    for n in TAMANOS_N:
+        parametros = {"n": n, "x": int(0.7 * n)}
+        tiempos = medir(lambda: renderizar_en_proceso("LikelihoodFunction", parametros, args.calidad, args.stub), args.repeticiones)
+        yield resultado("verosimilitud", {"n": n}, tiempos)
+
+
+def caso_regresion(args):
+    for filas in TAMANOS_FILAS:
+        for grado in GRADOS:
+            parametros = datos_regresion(filas, grado)
+            tiempos = medir(lambda: renderizar_en_proceso("RegressionFunction", parametros, args.calidad, args.stub), args.repeticiones)
+            yield resultado("regresion", {"filas": filas, "grado": grado}, tiempos)
+
+
+def caso_polyfit(args):
+    rng = np.random.default_rng(0)
+    for filas in TAMANOS_POLYFIT:
+        X = rng.uniform(0, 100, filas)
+        Y = 3 * X + rng.normal(0, 5, filas)
+        for grado in GRADOS:
+            tiempos = medir(lambda: np.polyfit(X, Y, grado), args.repeticiones)
+            yield resultado("polyfit", {"filas": filas, "grado": grado, "metodo": "np.polyfit"}, tiempos)
+
+            def incremental():
+                acumulador = AcumuladorMinimosCuadrados(grado)
+                acumulador.agregar(X, Y)
+                acumulador.coeficientes()
+
+            tiempos = medir(incremental, args.repeticiones)
+            yield resultado("polyfit", {"filas": filas, "grado": grado, "metodo": "incremental"}, tiempos)
+
+
+def caso_run_manim(args):
+    from trabajos_render import ARCHIVOS_CONFIG, run_manim
+    from worker_manim import PoolManim
+
+    escena = "LikelihoodFunction"
+    parametros = {"n": 10, "x": 7}
+    nivel = obtener_nivel(args.calidad)
+    flags = [nivel.flag] + (["--dry_run"] if args.stub else [])
+
+    def en_frio():
+        with tempfile.TemporaryDirectory() as directorio:
+            with open(os.path.join(directorio, ARCHIVOS_CONFIG[escena]), "w") as config_file:
+                json.dump(parametros, config_file)
+            exito, mensaje = run_manim(escena, flags, directorio)
+        if not exito:
+            raise RuntimeError(f"Falló el render con la CLI:\n{mensaje}")
+
+    yield resultado("run_manim", {"modo": "frio"}, medir(en_frio, args.repeticiones))
+
+    pool = PoolManim(1)
+    opciones = {"dry_run": True} if args.stub else None
+    try:
+        def en_caliente():
+            with tempfile.TemporaryDirectory() as directorio:
+                exito, _, logs, _ = pool.renderizar(escena, parametros, directorio, nivel.calidad_manim, opciones=opciones)
+            if not exito:
+                raise RuntimeError(f"Falló el render en el worker:\n{logs}")
+
+        en_caliente()  # Calentamiento: el worker importa Manim en el primer render
+        yield resultado("run_manim", {"modo": "caliente"}, medir(en_caliente, args.repeticiones))
+    finally:
+        pool.detener()
+
+
+def caso_config(args):
+    configs = {
+        "verosimilitud": {"n": 10, "x": 7},
+        "regresion_5": datos_regresion(5, 1),
+        "regresion_100000": datos_regresion(100_000, 3),
+    }
+    for nombre, config in configs.items():
+        tiempos = medir(lambda: json.dumps(config), args.repeticiones)
+        yield resultado("config", {"config": nombre, "operacion": "json.dumps"}, tiempos)
+        tiempos = medir(lambda: clave_render("Escena", config, ["-qh"]), args.repeticiones)
+        yield resultado("config", {"config": nombre, "operacion": "clave_render"}, tiempos)
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Compara las medianas con una corrida anterior. Retorna la lista de casos
+    que empeoraron más que la tolerancia relativa.
+    """
+    def clave(r):
+        return r["caso"], json.dumps(r["parametros"], sort_keys=True)
+
+    anteriores = {clave(r): r for r in base["resultados"]}
+    regresiones = []
+    for r in actual["resultados"]:
+        anterior = anteriores.get(clave(r))
+        if anterior is None or anterior["mediana"] == 0:
+            continue
+        razon = r["mediana"] / anterior["mediana"]
+        marca = "  <-- REGRESIÓN" if razon > 1 + tolerancia else ""
+        print(f"{r['caso']:14} {json.dumps(r['parametros'], ensure_ascii=False):60} x{razon:.2f}{marca}")
+        if marca:
+            regresiones.append(r)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de render y estimación.")
+    parser.add_argument("--casos", nargs="+", choices=CASOS, default=CASOS, help="Casos a ejecutar.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--calidad", default="baja", help="Nivel de calidad de los renders.")
+    parser.add_argument("--stub", action="store_true", help="Renderizar sin codificar video (dry_run de Manim).")
+    parser.add_argument("--salida", default="benchmark.json", help="Ruta del JSON de resultados.")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo tolerado al comparar.")
+    args = parser.parse_args()
+
+    funciones = {
+        "verosimilitud": caso_verosimilitud,
+        "regresion": caso_regresion,
+        "polyfit": caso_polyfit,
+        "run_manim": caso_run_manim,
+        "config": caso_config,
+    }
+
+    resultados = []
+    omitidos = {}
+    for caso in args.casos:
+        print(f"Ejecutando {caso}...", file=sys.stderr)
+        try:
+            for r in funciones[caso](args):
+                print(f"  {json.dumps(r['parametros'], ensure_ascii=False)}: {r['mediana']:.4f}s", file=sys.stderr)
+                resultados.append(r)
+        except (ImportError, RuntimeError, FileNotFoundError) as e:
+            # Por ejemplo, Manim o ffmpeg no están instalados en esta máquina
+            omitidos[caso] = str(e)
+            print(f"  omitido: {e}", file=sys.stderr)
+
+    salida = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.platform(),
+        "cpus": os.cpu_count(),
+        "calidad": args.calidad,
+        "stub": args.stub,
+        "repeticiones": args.repeticiones,
+        "resultados": resultados,
+        "omitidos": omitidos,
+    }
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(salida, archivo, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {args.salida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        if comparar(salida, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Caché de LaTeX a SVG compartida por todos los procesos de render.
+
+Manim guarda los SVG compilados dentro del `media_dir` de cada render, que
+en la cola es un directorio de trabajo distinto por trabajo y se borra al
+terminar. Esta caché los conserva en un directorio común, indexados por la
+expresión, el entorno y la plantilla de LaTeX, de modo que cada expresión se
+compila una sola vez en toda la máquina.
+
+Precalentar la caché (también lo hace cada worker al arrancar):
+
+    python cache_latex.py
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+# Directorio de la caché compartida de SVG
+DIRECTORIO_CACHE_LATEX = os.environ.get("LATEX_CACHE_DIR", os.path.join("media", "cache", "tex"))
+
+# Etiquetas fijas de las escenas, como (clase, expresión)
+ETIQUETAS_FIJAS = [
+    ("Tex", "Producción (x)"),
+    ("Tex", "Horas Trabajadas (y)"),
+    ("MathTex", "p"),
+    ("MathTex", "L(p) = p^x (1-p)^{n-x}"),
+    ("MathTex", r"L(p) / L(\hat{p})"),
+    # Parámetros de las demás familias de LikelihoodFunction
+    *[("MathTex", simbolo) for simbolo in (r"\lambda", r"\mu", "k")],
+    *[("MathTex", rf"L({simbolo}) / L(\hat{{{simbolo}}})") for simbolo in (r"\lambda", r"\mu", "k")],
+]
+
+# Números de marcas frecuentes. DecimalNumber compila cada carácter por
+# separado, así que con estos quedan cubiertos todos los dígitos y signos.
+NUMEROS_COMUNES = [-0.5, *[i / 10 for i in range(11)], *range(-10, 101, 5), 1234567890]
+
+_directorio = None
+_original = None
+
+
+def clave_latex(expresion, entorno, plantilla):
+    """Clave de la expresión: el código TeX completo y el compilador que lo procesa."""
+    if entorno is not None:
+        codigo = plantilla.get_texcode_for_expression_in_env(expresion, entorno)
+    else:
+        codigo = plantilla.get_texcode_for_expression(expresion)
+    contenido = "\0".join([codigo, plantilla.tex_compiler, plantilla.output_format])
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _tex_to_svg_file(expression, environment=None, tex_template=None):
+    """Reemplazo de `tex_to_svg_file` de Manim que consulta la caché compartida."""
+    from manim import config
+
+    plantilla = tex_template if tex_template is not None else config["tex_template"]
+    ruta = Path(_directorio) / f"{clave_latex(expression, environment, plantilla)}.svg"
+    if ruta.exists():
+        return ruta
+
+    # Compilar en el directorio del render actual y publicar el SVG con un
+    # reemplazo atómico, por si otro proceso compila la misma expresión
+    svg = _original(expression, environment, tex_template)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta_tmp = ruta.with_name(f"{ruta.name}.{uuid.uuid4().hex}.tmp")
+    shutil.copyfile(svg, ruta_tmp)
+    os.replace(ruta_tmp, ruta)
+    return ruta
+
+
+def instalar_cache_latex(directorio=DIRECTORIO_CACHE_LATEX):
+    """
+    Hace que Manim use la caché compartida al compilar Tex y MathTex. Se
+    instala una sola vez por proceso.
+    """
+    global _directorio, _original
+    if _original is not None:
+        return
+    from manim.mobject.text import tex_mobject
+    from manim.utils import tex_file_writing
+
+    _directorio = os.path.abspath(directorio)
+    _original = tex_file_writing.tex_to_svg_file
+    # tex_mobject importa la función por nombre, así que se reemplaza en ambos módulos
+    tex_file_writing.tex_to_svg_file = _tex_to_svg_file
+    tex_mobject.tex_to_svg_file = _tex_to_svg_file
+
+
+def precalentar_cache_latex(etiquetas=ETIQUETAS_FIJAS, numeros=NUMEROS_COMUNES):
+    """
+    Compila las etiquetas fijas y los números de marcas más comunes para que
+    los renders posteriores los encuentren en la caché.
+
+    Retorna la cantidad de expresiones preparadas; 0 si LaTeX no está
+    disponible.
+    """
+    instalar_cache_latex()
+    from manim import DecimalNumber, MathTex, Tex, tempconfig
+
+    clases = {"Tex": Tex, "MathTex": MathTex}
+    with tempfile.TemporaryDirectory() as directorio:
+        try:
+            with tempconfig({"media_dir": directorio}):
+                for clase, expresion in etiquetas:
+                    clases[clase](expresion)
+                for numero in numeros:
+                    DecimalNumber(numero, num_decimal_places=1 if isinstance(numero, float) else 0)
+        except (OSError, RuntimeError, ValueError):
+            # Sin LaTeX instalado no hay nada que precalentar
+            return 0
+    return len(etiquetas) + len(numeros)
+
+
+if __name__ == "__main__":
+    from worker_manim import importar_escenas
+
+    importar_escenas()
+    print(f"{precalentar_cache_latex()} expresiones precalentadas en {os.path.abspath(DIRECTORIO_CACHE_LATEX)}")
@@ -0,0 +1,280 @@
+import ast
+import contextlib
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows no dispone de fcntl
+    fcntl = None
+
+# Directorio y tamaño máximo de la caché (configurables por variables de entorno)
+DIRECTORIO_CACHE = os.environ.get("RENDER_CACHE_DIR", os.path.join("media", "cache"))
+MAX_MB_CACHE = float(os.environ.get("RENDER_CACHE_MAX_MB", 2048))
+
+# Script de las escenas: su código, el de los módulos del proyecto que importa
+# y la versión de Manim forman la versión del renderizador
+SCRIPT_ESCENAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manim.py")
+
+# Coeficientes menores que esta fracción del mayor se consideran cero en la clave
+TOLERANCIA_COEFICIENTES = 1e-10
+
+ARCHIVO_INDICE = "indice.json"
+ARCHIVO_BLOQUEO = ".bloqueo"
+
+
+def normalizar_valor(valor):
+    """
+    Convierte un valor de configuración a una forma canónica para que
+    configuraciones equivalentes (por ejemplo 5 y 5.0, o tipos de NumPy)
+    produzcan la misma clave.
+    """
+    if isinstance(valor, dict):
+        return {
+            str(k): normalizar_valor(normalizar_coeficientes(v) if k == "coeficientes" else v)
+            for k, v in sorted(valor.items())
+        }
+    if isinstance(valor, (list, tuple)):
+        return [normalizar_valor(v) for v in valor]
+    if hasattr(valor, "tolist"):  # arreglos y escalares de NumPy
+        return normalizar_valor(valor.tolist())
+    if isinstance(valor, bool) or valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, (int, float)):
+        # Redondear a 10 cifras significativas: ajustes que difieren solo en el
+        # último bit (por ejemplo, polyfit frente al ajuste incremental)
+        # producen el mismo video y deben compartir la clave
+        valor = float(f"{float(valor):.10g}")
+        if valor.is_integer():
+            return int(valor)
+        return valor
+    return str(valor)
+
+
+def normalizar_coeficientes(coeficientes, tolerancia=TOLERANCIA_COEFICIENTES):
+    """
+    Lleva a cero los coeficientes despreciables frente al mayor del vector.
+    Un coeficiente que debería ser cero queda como ruido de redondeo cuyo
+    valor depende del método de ajuste (por ejemplo, 2.6e-16 frente a
+    7.3e-17) y el redondeo a cifras significativas no los iguala.
+    """
+    if hasattr(coeficientes, "tolist"):  # arreglos de NumPy
+        coeficientes = coeficientes.tolist()
+    coeficientes = [float(c) for c in coeficientes]
+    escala = max((abs(c) for c in coeficientes), default=0.0)
+    return [0.0 if abs(c) <= tolerancia * escala else c for c in coeficientes]
+
+
+def modulos_locales(script):
+    """
+    Rutas del script y de los módulos del proyecto (archivos `.py` de su
+    mismo directorio) que importa, directa o indirectamente.
+    """
+    directorio = os.path.dirname(os.path.abspath(script))
+    vistos = set()
+    pendientes = [os.path.abspath(script)]
+    while pendientes:
+        ruta = pendientes.pop()
+        if ruta in vistos:
+            continue
+        vistos.add(ruta)
+        with open(ruta, "rb") as archivo:
+            arbol = ast.parse(archivo.read(), ruta)
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Import):
+                nombres = [alias.name for alias in nodo.names]
+            elif isinstance(nodo, ast.ImportFrom) and nodo.level == 0 and nodo.module:
+                nombres = [nodo.module]
+            else:
+                continue
+            for nombre in nombres:
+                candidato = os.path.join(directorio, nombre.split(".")[0] + ".py")
+                if os.path.isfile(candidato):
+                    pendientes.append(candidato)
+    return sorted(vistos)
+
+
+@functools.lru_cache(maxsize=None)
+def version_renderizador(script=SCRIPT_ESCENAS):
+    """
+    Hash del código de las escenas (el script y los módulos del proyecto
+    que importa) y de la versión de Manim instalada. Forma parte de la
+    clave de cada video, de modo que al cambiar ese código o actualizar
+    Manim los videos anteriores dejan de servirse. Se calcula una vez por
+    proceso.
+    """
+    h = hashlib.sha256()
+    for ruta in modulos_locales(script):
+        h.update(os.path.basename(ruta).encode("utf-8") + b"\0")
+        with open(ruta, "rb") as archivo:
+            h.update(hashlib.sha256(archivo.read()).digest())
+    try:
+        version_manim = importlib.metadata.version("manim")
+    except importlib.metadata.PackageNotFoundError:
+        version_manim = "sin manim"
+    h.update(version_manim.encode("utf-8"))
+    return h.hexdigest()
+
+
+def clave_render(escena, config, flags):
+    """
+    Calcula la clave de la caché a partir del nombre de la escena, la
+    configuración normalizada, los flags de calidad de Manim y la versión
+    del renderizador.
+    """
+    contenido = json.dumps(
+        {
+            "renderizador": version_renderizador(),
+            "escena": escena,
+            "config": normalizar_valor(config),
+            "flags": list(flags),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheRender:
+    """
+    Caché persistente en disco de videos renderizados, direccionada por
+    contenido y con desalojo LRU acotado por tamaño.
+
+    El índice (entradas y contadores de aciertos/fallos) se guarda en
+    `indice.json` dentro del directorio de la caché, de modo que se comparte
+    entre procesos y sobrevive a reinicios de la aplicación.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, max_mb=MAX_MB_CACHE):
+        self.directorio = directorio
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        os.makedirs(self.directorio, exist_ok=True)
+
+    # --- Manejo del índice -------------------------------------------------
+
+    def _ruta_indice(self):
+        return os.path.join(self.directorio, ARCHIVO_INDICE)
+
+    def _cargar_indice(self):
+        try:
+            with open(self._ruta_indice(), "r") as f:
+                indice = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            indice = {}
+        indice.setdefault("entradas", {})
+        indice.setdefault("aciertos", 0)
+        indice.setdefault("fallos", 0)
+        return indice
+
+    def _guardar_indice(self, indice):
+        ruta_tmp = self._ruta_indice() + ".tmp"
+        with open(ruta_tmp, "w") as f:
+            json.dump(indice, f)
+        os.replace(ruta_tmp, self._ruta_indice())
+
+    @contextlib.contextmanager
+    def _bloquear(self):
+        """Bloqueo entre hilos y, si es posible, entre procesos."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directorio, ARCHIVO_BLOQUEO), "w") as archivo:
+                fcntl.flock(archivo, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(archivo, fcntl.LOCK_UN)
+
+    # --- API pública -------------------------------------------------------
+
+    def contiene(self, clave):
+        """Indica si la clave está en la caché, sin modificar los contadores."""
+        with self._bloquear():
+            entrada = self._cargar_indice()["entradas"].get(clave)
+        return entrada is not None and os.path.exists(os.path.join(self.directorio, entrada["archivo"]))
+
+    def obtener(self, clave):
+        """
+        Devuelve la ruta del video almacenado para la clave o None si no existe.
+        Actualiza los contadores de aciertos/fallos y la marca de último acceso.
+        """
+        with self._bloquear():
+            indice = self._cargar_indice()
+            entrada = indice["entradas"].get(clave)
+            ruta = os.path.join(self.directorio, entrada["archivo"]) if entrada else None
+
+            if ruta is not None and os.path.exists(ruta):
+                entrada["ultimo_acceso"] = time.time()
+                indice["aciertos"] += 1
+            else:
+                # Entrada inexistente o archivo borrado externamente
+                indice["entradas"].pop(clave, None)
+                indice["fallos"] += 1
+                ruta = None
+
+            self._guardar_indice(indice)
+            return ruta
+
+    def guardar(self, clave, video_path, escena=None):
+        """
+        Copia el video generado a la caché y desaloja las entradas menos
+        usadas recientemente hasta respetar el tamaño máximo.
+        """
+        nombre = f"{clave}{os.path.splitext(video_path)[1] or '.mp4'}"
+        destino = os.path.join(self.directorio, nombre)
+        destino_tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(video_path, destino_tmp)
+        os.replace(destino_tmp, destino)
+
+        with self._bloquear():
+            indice = self._cargar_indice()
+            indice["entradas"][clave] = {
+                "archivo": nombre,
+                "escena": escena,
+                "bytes": os.path.getsize(destino),
+                "ultimo_acceso": time.time(),
+            }
+            self._desalojar(indice, conservar=clave)
+            self._guardar_indice(indice)
+        return destino
+
+    def _desalojar(self, indice, conservar=None):
+        entradas = indice["entradas"]
+        total = sum(e["bytes"] for e in entradas.values())
+        for clave in sorted(entradas, key=lambda c: entradas[c]["ultimo_acceso"]):
+            if total <= self.max_bytes:
+                break
+            if clave == conservar:
+                continue
+            entrada = entradas.pop(clave)
+            total -= entrada["bytes"]
+            try:
+                os.remove(os.path.join(self.directorio, entrada["archivo"]))
+            except FileNotFoundError:
+                pass
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores de aciertos/fallos, la tasa de aciertos y
+        la ocupación actual de la caché.
+        """
+        with self._bloquear():
+            indice = self._cargar_indice()
+        consultas = indice["aciertos"] + indice["fallos"]
+        return {
+            "aciertos": indice["aciertos"],
+            "fallos": indice["fallos"],
+            "tasa_aciertos": indice["aciertos"] / consultas if consultas else 0.0,
+            "entradas": len(indice["entradas"]),
+            "bytes": sum(e["bytes"] for e in indice["entradas"].values()),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,139 @@
+"""
+Caché de segmentos de video compartida por todos los renders.
+
+Manim ya guarda cada llamada a `play`/`wait` como un segmento parcial cuyo
+nombre es un hash de las animaciones, de los mobjects en escena y de la
+configuración de la cámara y del codificador; si el segmento existe, no lo
+vuelve a generar. Pero los segmentos quedan en el `media_dir` de cada render,
+que en la cola es un directorio de trabajo distinto por trabajo y se borra al
+terminar. Esta caché los publica en un directorio común, de modo que un
+render que solo cambia la curva ajustada reutiliza los segmentos de los ejes
+y de los puntos de renders anteriores y solo codifica los que cambiaron.
+
+Manim escribe los segmentos directamente en su ruta final, así que no se
+comparte su directorio entre renders concurrentes (otro render podría leer
+un segmento a medio escribir): cada render sigue escribiendo en el suyo y
+los segmentos terminados se enlazan a la caché común al finalizar.
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+# Directorio de la caché compartida de segmentos
+DIRECTORIO_CACHE_SEGMENTOS = os.environ.get("RENDER_SEGMENT_CACHE_DIR", os.path.join("media", "cache", "segmentos"))
+
+# Máximo de segmentos en la caché; se eliminan los usados menos recientemente
+MAX_SEGMENTOS = int(os.environ.get("RENDER_SEGMENT_CACHE_MAX_FILES", 2000))
+
+# Directorio común de los SVG de `Text`. La ruta del SVG forma parte del hash
+# de los segmentos, así que debe ser la misma en todos los renders.
+DIRECTORIO_TEXTOS = os.environ.get("TEXT_CACHE_DIR", os.path.join("media", "cache", "texto"))
+
+_directorio = None
+
+
+def _enlazar(origen, destino):
+    """Enlaza (o copia) `origen` en `destino` de forma atómica."""
+    temporal = destino.with_name(f"{destino.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(origen, temporal)
+    except OSError:
+        # Sistemas de archivos sin enlaces duros o en otro dispositivo
+        shutil.copyfile(origen, temporal)
+    os.replace(temporal, destino)
+
+
+def _ruta_compartida(ruta_segmento):
+    return Path(_directorio) / Path(ruta_segmento).name
+
+
+def _buscar_en_cache(original):
+    def is_already_cached(self, hash_invocation):
+        if original(self, hash_invocation):
+            return True
+        if not self.output_spec.is_video:
+            return False
+        destino = self.output_plan.segment_path(hash_invocation)
+        compartido = _ruta_compartida(destino)
+        try:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            _enlazar(compartido, destino)
+            # Marca de uso para el desalojo LRU (el atime no es confiable)
+            os.utime(compartido)
+        except FileNotFoundError:
+            return False
+        return True
+    return is_already_cached
+
+
+def _publicar_al_terminar(original):
+    def finish(self):
+        original(self)
+        if not self.output_spec.is_video:
+            return
+        Path(_directorio).mkdir(parents=True, exist_ok=True)
+        for ruta in self.partial_movie_files:
+            if ruta is None or not os.path.exists(ruta):
+                continue
+            compartido = _ruta_compartida(ruta)
+            if not compartido.exists():
+                _enlazar(ruta, compartido)
+        podar_cache_segmentos()
+    return finish
+
+
+def podar_cache_segmentos(directorio=None, max_segmentos=MAX_SEGMENTOS):
+    """Elimina los segmentos usados menos recientemente por encima del máximo."""
+    directorio = directorio or _directorio or DIRECTORIO_CACHE_SEGMENTOS
+    segmentos = []
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                try:
+                    segmentos.append((entrada.stat().st_mtime, entrada.path))
+                except FileNotFoundError:
+                    continue
+    exceso = len(segmentos) - max_segmentos
+    for _, ruta in sorted(segmentos)[:max(exceso, 0)]:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def internos_compatibles():
+    """
+    Indica si la versión de Manim instalada tiene los internos de
+    `SceneFileWriter` que usa esta caché (`output_spec.is_video` y
+    `output_plan.segment_path`, desde Manim 0.22).
+    """
+    try:
+        from manim._config.output import OutputSpec
+        from manim._config.output_plan import OutputPlan
+    except ImportError:
+        return False
+    return hasattr(OutputSpec, "is_video") and hasattr(OutputPlan, "segment_path")
+
+
+def instalar_cache_segmentos(directorio=DIRECTORIO_CACHE_SEGMENTOS, directorio_textos=DIRECTORIO_TEXTOS):
+    """
+    Hace que Manim busque los segmentos en la caché compartida y publique en
+    ella los que genera. Se instala una sola vez por proceso. Con versiones
+    de Manim sin los internos necesarios no se instala (se avisa en el log)
+    y cada render usa solo sus propios segmentos.
+    """
+    global _directorio
+    if _directorio is not None:
+        return
+    from manim import config, logger
+    from manim.scene.scene_file_writer import SceneFileWriter
+
+    if not internos_compatibles():
+        logger.warning("Caché de segmentos desactivada: requiere Manim 0.22 o posterior.")
+        return
+
+    _directorio = os.path.abspath(directorio)
+    SceneFileWriter.is_already_cached = _buscar_en_cache(SceneFileWriter.is_already_cached)
+    SceneFileWriter.finish = _publicar_al_terminar(SceneFileWriter.finish)
+    config.text_dir = os.path.abspath(directorio_textos)
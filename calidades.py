@@ -0,0 +1,66 @@
+import os
+from collections import namedtuple
+
+# Un nivel de la escalera de calidad: flag de la CLI de Manim, nombre de la
+# calidad en la configuración de Manim y subdirectorio donde Manim deja el video.
+NivelCalidad = namedtuple("NivelCalidad", ["nombre", "flag", "calidad_manim", "subdirectorio"])
+
+# Escalera de calidad, de la más rápida a la más costosa
+NIVELES = [
+    NivelCalidad("baja", "-ql", "low_quality", "480p15"),
+    NivelCalidad("media", "-qm", "medium_quality", "720p30"),
+    NivelCalidad("alta", "-qh", "high_quality", "1080p60"),
+]
+NIVELES_POR_NOMBRE = {nivel.nombre: nivel for nivel in NIVELES}
+
+# Nivel que se entrega primero y nivel al que se mejora después
+NIVEL_INICIAL = os.environ.get("RENDER_INITIAL_QUALITY", "baja")
+NIVEL_OBJETIVO = os.environ.get("RENDER_TARGET_QUALITY", "alta")
+
+# Tope de calidad fijado por el administrador del servidor
+NIVEL_MAXIMO = os.environ.get("RENDER_MAX_QUALITY", "alta")
+
+# Con esta cantidad de trabajos en espera se deja de mejorar la calidad y se
+# sirve solo el nivel más bajo
+UMBRAL_CARGA = int(os.environ.get("RENDER_LOAD_THRESHOLD", 4))
+
+
+def obtener_nivel(nombre):
+    """Devuelve el NivelCalidad con el nombre dado."""
+    try:
+        return NIVELES_POR_NOMBRE[nombre]
+    except KeyError:
+        raise ValueError(
+            f"Calidad desconocida: {nombre}. Opciones: {', '.join(NIVELES_POR_NOMBRE)}"
+        ) from None
+
+
+def limitar_nivel(nombre, maximo):
+    """Devuelve el nivel más alto entre `nombre` y el tope `maximo`."""
+    if NIVELES.index(obtener_nivel(nombre)) > NIVELES.index(obtener_nivel(maximo)):
+        return obtener_nivel(maximo)
+    return obtener_nivel(nombre)
+
+
+def nivel_maximo_permitido(en_cola, maximo=NIVEL_MAXIMO, umbral=UMBRAL_CARGA):
+    """
+    Nivel máximo que se puede renderizar dada la carga actual: el tope del
+    administrador o, si la cola supera el umbral, el nivel más bajo.
+    """
+    if en_cola >= umbral:
+        return NIVELES[0]
+    return obtener_nivel(maximo)
+
+
+def plan_de_calidad(en_cola, inicial=NIVEL_INICIAL, objetivo=NIVEL_OBJETIVO):
+    """
+    Devuelve la tupla (nivel_inicial, nivel_mejora) para una solicitud:
+    el nivel que se entrega primero y el nivel al que se mejora después,
+    o None si no corresponde mejorar (por el tope o por la carga).
+    """
+    maximo = nivel_maximo_permitido(en_cola).nombre
+    nivel_inicial = limitar_nivel(inicial, maximo)
+    nivel_mejora = limitar_nivel(objetivo, maximo)
+    if NIVELES.index(nivel_mejora) <= NIVELES.index(nivel_inicial):
+        return nivel_mejora, None
+    return nivel_inicial, nivel_mejora
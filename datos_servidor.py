@@ -0,0 +1,27 @@
+import os
+
+# Directorio del servidor del que pueden leerse archivos indicando su ruta
+# (lanzamientos en vivo y datos grandes de la regresión). Si no se define,
+# solo se aceptan archivos subidos desde el navegador
+DIRECTORIO_DATOS = os.environ.get("SERVER_DATA_DIR", "")
+
+
+def lectura_habilitada(directorio=DIRECTORIO_DATOS):
+    """Indica si se permite leer archivos del servidor por su ruta."""
+    return bool(directorio)
+
+
+def resolver_ruta_datos(ruta, directorio=DIRECTORIO_DATOS):
+    """
+    Ruta absoluta de `ruta`, relativa al directorio de datos. Se resuelven
+    los enlaces simbólicos y `..` antes de comprobarla, y se rechaza con
+    PermissionError cualquier ruta que quede fuera del directorio (o todas,
+    si la lectura de archivos del servidor está desactivada).
+    """
+    if not lectura_habilitada(directorio):
+        raise PermissionError("La lectura de archivos del servidor está desactivada (SERVER_DATA_DIR).")
+    base = os.path.realpath(directorio)
+    destino = os.path.realpath(os.path.join(base, ruta))
+    if os.path.commonpath([base, destino]) != base:
+        raise PermissionError(f"La ruta '{ruta}' está fuera del directorio de datos del servidor.")
+    return destino
@@ -0,0 +1,89 @@
+import math
+import os
+from collections import namedtuple
+
+# Máximo de marcas numeradas por eje (cada número es un objeto LaTeX en Manim)
+MAX_MARCAS = int(os.environ.get("AXIS_MAX_TICKS", 11))
+
+# Pasos "redondos" dentro de cada potencia de 10
+PASOS_REDONDOS = (1, 2, 2.5, 5)
+
+# Fuera de este rango de magnitudes los números del eje se escalan por 10^k
+MAGNITUD_MINIMA = 1e-2
+MAGNITUD_MAXIMA = 1e4
+
+
+class Eje(namedtuple("Eje", ["inicio", "fin", "paso", "exponente"])):
+    """
+    Rango de un eje en unidades de los datos, con extremos múltiplos del paso.
+    Si `exponente` no es 0, los números se muestran divididos por 10^exponente
+    y el eje indica el factor (notación científica).
+    """
+
+    @property
+    def escala(self):
+        return 10.0 ** self.exponente
+
+    @property
+    def num_marcas(self):
+        return int(round((self.fin - self.inicio) / self.paso)) + 1
+
+    def rango_manim(self):
+        """Rango [inicio, fin, paso] en las unidades que muestra el eje."""
+        paso = self.paso / self.escala
+        return [_redondear(self.inicio / self.escala, paso), _redondear(self.fin / self.escala, paso), _redondear(paso, paso)]
+
+    def sufijo_escala(self):
+        """Factor de escala en LaTeX (por ejemplo `\\times 10^{3}`), o cadena vacía."""
+        return rf"\times 10^{{{self.exponente}}}" if self.exponente else ""
+
+
+def _redondear(valor, paso):
+    # Elimina el ruido de punto flotante de los múltiplos del paso
+    return round(valor, max(0, 12 - int(math.floor(math.log10(paso)))))
+
+
+def _exponente(inicio, fin):
+    """Exponente de la notación científica (múltiplo de 3), 0 si no hace falta."""
+    magnitud = max(abs(inicio), abs(fin))
+    if magnitud == 0 or MAGNITUD_MINIMA <= magnitud < MAGNITUD_MAXIMA:
+        return 0
+    return 3 * int(math.floor(math.log10(magnitud) / 3))
+
+
+def calcular_eje(minimo, maximo, max_marcas=MAX_MARCAS, margen=0.0):
+    """
+    Calcula el rango y el paso de un eje que cubre [minimo, maximo]: el paso es
+    1, 2, 2.5 o 5 por una potencia de 10, los extremos son múltiplos del paso y
+    el número de marcas numeradas nunca supera `max_marcas`.
+
+    `margen` agrega espacio a cada lado como fracción de la amplitud de los datos.
+    """
+    if not (math.isfinite(minimo) and math.isfinite(maximo)):
+        raise ValueError("Los límites del eje deben ser números finitos.")
+    if max_marcas < 3:
+        # Con dos marcas no siempre hay un paso que cubra un rango que cruza el cero
+        raise ValueError("El eje necesita al menos 3 marcas.")
+    if minimo > maximo:
+        minimo, maximo = maximo, minimo
+
+    # Un solo valor (o valores que solo difieren por redondeo): abrir el
+    # rango alrededor de él
+    amplitud = maximo - minimo
+    magnitud = max(abs(minimo), abs(maximo))
+    if amplitud <= magnitud * 1e-9:
+        centro = (minimo + maximo) / 2
+        amplitud = magnitud * 0.2 or 1.0
+        minimo, maximo = centro - amplitud / 2, centro + amplitud / 2
+    minimo -= amplitud * margen
+    maximo += amplitud * margen
+
+    potencia = 10.0 ** math.floor(math.log10((maximo - minimo) / (max_marcas - 1)))
+    while True:
+        for base in PASOS_REDONDOS:
+            paso = base * potencia
+            inicio = _redondear(math.floor(minimo / paso) * paso, paso)
+            fin = _redondear(math.ceil(maximo / paso) * paso, paso)
+            if round((fin - inicio) / paso) + 1 <= max_marcas:
+                return Eje(inicio, fin, paso, _exponente(inicio, fin))
+        potencia *= 10
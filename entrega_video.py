@@ -0,0 +1,403 @@
+import contextlib
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metricas import REGISTRO
+
+# "streamlit": los videos se sirven con st.video; "estatico": desde el
+# servidor de archivos propio, con peticiones de rango y caché del navegador
+MODO_ENTREGA = os.environ.get("VIDEO_DELIVERY", "streamlit")
+
+# Directorio con las versiones para la web de cada video
+DIRECTORIO_ENTREGA = os.environ.get("VIDEO_DELIVERY_DIR", os.path.join("media", "entrega"))
+
+# "faststart": el índice (moov) al inicio del MP4; "fragmentado": MP4
+# fragmentado, reproducible mientras se descarga
+MODO_MP4 = os.environ.get("VIDEO_MP4_MODE", "faststart")
+
+# Variantes más livianas que se generan además del MP4
+VARIANTES = [f.strip() for f in os.environ.get("VIDEO_VARIANTS", "webm,gif").split(",") if f.strip()]
+
+# Tamaño máximo del directorio de entrega: al superarlo se eliminan los
+# videos (con todas sus variantes) publicados hace más tiempo
+MAX_MB_ENTREGA = float(os.environ.get("VIDEO_DELIVERY_MAX_MB", 1024))
+
+# Servidor de archivos estáticos: por defecto solo escucha en la máquina
+# local (detrás de un proxy); exponerlo en todas las interfaces es opcional
+HOST_SERVIDOR = os.environ.get("VIDEO_SERVER_HOST", "127.0.0.1")
+PUERTO_SERVIDOR = int(os.environ.get("VIDEO_SERVER_PORT", 8502))
+URL_PUBLICA = os.environ.get("VIDEO_PUBLIC_URL", f"http://localhost:{PUERTO_SERVIDOR}")
+
+FFMPEG = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+TIMEOUT_FFMPEG = float(os.environ.get("VIDEO_ENCODE_TIMEOUT", 300))
+
+# Banderas de ffmpeg para reordenar el MP4 sin volver a codificarlo
+MOVFLAGS = {
+    "faststart": "+faststart",
+    "fragmentado": "frag_keyframe+empty_moov+default_base_moof",
+}
+
+# Argumentos de codificación de cada variante
+ARGUMENTOS_VARIANTES = {
+    "webm": [
+        "-c:v", "libvpx-vp9", "-crf", "40", "-b:v", "0",
+        "-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1", "-an",
+    ],
+    "gif": [
+        "-vf", "fps=10,scale=480:-1:flags=lanczos,split[a][b];[a]palettegen=stats_mode=diff[p];[b][p]paletteuse=dither=bayer",
+        "-loop", "0",
+    ],
+}
+
+TIPOS_CONTENIDO = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".gif": "image/gif",
+}
+
+# Los nombres de los archivos servidos son claves de contenido: su contenido
+# nunca cambia, así que el navegador puede guardarlos indefinidamente
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+TAMANO_FRAGMENTO = 64 * 1024
+_CLAVE_CONTENIDO = re.compile(r"^[0-9a-f]{64}$")
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _ejecutar_ffmpeg(argumentos):
+    """Ejecuta ffmpeg y retorna True si terminó bien (False si no está instalado)."""
+    try:
+        subprocess.run(
+            [FFMPEG, "-y", "-loglevel", "error", *argumentos],
+            check=True, capture_output=True, timeout=TIMEOUT_FFMPEG,
+        )
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+
+
+def _temporal(destino):
+    base, extension = os.path.splitext(destino)
+    return f"{base}.{os.getpid()}.{threading.get_ident()}.tmp{extension}"
+
+
+def optimizar_mp4(video_path, modo=MODO_MP4):
+    """
+    Reordena el MP4 en el lugar para la reproducción progresiva (faststart o
+    fragmentado), copiando los paquetes sin volver a codificarlos. Si ffmpeg
+    no está disponible el video queda como estaba.
+
+    Retorna la ruta del video.
+    """
+    if not video_path.endswith(".mp4"):
+        return video_path
+    temporal = _temporal(video_path)
+    if _ejecutar_ffmpeg(["-i", video_path, "-c", "copy", "-movflags", MOVFLAGS[modo], temporal]):
+        os.replace(temporal, video_path)
+    elif os.path.exists(temporal):
+        os.remove(temporal)
+    return video_path
+
+
+def clave_video(video_path):
+    """
+    Clave de contenido del video: el nombre del archivo si ya es una clave de
+    la caché de videos, o un hash de su ruta, tamaño y fecha de modificación.
+    """
+    nombre = os.path.splitext(os.path.basename(video_path))[0]
+    if _CLAVE_CONTENIDO.match(nombre):
+        return nombre
+    estado = os.stat(video_path)
+    contenido = f"{os.path.abspath(video_path)}:{estado.st_size}:{estado.st_mtime_ns}"
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def ruta_variante(clave, formato, directorio=DIRECTORIO_ENTREGA):
+    return os.path.join(directorio, f"{clave}.{formato}")
+
+
+def generar_variante(video_path, clave, formato, directorio=DIRECTORIO_ENTREGA):
+    """
+    Genera (una sola vez) la variante `formato` del video en el directorio de
+    entrega. El MP4 se enlaza o copia tal cual. Retorna la ruta de la variante
+    o None si no pudo generarse.
+    """
+    destino = ruta_variante(clave, formato, directorio)
+    if os.path.exists(destino):
+        return destino
+    os.makedirs(directorio, exist_ok=True)
+    temporal = _temporal(destino)
+    if formato == "mp4":
+        try:
+            os.link(video_path, temporal)
+        except OSError:
+            shutil.copyfile(video_path, temporal)
+    elif not _ejecutar_ffmpeg(["-i", video_path, *ARGUMENTOS_VARIANTES[formato], temporal]):
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return None
+    os.replace(temporal, destino)
+    return destino
+
+
+def recortar_entrega(directorio=DIRECTORIO_ENTREGA, max_mb=MAX_MB_ENTREGA):
+    """
+    Desalojo LRU del directorio de entrega: agrupa los archivos por clave de
+    video (el MP4 y sus variantes) y elimina los grupos publicados hace más
+    tiempo hasta quedar por debajo del máximo. Los archivos temporales en
+    curso no se tocan. Retorna la cantidad de videos eliminados.
+
+    El MP4 publicado es un enlace duro al de la caché de videos, así que
+    ocupa disco hasta que se elimina de los dos lugares.
+    """
+    grupos = {}
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return 0
+    for nombre in nombres:
+        if ".tmp" in nombre:
+            continue
+        ruta = os.path.join(directorio, nombre)
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        grupo = grupos.setdefault(nombre.split(".")[0], {"rutas": [], "bytes": 0, "uso": 0})
+        grupo["rutas"].append(ruta)
+        grupo["bytes"] += estado.st_size
+        grupo["uso"] = max(grupo["uso"], estado.st_mtime)
+
+    total = sum(g["bytes"] for g in grupos.values())
+    max_bytes = max_mb * 1024 * 1024
+    eliminados = 0
+    for grupo in sorted(grupos.values(), key=lambda g: g["uso"]):
+        if total <= max_bytes:
+            break
+        for ruta in grupo["rutas"]:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(ruta)
+        total -= grupo["bytes"]
+        eliminados += 1
+    return eliminados
+
+
+class _ManejadorVideos(BaseHTTPRequestHandler):
+    """
+    Sirve los archivos del directorio de entrega con peticiones de rango
+    (206 Partial Content), ETag y encabezados de caché. Solo acepta nombres
+    de archivo, sin subdirectorios.
+    """
+
+    directorio = DIRECTORIO_ENTREGA
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._servir(incluir_cuerpo=False)
+
+    def do_GET(self):
+        self._servir(incluir_cuerpo=True)
+
+    def log_message(self, formato, *args):
+        # Los accesos se cuentan en las métricas en lugar de escribirse en stderr
+        pass
+
+    def _servir(self, incluir_cuerpo):
+        nombre = self.path.split("?", 1)[0].lstrip("/")
+        extension = os.path.splitext(nombre)[1]
+        ruta = os.path.join(self.directorio, nombre)
+        if "/" in nombre or "\\" in nombre or extension not in TIPOS_CONTENIDO or not os.path.isfile(ruta):
+            self._responder_vacio(HTTPStatus.NOT_FOUND)
+            return
+
+        estado = os.stat(ruta)
+        tamano = estado.st_size
+        etag = f'"{estado.st_size:x}-{estado.st_mtime_ns:x}"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self._responder_vacio(HTTPStatus.NOT_MODIFIED, etag)
+            return
+
+        inicio, fin = 0, tamano - 1
+        codigo = HTTPStatus.OK
+        rango = self.headers.get("Range")
+        if rango and self.headers.get("If-Range", etag) == etag:
+            limites = self._interpretar_rango(rango, tamano)
+            if limites is None:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{tamano}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            inicio, fin = limites
+            codigo = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(codigo)
+        self.send_header("Content-Type", TIPOS_CONTENIDO[extension])
+        self.send_header("Content-Length", str(fin - inicio + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(estado.st_mtime, usegmt=True))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if codigo == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {inicio}-{fin}/{tamano}")
+        self.end_headers()
+        REGISTRO.incrementar(
+            "entrega_peticiones_total", ayuda="Peticiones al servidor de videos por formato y código.",
+            formato=extension[1:], codigo=int(codigo),
+        )
+        if not incluir_cuerpo:
+            return
+
+        restante = fin - inicio + 1
+        try:
+            with open(ruta, "rb") as archivo:
+                archivo.seek(inicio)
+                while restante > 0:
+                    bloque = archivo.read(min(TAMANO_FRAGMENTO, restante))
+                    if not bloque:
+                        break
+                    self.wfile.write(bloque)
+                    restante -= len(bloque)
+        except (BrokenPipeError, ConnectionResetError):
+            # El navegador cancela las descargas al saltar a otra parte del video
+            pass
+        REGISTRO.incrementar(
+            "entrega_bytes_total", fin - inicio + 1 - restante,
+            ayuda="Bytes enviados por el servidor de videos.", formato=extension[1:],
+        )
+
+    @staticmethod
+    def _interpretar_rango(rango, tamano):
+        """Interpreta un rango de bytes simple; retorna (inicio, fin) o None si no es satisfacible."""
+        coincidencia = _RANGO.match(rango.strip())
+        if coincidencia is None or tamano == 0:
+            return None
+        desde, hasta = coincidencia.groups()
+        if not desde:
+            # Sufijo: los últimos `hasta` bytes
+            if not hasta or int(hasta) == 0:
+                return None
+            return max(0, tamano - int(hasta)), tamano - 1
+        inicio = int(desde)
+        fin = min(int(hasta), tamano - 1) if hasta else tamano - 1
+        if inicio >= tamano or fin < inicio:
+            return None
+        return inicio, fin
+
+    def _responder_vacio(self, codigo, etag=None):
+        self.send_response(codigo)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class EntregaVideos:
+    """
+    Capa de entrega de los videos renderizados: publica cada video en el
+    directorio de entrega con su clave de contenido, genera en segundo plano
+    las variantes WebM y GIF y los sirve desde un servidor HTTP propio con
+    soporte de rangos, de modo que el navegador reproduce mientras descarga,
+    salta a cualquier punto sin bajar el archivo completo y reutiliza su
+    caché entre visitas.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_ENTREGA, host=HOST_SERVIDOR, puerto=PUERTO_SERVIDOR,
+                 url_publica=URL_PUBLICA, variantes=VARIANTES, max_mb=MAX_MB_ENTREGA):
+        self.directorio = directorio
+        self.max_mb = max_mb
+        self.url_publica = url_publica.rstrip("/")
+        self.variantes = [f for f in variantes if f in ARGUMENTOS_VARIANTES]
+        os.makedirs(self.directorio, exist_ok=True)
+
+        manejador = type("ManejadorVideos", (_ManejadorVideos,), {"directorio": directorio})
+        self._servidor = ThreadingHTTPServer((host, puerto), manejador)
+        self._servidor.daemon_threads = True
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+
+        # Un solo hilo de codificación: las variantes no compiten con los renders
+        self._codificador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="entrega")
+        self._lock = threading.Lock()
+        self._lock_recorte = threading.Lock()
+        self._en_curso = {}
+
+    def url(self, ruta):
+        return f"{self.url_publica}/{os.path.basename(ruta)}"
+
+    def publicar(self, video_path):
+        """
+        Publica el video y encola las variantes que falten. Retorna un
+        diccionario formato → URL con las versiones ya disponibles (el MP4
+        siempre está).
+        """
+        clave = clave_video(video_path)
+        nuevo = not os.path.exists(ruta_variante(clave, "mp4", self.directorio))
+        fuentes = {"mp4": self.url(generar_variante(video_path, clave, "mp4", self.directorio))}
+        for formato in self.variantes:
+            ruta = ruta_variante(clave, formato, self.directorio)
+            if os.path.exists(ruta):
+                fuentes[formato] = self.url(ruta)
+            else:
+                self._encolar(video_path, clave, formato)
+        # Cada publicación cuenta como uso para el desalojo LRU
+        for formato in fuentes:
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(ruta_variante(clave, formato, self.directorio))
+        if nuevo:
+            self._recortar()
+        return fuentes
+
+    def _recortar(self):
+        with self._lock_recorte:
+            recortar_entrega(self.directorio, self.max_mb)
+
+    def _encolar(self, video_path, clave, formato):
+        with self._lock:
+            if (clave, formato) in self._en_curso:
+                return
+            self._en_curso[(clave, formato)] = self._codificador.submit(
+                self._codificar, video_path, clave, formato
+            )
+
+    def _codificar(self, video_path, clave, formato):
+        try:
+            if generar_variante(video_path, clave, formato, self.directorio):
+                self._recortar()
+        finally:
+            # Si falló (por ejemplo, sin ffmpeg) se reintenta al volver a publicarlo
+            with self._lock:
+                self._en_curso.pop((clave, formato), None)
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        self._codificador.shutdown(wait=False)
+
+
+def html_video(fuentes):
+    """
+    Etiqueta <video> con las fuentes disponibles (WebM primero por ser más
+    liviano; el navegador usa la primera que soporta) y un enlace al GIF.
+    """
+    orden = [f for f in ("webm", "mp4") if f in fuentes]
+    etiquetas = "".join(
+        f'<source src="{fuentes[f]}" type="{TIPOS_CONTENIDO["." + f]}">' for f in orden
+    )
+    html = (
+        '<video controls playsinline preload="metadata" style="width: 100%">'
+        f"{etiquetas}</video>"
+    )
+    if "gif" in fuentes:
+        html += f'<p><a href="{fuentes["gif"]}" target="_blank">Descargar como GIF</a></p>'
+    return html
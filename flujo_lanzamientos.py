@@ -0,0 +1,213 @@
+import math
+import os
+import socketserver
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Bytes que se leen por bloque del archivo o del socket
+TAMANO_BLOQUE = int(os.environ.get("FLIPS_BLOCK_BYTES", 1 << 20))
+
+# Servidor local que recibe lanzamientos por socket
+HOST_FLUJO = os.environ.get("FLIPS_HOST", "127.0.0.1")
+PUERTO_FLUJO = int(os.environ.get("FLIPS_PORT", 8503))
+
+# Espera entre lecturas cuando se sigue un archivo que todavía crece
+ESPERA_ARCHIVO = float(os.environ.get("FLIPS_POLL_SECONDS", 0.2))
+
+# Cada cuántos segundos se actualizan en la página las estimaciones y el
+# gráfico, y como mínimo cada cuántos se vuelve a generar la animación
+INTERVALO_REFRESCO = float(os.environ.get("FLIPS_REFRESH_SECONDS", 1))
+INTERVALO_VIDEO = float(os.environ.get("FLIPS_VIDEO_SECONDS", 30))
+
+# Clasificación de cada byte: 1 = cara, 0 = sello, -1 = se ignora
+# (separadores, saltos de línea, etc.)
+CARAS = b"1CcHh"
+SELLOS = b"0SsTt"
+_TABLA = np.full(256, -1, dtype=np.int8)
+_TABLA[list(CARAS)] = 1
+_TABLA[list(SELLOS)] = 0
+
+EstadoFlujo = namedtuple("EstadoFlujo", ["n", "x", "tasa", "fuente", "activo", "error"])
+
+
+def contar_lanzamientos(datos):
+    """
+    Cuenta las caras y los lanzamientos de un bloque de bytes, con un
+    carácter por lanzamiento: `1`, `C` o `H` es cara y `0`, `S` o `T` es
+    sello. Los demás caracteres se ignoran.
+
+    Retorna una tupla (caras, lanzamientos).
+    """
+    codigos = _TABLA[np.frombuffer(datos, dtype=np.uint8)]
+    caras = int(np.count_nonzero(codigos == 1))
+    return caras, caras + int(np.count_nonzero(codigos == 0))
+
+
+def posterior_beta(n, x, alfa=1.0, beta=1.0):
+    """Parámetros de la posterior Beta(alfa + x, beta + n − x) con prior Beta(alfa, beta)."""
+    if alfa <= 0 or beta <= 0:
+        raise ValueError("Los parámetros de la prior Beta deben ser positivos.")
+    return alfa + x, beta + n - x
+
+
+def densidad_beta_en_malla(alfa, beta, puntos=2001):
+    """
+    Densidad de la Beta(alfa, beta) en una malla centrada en su media
+    (± 10 desviaciones estándar), calculada en escala logarítmica para que
+    sea estable con millones de lanzamientos. El costo no depende de n.
+
+    Retorna una tupla (malla_p, densidad).
+    """
+    media = alfa / (alfa + beta)
+    desviacion = math.sqrt(alfa * beta / ((alfa + beta) ** 2 * (alfa + beta + 1)))
+    malla = np.linspace(max(0.0, media - 10 * desviacion), min(1.0, media + 10 * desviacion), puntos)
+    log_beta = math.lgamma(alfa) + math.lgamma(beta) - math.lgamma(alfa + beta)
+    # Los extremos se acercan a (0, 1) para evitar log(0)
+    interior = np.clip(malla, np.finfo(float).tiny, 1 - np.finfo(float).epsneg)
+    log_densidad = (alfa - 1) * np.log(interior) + (beta - 1) * np.log1p(-interior) - log_beta
+    return malla, np.exp(log_densidad)
+
+
+def intervalo_credibilidad_beta(alfa, beta, nivel):
+    """
+    Intervalo de credibilidad de colas iguales de la Beta(alfa, beta), por
+    integración numérica de la densidad en la malla.
+
+    Retorna una tupla (inferior, superior).
+    """
+    malla, densidad = densidad_beta_en_malla(alfa, beta)
+    acumulada = np.concatenate([[0.0], np.cumsum((densidad[1:] + densidad[:-1]) / 2 * np.diff(malla))])
+    acumulada /= acumulada[-1]
+    cola = (1 - nivel) / 2
+    return float(np.interp(cola, acumulada, malla)), float(np.interp(1 - cola, acumulada, malla))
+
+
+class _ManejadorSocket(socketserver.BaseRequestHandler):
+    def handle(self):
+        while not self.server.flujo.detenido:
+            datos = self.request.recv(TAMANO_BLOQUE)
+            if not datos or self.server.flujo.detenido:
+                break
+            self.server.flujo.agregar_bytes(datos)
+
+
+class FlujoLanzamientos:
+    """
+    Estimación en línea de p a partir de un flujo de lanzamientos
+    individuales, leídos de un archivo (opcionalmente siguiéndolo mientras
+    crece) o recibidos por un socket local.
+
+    Solo se guardan los estadísticos suficientes (lanzamientos y caras), que
+    se actualizan por bloques en un hilo de lectura: la memoria no depende de
+    la cantidad de lanzamientos y consultar el estado cuesta O(1).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.n = 0
+        self.x = 0
+        self.inicio = None
+        self.ultimo = None
+        self.fuente = None
+        self.error = None
+        self.detenido = True
+        self._hilo = None
+        self._servidor = None
+
+    # --- Estadísticos -------------------------------------------------------
+
+    def agregar(self, caras, lanzamientos):
+        """Incorpora `lanzamientos` lanzamientos, de los cuales `caras` fueron cara."""
+        if lanzamientos == 0:
+            return
+        with self._lock:
+            ahora = time.time()
+            if self.inicio is None:
+                self.inicio = ahora
+            self.ultimo = ahora
+            self.n += lanzamientos
+            self.x += caras
+
+    def agregar_bytes(self, datos):
+        self.agregar(*contar_lanzamientos(datos))
+
+    def reiniciar(self):
+        """Vuelve los estadísticos a cero, sin detener la fuente."""
+        with self._lock:
+            self.n = self.x = 0
+            self.inicio = self.ultimo = None
+
+    def instantanea(self):
+        """Estado actual: lanzamientos, caras, lanzamientos por segundo y fuente."""
+        with self._lock:
+            duracion = (self.ultimo or 0) - (self.inicio or 0)
+            tasa = self.n / duracion if duracion > 0 else 0.0
+            return EstadoFlujo(self.n, self.x, tasa, self.fuente, not self.detenido, self.error)
+
+    # --- Fuentes ------------------------------------------------------------
+
+    def leer_archivo(self, ruta, seguir=False):
+        """
+        Lee los lanzamientos de un archivo en un hilo. Con `seguir`, al
+        llegar al final espera nuevos datos (como `tail -f`) hasta que se
+        detenga el flujo.
+        """
+        if not os.path.isfile(ruta):
+            raise FileNotFoundError(f"El archivo '{ruta}' no fue encontrado.")
+        self.detener()
+        self._iniciar(f"archivo {ruta}", self._leer_archivo, ruta, seguir)
+
+    def escuchar(self, host=HOST_FLUJO, puerto=PUERTO_FLUJO):
+        """
+        Recibe lanzamientos por un socket TCP local; cada conexión envía
+        caracteres como los de un archivo.
+        """
+        self.detener()
+        servidor = socketserver.ThreadingTCPServer((host, puerto), _ManejadorSocket, bind_and_activate=False)
+        servidor.allow_reuse_address = True
+        servidor.daemon_threads = True
+        servidor.flujo = self
+        servidor.server_bind()
+        servidor.server_activate()
+        self._servidor = servidor
+        self._iniciar(f"socket {host}:{puerto}", servidor.serve_forever, 0.2)
+
+    def detener(self):
+        """Detiene la fuente activa, conservando los estadísticos."""
+        self.detenido = True
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def _iniciar(self, fuente, objetivo, *args):
+        self.fuente = fuente
+        self.error = None
+        self.detenido = False
+        self._hilo = threading.Thread(target=self._ejecutar, args=(objetivo, *args), daemon=True)
+        self._hilo.start()
+
+    def _ejecutar(self, objetivo, *args):
+        try:
+            objetivo(*args)
+        except OSError as e:
+            self.error = str(e)
+        finally:
+            self.detenido = True
+
+    def _leer_archivo(self, ruta, seguir):
+        with open(ruta, "rb") as archivo:
+            while not self.detenido:
+                datos = archivo.read(TAMANO_BLOQUE)
+                if datos:
+                    self.agregar_bytes(datos)
+                elif seguir:
+                    time.sleep(ESPERA_ARCHIVO)
+                else:
+                    break
@@ -0,0 +1,91 @@
+import atexit
+import functools
+import json
+import os
+import time
+
+from metricas import Cronometro
+
+# Variables de entorno con las que el backend "cli" pide al proceso de Manim
+# que guarde sus fases: el archivo de salida y el instante de lanzamiento
+VARIABLE_ARCHIVO_FASES = "RENDER_PHASES_FILE"
+VARIABLE_INICIO_PROCESO = "RENDER_SPAWN_TIME"
+
+# Cronómetro del render en curso (None si no se está midiendo)
+_cronometro = None
+_instrumentado = False
+
+
+def _medir(funcion, nombre_fase):
+    """Envuelve `funcion` para sumar su duración a la fase indicada."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if _cronometro is None:
+            return funcion(*args, **kwargs)
+        with _cronometro.fase(nombre_fase(*args) if callable(nombre_fase) else nombre_fase):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+def instrumentar_manim():
+    """
+    Instala, una sola vez por proceso, las mediciones dentro de Manim:
+
+    - latex: compilación de Tex/MathTex a SVG (incluye los aciertos de su caché).
+    - animacion_NN: cada llamada a `play` (y `wait`), con su número de animación.
+    - combinacion_ffmpeg: unión de los segmentos parciales en el video final.
+    """
+    global _instrumentado
+    if _instrumentado:
+        return
+    from manim.mobject.text import tex_mobject
+    from manim.scene.scene import Scene
+    from manim.scene.scene_file_writer import SceneFileWriter
+    from manim.utils import tex_file_writing
+
+    # tex_mobject importa la función por nombre, así que se reemplaza en ambos módulos
+    tex_a_svg = _medir(tex_file_writing.tex_to_svg_file, "latex")
+    tex_file_writing.tex_to_svg_file = tex_a_svg
+    tex_mobject.tex_to_svg_file = tex_a_svg
+
+    Scene.play = _medir(Scene.play, lambda scene, *args: f"animacion_{scene.renderer.num_plays:02d}")
+    SceneFileWriter.combine_to_movie = _medir(SceneFileWriter.combine_to_movie, "combinacion_ffmpeg")
+    _instrumentado = True
+
+
+def iniciar_medicion():
+    """Empieza a medir un render nuevo y devuelve su cronómetro."""
+    global _cronometro
+    _cronometro = Cronometro()
+    return _cronometro
+
+
+def terminar_medicion():
+    """Deja de medir y devuelve las fases del render, en segundos."""
+    global _cronometro
+    cronometro, _cronometro = _cronometro, None
+    return cronometro.fases if cronometro is not None else {}
+
+
+def instrumentar_desde_cli():
+    """
+    Activa la medición cuando el script de escenas se ejecuta con la CLI de
+    Manim y el backend "cli" lo pidió por variables de entorno. Las fases se
+    escriben como JSON al terminar el proceso.
+    """
+    ruta = os.environ.get(VARIABLE_ARCHIVO_FASES)
+    if not ruta or _cronometro is not None:
+        return
+    instrumentar_manim()
+    cronometro = iniciar_medicion()
+
+    # Desde el lanzamiento del proceso hasta aquí: arranque de Python e importación de Manim
+    inicio = os.environ.get(VARIABLE_INICIO_PROCESO)
+    if inicio:
+        cronometro.fases["importacion_manim"] = max(time.time() - float(inicio), 0.0)
+
+    def guardar():
+        with open(ruta, "w") as archivo:
+            json.dump(terminar_medicion(), archivo)
+
+    atexit.register(guardar)
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from cache_render import normalizar_valor
+from simulacion import muestreador_latencia
+
+# "gemini" usa la API de Gemini; "local" usa un generador sin red para pruebas de carga
+BACKEND_INTERPRETACION = os.environ.get("INTERPRETATION_BACKEND", "gemini")
+MODELO_GEMINI = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+
+# Límites de la caché de interpretaciones
+TTL_INTERPRETACION = float(os.environ.get("INTERPRETATION_CACHE_TTL", 24 * 60 * 60))
+MAX_INTERPRETACIONES = int(os.environ.get("INTERPRETATION_CACHE_SIZE", 512))
+
+# Latencia simulada por fragmento del backend local, en segundos: fija o
+# muestreada de una distribución (ver `simulacion.muestreador_latencia`)
+LATENCIA_LOCAL = os.environ.get("INTERPRETATION_STUB_LATENCY", "0.02")
+
+
+class BackendGemini:
+    """
+    Backend que genera interpretaciones con Gemini. El cliente se configura
+    una sola vez al crear el backend y las respuestas se reciben por partes.
+    """
+
+    def __init__(self, api_key, modelo=MODELO_GEMINI):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(modelo)
+
+    def generar(self, prompt):
+        """Devuelve un iterador con los fragmentos de texto a medida que llegan."""
+        for fragmento in self.model.generate_content(prompt, stream=True):
+            if fragmento.text:
+                yield fragmento.text
+
+
+class BackendLocal:
+    """
+    Backend sin red que devuelve un texto determinista a partir del prompt,
+    emitido palabra por palabra con una latencia configurable. Sirve para
+    pruebas de carga y para trabajar sin acceso a la API.
+    """
+
+    def __init__(self, latencia=LATENCIA_LOCAL):
+        self.latencia = muestreador_latencia(latencia)
+
+    def generar(self, prompt):
+        resumen = " ".join(prompt.split()[:40])
+        texto = (
+            "**Interpretación generada localmente (sin conexión).** "
+            f"Solicitud recibida: {resumen}..."
+        )
+        for palabra in texto.split(" "):
+            segundos = self.latencia()
+            if segundos:
+                time.sleep(segundos)
+            yield palabra + " "
+
+
+def crear_backend(nombre=BACKEND_INTERPRETACION, api_key=None):
+    """Crea el backend de interpretaciones indicado por su nombre."""
+    if nombre == "gemini":
+        return BackendGemini(api_key)
+    if nombre == "local":
+        return BackendLocal()
+    raise ValueError(f"Backend de interpretación desconocido: {nombre}")
+
+
+class ServicioInterpretacion:
+    """
+    Genera interpretaciones con un backend intercambiable y las guarda en una
+    caché en memoria con tiempo de vida y tamaño máximo, indexada por las
+    entradas normalizadas del prompt (por ejemplo, n y x o los coeficientes).
+    Solicitudes idénticas se responden desde la caché sin volver a llamar al
+    backend.
+    """
+
+    def __init__(self, backend, ttl=TTL_INTERPRETACION, max_entradas=MAX_INTERPRETACIONES):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(entradas):
+        return json.dumps(normalizar_valor(entradas), sort_keys=True)
+
+    def _obtener(self, clave):
+        with self._lock:
+            entrada = self._cache.get(clave)
+            if entrada is not None and time.time() - entrada[0] <= self.ttl:
+                self._cache.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            self._cache.pop(clave, None)
+            self.fallos += 1
+            return None
+
+    def _guardar(self, clave, texto):
+        with self._lock:
+            self._cache[clave] = (time.time(), texto)
+            self._cache.move_to_end(clave)
+            while len(self._cache) > self.max_entradas:
+                self._cache.popitem(last=False)
+
+    def interpretar(self, entradas, prompt):
+        """
+        Devuelve un iterador con el texto de la interpretación. Si está en la
+        caché se entrega completo; si no, se transmite a medida que llega
+        desde el backend y se guarda al terminar.
+        """
+        clave = self.clave(entradas)
+        texto = self._obtener(clave)
+        if texto is not None:
+            yield texto
+            return
+
+        partes = []
+        for fragmento in self.backend.generar(prompt):
+            partes.append(fragmento)
+            yield fragmento
+        self._guardar(clave, "".join(partes))
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "entradas": len(self._cache),
+            }
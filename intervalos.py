@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from regresion_incremental import matriz_cambio_base
+from verosimilitud import log_verosimilitud, log_verosimilitud_maxima, validar_parametros
+
+# Nivel de confianza por defecto de todos los intervalos
+NIVEL_CONFIANZA = float(os.environ.get("CONFIDENCE_LEVEL", 0.95))
+
+# Réplicas bootstrap por defecto
+REPLICAS_BOOTSTRAP = int(os.environ.get("BOOTSTRAP_REPLICAS", 2000))
+
+# Réplicas por tarea del pool de procesos (la división no depende del
+# número de procesos, así que el resultado es reproducible con la semilla)
+REPLICAS_POR_TAREA = int(os.environ.get("BOOTSTRAP_TASK_REPLICAS", 1000))
+
+# Memoria máxima de la matriz de conteos (réplicas × filas) de cada bloque
+BYTES_POR_BLOQUE = int(os.environ.get("BOOTSTRAP_BLOCK_MB", 64)) * 2**20
+
+# Procesos del pool; a partir de este trabajo (réplicas × filas) se usa el pool
+PROCESOS_BOOTSTRAP = int(os.environ.get("BOOTSTRAP_WORKERS", os.cpu_count() or 1))
+UMBRAL_POOL = int(os.environ.get("BOOTSTRAP_POOL_THRESHOLD", 50_000_000))
+
+# Pool de procesos compartido, creado al usarse por primera vez
+_pool = None
+
+
+def cuantil_normal(nivel):
+    """Valor z tal que P(|Z| <= z) = nivel."""
+    return NormalDist().inv_cdf(0.5 + nivel / 2)
+
+
+def intervalo_wilson(n, x, nivel=NIVEL_CONFIANZA):
+    """
+    Intervalo de Wilson (score) para la probabilidad p de una binomial.
+    Retorna una tupla (inferior, superior).
+    """
+    validar_parametros(n, x)
+    z = cuantil_normal(nivel)
+    p_hat = x / n
+    denominador = 1 + z**2 / n
+    centro = (p_hat + z**2 / (2 * n)) / denominador
+    radio = z * np.sqrt(p_hat * (1 - p_hat) / n + z**2 / (4 * n**2)) / denominador
+    return max(0.0, centro - radio), min(1.0, centro + radio)
+
+
+def intervalo_verosimilitud_perfil(n, x, nivel=NIVEL_CONFIANZA, iteraciones=100):
+    """
+    Intervalo de verosimilitud para p: los valores con
+    2·(log L(p̂) − log L(p)) <= χ²₁(nivel). Ambos extremos se buscan a la vez
+    por bisección vectorizada sobre la log-verosimilitud.
+
+    Retorna una tupla (inferior, superior).
+    """
+    validar_parametros(n, x)
+    p_hat = x / n
+    corte = log_verosimilitud_maxima(n, x) - cuantil_normal(nivel) ** 2 / 2
+
+    # Extremo inferior en [0, p̂] y superior en [p̂, 1]; fuera del intervalo
+    # la log-verosimilitud está por debajo del corte
+    dentro = np.array([p_hat, p_hat])
+    fuera = np.array([0.0, 1.0])
+    for _ in range(iteraciones):
+        medio = (dentro + fuera) / 2
+        aceptado = log_verosimilitud(medio, n, x) >= corte
+        dentro = np.where(aceptado, medio, dentro)
+        fuera = np.where(aceptado, fuera, medio)
+    inferior = 0.0 if x == 0 else float(dentro[0])
+    superior = 1.0 if x == n else float(dentro[1])
+    return inferior, superior
+
+
+def _momentos(X, Y, grado):
+    """
+    Centra y escala x y construye la matriz de momentos por fila
+    [u⁰ … u^{2·grado}, u⁰·y … u^{grado}·y], de la que salen XᵀX y Xᵀy de
+    cualquier remuestreo como conteos @ momentos.
+
+    Retorna una tupla (momentos, centro, escala).
+    """
+    centro = float(np.mean(X))
+    rango = float(np.max(np.abs(X - centro)))
+    escala = rango if rango > 0 else 1.0
+    u = (X - centro) / escala
+    potencias = np.vander(u, 2 * grado + 1, increasing=True)
+    return np.hstack([potencias, potencias[:, :grado + 1] * Y[:, None]]), centro, escala
+
+
+def _coeficientes_desde_momentos(sumas, grado):
+    """
+    Resuelve en lote los sistemas normales de cada réplica a partir de sus
+    sumas de momentos. Retorna los coeficientes en u, de menor a mayor grado.
+    """
+    indices = np.add.outer(np.arange(grado + 1), np.arange(grado + 1))
+    xtx = sumas[:, indices]
+    xty = sumas[:, 2 * grado + 1:]
+    try:
+        return np.linalg.solve(xtx, xty[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # Alguna réplica sin suficientes valores distintos de x
+        return np.einsum("bij,bj->bi", np.linalg.pinv(xtx), xty)
+
+
+def _replicas(momentos, grado, replicas, semilla):
+    """
+    Calcula `replicas` réplicas bootstrap por pares. Cada bloque remuestrea
+    las filas como una matriz de conteos (réplicas × filas) y obtiene los
+    momentos de todas las réplicas con un solo producto de matrices.
+    """
+    rng = np.random.default_rng(semilla)
+    filas = len(momentos)
+    por_bloque = max(1, BYTES_POR_BLOQUE // (16 * filas))
+    resultados = []
+    for inicio in range(0, replicas, por_bloque):
+        b = min(por_bloque, replicas - inicio)
+        indices = rng.integers(0, filas, size=(b, filas))
+        indices += np.arange(b)[:, None] * filas
+        conteos = np.bincount(indices.ravel(), minlength=b * filas).reshape(b, filas)
+        resultados.append(_coeficientes_desde_momentos(conteos @ momentos, grado))
+    return np.concatenate(resultados)
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        import multiprocessing
+
+        # "spawn" evita duplicar con fork los hilos del servidor de Streamlit
+        _pool = ProcessPoolExecutor(PROCESOS_BOOTSTRAP, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def bootstrap_regresion(X, Y, grado, replicas=REPLICAS_BOOTSTRAP, nivel=NIVEL_CONFIANZA, semilla=0):
+    """
+    Intervalos bootstrap (percentil, remuestreo por pares) de los
+    coeficientes del polinomio de mínimos cuadrados.
+
+    Las réplicas se reparten en tareas de tamaño fijo; si el trabajo total
+    (réplicas × filas) es grande, las tareas se ejecutan en un pool de
+    procesos.
+
+    Retorna una tupla (inferiores, superiores, replicas_coeficientes), con
+    los coeficientes de mayor a menor grado, como `np.polyfit`.
+    """
+    X = np.asarray(X, dtype=float).ravel()
+    Y = np.asarray(Y, dtype=float).ravel()
+    if len(X) != len(Y):
+        raise ValueError("Las columnas x e y deben tener la misma longitud.")
+    if len(X) < grado + 1:
+        raise ValueError(f"Se necesitan al menos {grado + 1} filas para ajustar un polinomio de grado {grado}.")
+
+    momentos, centro, escala = _momentos(X, Y, grado)
+    tareas = [min(REPLICAS_POR_TAREA, replicas - i) for i in range(0, replicas, REPLICAS_POR_TAREA)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tareas))
+
+    if replicas * len(X) >= UMBRAL_POOL and PROCESOS_BOOTSTRAP > 1 and len(tareas) > 1:
+        pool = _obtener_pool()
+        partes = list(pool.map(_replicas, *zip(*[(momentos, grado, r, s) for r, s in zip(tareas, semillas)])))
+    else:
+        partes = [_replicas(momentos, grado, r, s) for r, s in zip(tareas, semillas)]
+
+    coeficientes = np.concatenate(partes) @ matriz_cambio_base(centro, escala, grado)
+    alfa = 1 - nivel
+    inferiores, superiores = np.percentile(coeficientes, [100 * alfa / 2, 100 * (1 - alfa / 2)], axis=0)
+    return inferiores, superiores, coeficientes
+
+
+def banda_bootstrap(replicas_coeficientes, x_min, x_max, nivel=NIVEL_CONFIANZA, puntos=100):
+    """
+    Banda de confianza puntual de la curva ajustada a partir de las réplicas
+    bootstrap de los coeficientes. Retorna una tupla (x, inferior, superior).
+    """
+    x = np.linspace(x_min, x_max, puntos)
+    curvas = np.vander(x, replicas_coeficientes.shape[1]) @ replicas_coeficientes.T
+    alfa = 1 - nivel
+    inferior, superior = np.percentile(curvas, [100 * alfa / 2, 100 * (1 - alfa / 2)], axis=1)
+    return x, inferior, superior
@@ -3,77 +3,172 @@ import json
 import os
 import numpy as np
 
+from agregacion import (
+    UMBRAL_AGREGACION,
+    agrega_escena,
+    densidad_puntos,
+    imagen_densidad,
+    residuos_representativos,
+)
+from cache_latex import instalar_cache_latex
+from cache_segmentos import instalar_cache_segmentos
+from ejes import calcular_eje
+from instrumentacion import instrumentar_desde_cli
+from regresion_robusta import UMBRAL_ATIPICO
+from verosimilitud import (
+    obtener_familia,
+    superficie_verosimilitud,
+    validar_parametros,
+    verosimilitud_en_malla,
+)
+
+# Compilar cada expresión de LaTeX una sola vez, compartiendo los SVG entre renders
+instalar_cache_latex()
+
+# Reutilizar entre renders los segmentos de las animaciones que no cambiaron
+instalar_cache_segmentos()
+
+# Medir las fases del render cuando la cola lo lanza con la CLI de Manim
+instrumentar_desde_cli()
+
+def cargar_config(config_path, parametros=None):
+    """
+    Devuelve los parámetros de la escena: los recibidos en memoria o, si no
+    se proporcionaron, los leídos desde el archivo de configuración.
+    """
+    if parametros is not None:
+        return parametros
+
+    # Verificar si el archivo de configuración existe
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"El archivo de configuración '{config_path}' no fue encontrado.")
+
+    with open(config_path, 'r') as file:
+        return json.load(file)
+
+def crear_ejes(eje_x, eje_y):
+    """
+    Crea los ejes con los rangos calculados por `calcular_eje`, de modo que la
+    cantidad de números (objetos LaTeX) en cada eje está acotada. Los datos
+    deben dividirse por `eje.escala` antes de ubicarlos en los ejes.
+    """
+    return Axes(
+        x_range=eje_x.rango_manim(),
+        y_range=eje_y.rango_manim(),
+        axis_config={"include_numbers": True},
+        x_axis_config={"label_direction": DOWN},
+        y_axis_config={"label_direction": LEFT},
+    ).add_coordinates()
+
+def etiqueta_con_escala(texto, eje, matematica=False):
+    """Agrega a la etiqueta el factor de escala del eje, si lo tiene."""
+    sufijo = eje.sufijo_escala()
+    if not sufijo:
+        return texto
+    return rf"{texto} \; ({sufijo})" if matematica else rf"{texto} $({sufijo})$"
+
 class LikelihoodFunction(Scene):
-    def construct(self):
-        # Ruta al archivo de configuración
-        config_path = "config.json"
+    def __init__(self, parametros=None, **kwargs):
+        # Parámetros en memoria (usados por los workers de render persistentes)
+        self.parametros = parametros
+        super().__init__(**kwargs)
 
-        # Verificar si el archivo de configuración existe
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(f"El archivo de configuración '{config_path}' no fue encontrado.")
+    def construct(self):
+        # Leer los parámetros desde memoria o desde config.json
+        config = cargar_config("config.json", self.parametros)
+        familia = config.get('familia', 'binomial')
 
-        # Leer los parámetros desde config.json
-        with open(config_path, 'r') as file:
-            config = json.load(file)
+        if familia == 'binomial':
             n = config.get('n', 10)
             x = config.get('x', 7)
+            normalizar = config.get('normalizar')
 
-        # Validar los parámetros
-        if x > n:
-            raise ValueError("El número de caras obtenidas (x) no puede ser mayor que el número de lanzamientos (n).")
+            # Validar los parámetros
+            validar_parametros(n, x)
 
-        # Definir la función de verosimilitud
-        def likelihood(p):
-            return (p ** x) * ((1 - p) ** (n - x))
+            # Evaluar la verosimilitud en escala logarítmica sobre una malla de p,
+            # normalizando a L(p)/L(p̂) cuando L(p̂) es demasiado pequeño
+            malla, valores, normalizado = verosimilitud_en_malla(n, x, normalizar=normalizar)
+            eje_x = calcular_eje(0, 1)
+            simbolo = "p"
+            if normalizado:
+                y_label = r"L(p) / L(\hat{p})"
+            else:
+                y_label = "L(p) = p^x (1-p)^{n-x}"
+            descripcion = f"n = {n}, x = {x}"
+        else:
+            # Otras familias: verosimilitud perfil normalizada del parámetro
+            # de interés, a partir de los estadísticos suficientes del conjunto
+            estadisticos = config['estadisticos']
+            distribucion = obtener_familia(familia)
+            malla, valores = superficie_verosimilitud(familia, estadisticos)
+            malla, valores = malla[0], valores[0]
+            eje_x = calcular_eje(malla.min(), malla.max())
+            simbolo = distribucion.simbolo
+            y_label = rf"L({simbolo}) / L(\hat{{{simbolo}}})"
+            descripcion = f"{familia}, n = {int(estadisticos['n'])}"
 
-        # Crear los ejes con un rango de y más manejable
-        likelihood_max = likelihood(x/n)  # El máximo de la función de verosimilitud ocurre en p = x/n
-        axes = Axes(
-            x_range=[0, 1, 0.1],
-            y_range=[0, likelihood_max * 1.2, likelihood_max * 0.2],
-            axis_config={"include_numbers": True},
-            x_axis_config={"label_direction": DOWN},
-            y_axis_config={"label_direction": LEFT},
-        ).add_coordinates()
+        # Crear los ejes con pasos "redondos" y un número acotado de marcas
+        likelihood_max = valores.max()  # El máximo de la función de verosimilitud ocurre en el MLE
+        eje_y = calcular_eje(0, likelihood_max * 1.2)
+        axes = crear_ejes(eje_x, eje_y)
 
         # Etiquetas de los ejes
-        axes_labels = axes.get_axis_labels(x_label="p", y_label="L(p) = p^x (1-p)^{n-x}")
+        y_label = etiqueta_con_escala(y_label, eje_y, matematica=True)
+        axes_labels = axes.get_axis_labels(
+            x_label=etiqueta_con_escala(simbolo, eje_x, matematica=True), y_label=y_label
+        )
 
         # Mover la etiqueta de L(p) para evitar superposición
         axes_labels[1].shift(UP * 0.3)
 
-        # Crear la gráfica de la función de verosimilitud
-        graph = axes.plot(
-            likelihood,
-            color=BLUE,
-            x_range=[0, 1],
-        )
+        # Crear la gráfica de la función de verosimilitud a partir de los valores precalculados
+        graph = axes.plot_line_graph(
+            malla / eje_x.escala,
+            valores / eje_y.escala,
+            line_color=BLUE,
+            add_vertex_dots=False,
+        )["line_graph"]
 
-        # Mostrar los valores de n y x en la esquina superior derecha
-        text = Text(f"n = {n}, x = {x}", font_size=24).to_corner(UR)
+        # Sombrear el intervalo de confianza del parámetro, si se pidió
+        intervalo = config.get('intervalo')
+        if intervalo is not None:
+            inferior, superior = (limite / eje_x.escala for limite in intervalo)
+            altura = eje_y.fin / eje_y.escala
+            sombra_intervalo = Polygon(
+                axes.coords_to_point(inferior, 0),
+                axes.coords_to_point(superior, 0),
+                axes.coords_to_point(superior, altura),
+                axes.coords_to_point(inferior, altura),
+                color=YELLOW,
+                fill_opacity=0.2,
+                stroke_width=0,
+            )
+
+        # Mostrar el tamaño del experimento en la esquina superior derecha
+        text = Text(descripcion, font_size=24).to_corner(UR)
 
         # Añadir elementos a la escena
         self.play(Create(axes), Write(axes_labels))
         self.play(Write(text))
         self.play(Create(graph))
+        if intervalo is not None:
+            self.play(FadeIn(sombra_intervalo))
         self.wait(2)
 
 class RegressionFunction(Scene):
-    def construct(self):
-        # Ruta al archivo de configuración
-        config_path = "config_regression.json"
+    def __init__(self, parametros=None, **kwargs):
+        # Parámetros en memoria (usados por los workers de render persistentes)
+        self.parametros = parametros
+        super().__init__(**kwargs)
 
-        # Verificar si el archivo de configuración existe
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(f"El archivo de configuración '{config_path}' no fue encontrado.")
-
-        # Leer los parámetros desde config_regression.json
-        with open(config_path, 'r') as file:
-            config = json.load(file)
-            X = np.array(config.get('X', []))
-            Y = np.array(config.get('Y', []))
-            grado = config.get('grado', 1)
-            coeficientes = config.get('coeficientes', [])
+    def construct(self):
+        # Leer los parámetros desde memoria o desde config_regression.json
+        config = cargar_config("config_regression.json", self.parametros)
+        X = np.array(config.get('X', []))
+        Y = np.array(config.get('Y', []))
+        grado = config.get('grado', 1)
+        coeficientes = config.get('coeficientes', [])
 
         # Validar los datos
         if len(X) == 0 or len(Y) == 0:
@@ -84,22 +179,23 @@ class RegressionFunction(Scene):
         # Definir la función de regresión
         polinomio = np.poly1d(coeficientes)
 
-        # Crear los ejes
-        x_min = min(X) - 1
-        x_max = max(X) + 1
-        y_min = min(Y) - 5
-        y_max = max(Y) + 5
+        # Con muchas filas los puntos y errores se agregan en un número fijo de mobjects
+        agregar = agrega_escena(config)
+
+        # Crear los ejes con pasos "redondos" y un número acotado de marcas,
+        # cualquiera sea la escala de los datos
+        eje_x = calcular_eje(X.min(), X.max(), margen=0.05)
+        eje_y = calcular_eje(Y.min(), Y.max(), margen=0.1)
+        x_min, x_max = eje_x.inicio, eje_x.fin
+        y_min, y_max = eje_y.inicio, eje_y.fin
+        axes = crear_ejes(eje_x, eje_y)
 
-        axes = Axes(
-            x_range=[x_min, x_max, 1],
-            y_range=[y_min, y_max, 5],
-            axis_config={"include_numbers": True},
-            x_axis_config={"label_direction": DOWN},
-            y_axis_config={"label_direction": LEFT},
-        ).add_coordinates()
+        def punto_en_ejes(x, y):
+            # Ubicar un punto en unidades de los datos sobre ejes posiblemente escalados
+            return axes.coords_to_point(x / eje_x.escala, y / eje_y.escala)
 
         # Crear etiquetas para los ejes
-        x_label = Tex("Producción (x)")
+        x_label = Tex(etiqueta_con_escala("Producción (x)", eje_x))
         
         # Construir la fórmula de regresión
         if grado == 1:
@@ -113,39 +209,81 @@ class RegressionFunction(Scene):
         # Crear el objeto MathTex para la fórmula
         formula = MathTex(formula_text)
 
-        # Combinar la etiqueta del eje y con la fórmula
-        y_label = VGroup(
-            Tex("Horas Trabajadas (y)"),
-            formula
-        ).arrange(DOWN, aligned_edge=LEFT)
-
-        # Posicionar las etiquetas en los ejes
+        # Posicionar las etiquetas en los ejes. La fórmula se muestra aparte,
+        # debajo de la etiqueta del eje y: así los ejes y los puntos no
+        # dependen del ajuste y sus segmentos se reutilizan entre renders
+        y_label = Tex(etiqueta_con_escala("Horas Trabajadas (y)", eje_y))
         axes_labels = axes.get_axis_labels(x_label=x_label, y_label=y_label)
+        formula.next_to(axes_labels[1], DOWN, aligned_edge=LEFT)
 
         # Crear los puntos de datos
-        puntos = VGroup(*[
-            Dot(axes.coords_to_point(x, y), color=RED) for x, y in zip(X, Y)
-        ])
+        if agregar:
+            # Una sola imagen de densidad, sombreada según la cantidad de puntos por celda
+            conteos = densidad_puntos(X, Y, (x_min, x_max), (y_min, y_max))
+            puntos = ImageMobject(imagen_densidad(conteos, RED.to_int_rgb()))
+            puntos.set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+            esquina_inferior = punto_en_ejes(x_min, y_min)
+            esquina_superior = punto_en_ejes(x_max, y_max)
+            puntos.stretch_to_fit_width(esquina_superior[0] - esquina_inferior[0])
+            puntos.stretch_to_fit_height(esquina_superior[1] - esquina_inferior[1])
+            puntos.move_to((esquina_inferior + esquina_superior) / 2)
+        else:
+            puntos = VGroup(*[
+                Dot(punto_en_ejes(x, y), color=RED) for x, y in zip(X, Y)
+            ])
 
         # Crear la gráfica de la regresión
         graph = axes.plot(
-            polinomio,
+            lambda u: polinomio(u * eje_x.escala) / eje_y.escala,
             color=BLUE,
-            x_range=[x_min, x_max],
+            x_range=eje_x.rango_manim()[:2],
         )
 
-        # Crear líneas de error
+        # Banda de confianza bootstrap de la curva, si se pidió
+        banda = config.get('banda')
+        if banda is not None:
+            borde_superior = [punto_en_ejes(x, y) for x, y in zip(banda['x'], banda['superior'])]
+            borde_inferior = [punto_en_ejes(x, y) for x, y in zip(banda['x'], banda['inferior'])]
+            banda_confianza = Polygon(
+                *borde_superior,
+                *reversed(borde_inferior),
+                color=BLUE,
+                fill_opacity=0.2,
+                stroke_width=0,
+            )
+
+        # Puntos a los que el ajuste robusto les restó peso (a lo sumo tantos
+        # como el umbral de agregación, para acotar los mobjects)
+        pesos_robustos = config.get('pesos_robustos')
+        if pesos_robustos is not None:
+            atipicos = np.asarray(pesos_robustos) < UMBRAL_ATIPICO
+            X_atipicos = X[atipicos][:UMBRAL_AGREGACION]
+            Y_atipicos = Y[atipicos][:UMBRAL_AGREGACION]
+            resaltados = VGroup(*[
+                Dot(punto_en_ejes(x, y), color=ORANGE, radius=1.5 * DEFAULT_DOT_RADIUS)
+                for x, y in zip(X_atipicos, Y_atipicos)
+            ])
+
+        # Crear líneas de error (solo las representativas si los puntos se agregaron)
+        if agregar:
+            X_errores, Y_errores, Y_pred_errores = residuos_representativos(X, Y, coeficientes)
+        else:
+            X_errores, Y_errores, Y_pred_errores = X, Y, polinomio(X)
         errores = VGroup()
-        for x, y in zip(X, Y):
-            punto = axes.coords_to_point(x, y)
-            y_pred = polinomio(x)
-            punto_pred = axes.coords_to_point(x, y_pred)
+        for x, y, y_pred in zip(X_errores, Y_errores, Y_pred_errores):
+            punto = punto_en_ejes(x, y)
+            punto_pred = punto_en_ejes(x, y_pred)
             error = DashedLine(punto, punto_pred, color=GREEN)
             errores.add(error)
 
-        # Añadir elementos a la escena
+        # Añadir elementos a la escena: primero lo que no depende del ajuste
         self.play(Create(axes), Write(axes_labels))
-        self.play(Create(puntos))
+        self.play(FadeIn(puntos) if agregar else Create(puntos))
         self.play(Create(graph))
+        if banda is not None:
+            self.play(FadeIn(banda_confianza))
+        if pesos_robustos is not None and len(resaltados) > 0:
+            self.play(FadeIn(resaltados))
+        self.play(Write(formula))
         self.play(Create(errores))
         self.wait(2)
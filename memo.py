@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from cache_render import normalizar_valor
+
+# Límites de la memoización compartida por todas las sesiones del proceso
+MAX_ENTRADAS_MEMO = int(os.environ.get("MEMO_MAX_ENTRIES", 256))
+MAX_MB_MEMO = float(os.environ.get("MEMO_MAX_MB", 64))
+
+
+def huella_tabla(df):
+    """
+    Hash del contenido de un DataFrame (nombres de columnas y valores, sin
+    el índice): dos sesiones con la misma tabla obtienen la misma huella
+    aunque sus filas se hayan creado por separado. Las columnas numéricas se
+    comparan como float, así que 5 y 5.0 dan la misma huella.
+    """
+    import pandas as pd
+
+    df = df.astype({c: float for c in df.select_dtypes("number").columns})
+    h = hashlib.sha256(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def clave_memo(espacio, **entradas):
+    """
+    Clave de una entrada: el espacio ("regresion", "mle", ...) y las
+    entradas normalizadas, de modo que 5 y 5.0 comparten la entrada.
+    """
+    return espacio, json.dumps(normalizar_valor(entradas), sort_keys=True)
+
+
+def tamano_aproximado(valor):
+    """Bytes aproximados que ocupa un resultado (arreglos, tablas y contenedores)."""
+    if hasattr(valor, "memory_usage"):  # DataFrames de pandas
+        return int(valor.memory_usage(deep=True).sum())
+    if hasattr(valor, "nbytes"):  # arreglos de NumPy
+        return int(valor.nbytes)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(k) + tamano_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class MemoCompartida:
+    """
+    Memoización en memoria de ajustes y artefactos derivados (residuos,
+    texto de los coeficientes, configuración de la escena, vista previa),
+    compartida por todas las sesiones del proceso.
+
+    Las entradas se desalojan por uso menos reciente al superar el máximo de
+    entradas o de megabytes, y pueden invalidarse de forma explícita, por
+    clave o por espacio. Si varias sesiones piden a la vez una entrada que no
+    está, solo una la calcula y las demás esperan su resultado.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS_MEMO, max_mb=MAX_MB_MEMO):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_mb * 1024 * 1024
+        self.aciertos = 0
+        self.fallos = 0
+        self.calculos = 0
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        """
+        Devuelve el resultado guardado para `clave` o lo calcula con
+        `calcular()` y lo guarda. Los errores no se guardan.
+        """
+        while True:
+            with self._lock:
+                if clave in self._entradas:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return self._entradas[clave][0]
+                evento = self._en_curso.get(clave)
+                if evento is None:
+                    evento = self._en_curso[clave] = threading.Event()
+                    self.fallos += 1
+                    break
+            # Otra sesión lo está calculando: se espera y se vuelve a consultar
+            evento.wait()
+
+        try:
+            resultado = calcular()
+            with self._lock:
+                self.calculos += 1
+                self._guardar(clave, resultado)
+            return resultado
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+    def consultar(self, clave):
+        """Resultado guardado para `clave`, o None, sin calcularlo."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            return None if entrada is None else entrada[0]
+
+    def _guardar(self, clave, resultado):
+        tamano = tamano_aproximado(resultado)
+        if clave in self._entradas:
+            self._bytes -= self._entradas.pop(clave)[1]
+        if tamano > self.max_bytes:
+            return
+        self._entradas[clave] = (resultado, tamano)
+        self._bytes += tamano
+        while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+            self._bytes -= self._entradas.popitem(last=False)[1][1]
+
+    def invalidar(self, clave=None, espacio=None):
+        """
+        Elimina una entrada, todas las de un espacio o, sin argumentos, todas.
+        Retorna la cantidad de entradas eliminadas.
+        """
+        with self._lock:
+            if clave is not None:
+                eliminadas = [clave] if clave in self._entradas else []
+            elif espacio is not None:
+                eliminadas = [c for c in self._entradas if c[0] == espacio]
+            else:
+                eliminadas = list(self._entradas)
+            for c in eliminadas:
+                self._bytes -= self._entradas.pop(c)[1]
+            return len(eliminadas)
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "calculos": self.calculos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "mb": self._bytes / (1024 * 1024),
+            }
@@ -0,0 +1,211 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# Archivo con las métricas en formato de texto de Prometheus
+ARCHIVO_METRICAS = os.environ.get("METRICS_FILE", os.path.join("media", "metrics.prom"))
+
+# Instante en que se importó este módulo, si no se puede leer el inicio del proceso
+_IMPORTADO = time.time()
+
+# Cantidad de renders recientes que se conservan para el panel de administración
+MAX_RENDERS_RECIENTES = 50
+
+logger = logging.getLogger("metricas")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("METRICS_LOG_LEVEL", "INFO"))
+    logger.propagate = False
+
+
+def inicio_proceso():
+    """
+    Instante (epoch) en que arrancó el proceso actual, leído de /proc en
+    Linux; en otros sistemas, el instante en que se importó este módulo.
+    """
+    try:
+        with open("/proc/self/stat") as archivo:
+            # El nombre del proceso puede tener espacios; los campos siguen al último ")"
+            campos = archivo.read().rsplit(")", 1)[1].split()
+        with open("/proc/stat") as archivo:
+            arranque_sistema = next(int(l.split()[1]) for l in archivo if l.startswith("btime"))
+        return arranque_sistema + int(campos[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return _IMPORTADO
+
+
+def _etiquetas(etiquetas):
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _formatear_etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    pares = ",".join(f'{k}="{v}"'.replace("\n", " ") for k, v in etiquetas)
+    return "{" + pares + "}"
+
+
+class RegistroMetricas:
+    """
+    Registro de métricas del proceso: contadores, medidores y resúmenes
+    (suma y cantidad) de duraciones, exportables en formato de texto de
+    Prometheus. También conserva los últimos renders con sus fases.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._medidores = {}
+        self._resumenes = {}
+        self._ayuda = {}
+        self.renders_recientes = deque(maxlen=MAX_RENDERS_RECIENTES)
+        self.arranque = None
+        self.ultima_ejecucion = 0.0
+
+    def incrementar(self, nombre, valor=1, ayuda="", **etiquetas):
+        with self._lock:
+            clave = (nombre, _etiquetas(etiquetas))
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+            self._ayuda.setdefault(nombre, ayuda)
+
+    def fijar(self, nombre, valor, ayuda="", **etiquetas):
+        with self._lock:
+            self._medidores[(nombre, _etiquetas(etiquetas))] = valor
+            self._ayuda.setdefault(nombre, ayuda)
+
+    def medidor(self, nombre, **etiquetas):
+        """Valor actual de un medidor, o None si todavía no se fijó."""
+        with self._lock:
+            return self._medidores.get((nombre, _etiquetas(etiquetas)))
+
+    def observar(self, nombre, segundos, ayuda="", **etiquetas):
+        with self._lock:
+            clave = (nombre, _etiquetas(etiquetas))
+            suma, cantidad = self._resumenes.get(clave, (0.0, 0))
+            self._resumenes[clave] = (suma + segundos, cantidad + 1)
+            self._ayuda.setdefault(nombre, ayuda)
+
+    def registrar_render(self, registro):
+        """
+        Registra un render terminado: sus fases, su espera en la cola y su
+        resultado. Emite además una línea de log estructurada (JSON).
+        """
+        escena = registro.get("escena", "")
+        calidad = registro.get("calidad", "")
+        self.incrementar(
+            "render_total", ayuda="Renders terminados por resultado.",
+            escena=escena, calidad=calidad, estado=registro.get("estado", ""),
+        )
+        if registro.get("desde_cache"):
+            self.incrementar("render_cache_total", ayuda="Consultas a la caché de render.", resultado="acierto")
+        else:
+            self.incrementar("render_cache_total", ayuda="Consultas a la caché de render.", resultado="fallo")
+        if registro.get("cola_segundos") is not None:
+            self.observar(
+                "render_cola_segundos", registro["cola_segundos"],
+                ayuda="Tiempo de espera en la cola de render.", escena=escena,
+            )
+        for fase, segundos in registro.get("fases", {}).items():
+            self.observar(
+                "render_fase_segundos", segundos,
+                ayuda="Duración de cada fase del render.", escena=escena, calidad=calidad, fase=fase,
+            )
+        with self._lock:
+            self.renders_recientes.append(registro)
+        logger.info(json.dumps({"evento": "render", **registro}, ensure_ascii=False))
+
+    def registrar_ejecucion(self, segundos, importacion_segundos, inicio):
+        """
+        Registra una ejecución del script de la aplicación. La primera del
+        proceso se reporta además como arranque en frío: desde el inicio del
+        proceso hasta el final de la primera página.
+        """
+        self.ultima_ejecucion = segundos
+        if self.arranque is None:
+            self.arranque = {
+                "arranque_segundos": round(time.time() - inicio, 4),
+                "importacion_segundos": round(importacion_segundos, 4),
+                "primera_ejecucion_segundos": round(segundos, 4),
+            }
+            for nombre, valor in self.arranque.items():
+                self.fijar(f"app_{nombre}", valor, ayuda="Reporte de arranque en frío de la aplicación.")
+            logger.info(json.dumps({"evento": "arranque", **self.arranque}, ensure_ascii=False))
+            tipo = "primera"
+        else:
+            tipo = "rerun"
+        self.observar(
+            "app_ejecucion_segundos", segundos,
+            ayuda="Duración de cada ejecución del script de la aplicación.", tipo=tipo,
+        )
+
+    def tasa_aciertos_cache(self):
+        with self._lock:
+            aciertos = self._contadores.get(("render_cache_total", (("resultado", "acierto"),)), 0)
+            fallos = self._contadores.get(("render_cache_total", (("resultado", "fallo"),)), 0)
+        return aciertos / (aciertos + fallos) if aciertos + fallos else 0.0
+
+    def texto_prometheus(self):
+        """Devuelve todas las métricas en formato de texto de Prometheus."""
+        self.fijar(
+            "render_cache_tasa_aciertos", self.tasa_aciertos_cache(),
+            ayuda="Proporción de renders servidos desde la caché.",
+        )
+        lineas = []
+        with self._lock:
+            series = [
+                ("counter", self._contadores, lambda v: [("", v)]),
+                ("gauge", self._medidores, lambda v: [("", v)]),
+                ("summary", self._resumenes, lambda v: [("_sum", v[0]), ("_count", v[1])]),
+            ]
+            for tipo, valores, expandir in series:
+                for nombre in sorted({n for n, _ in valores}):
+                    if self._ayuda.get(nombre):
+                        lineas.append(f"# HELP {nombre} {self._ayuda[nombre]}")
+                    lineas.append(f"# TYPE {nombre} {tipo}")
+                    for (n, etiquetas), valor in sorted(valores.items()):
+                        if n != nombre:
+                            continue
+                        for sufijo, v in expandir(valor):
+                            lineas.append(f"{nombre}{sufijo}{_formatear_etiquetas(etiquetas)} {v}")
+        return "\n".join(lineas) + "\n"
+
+    def escribir(self, ruta=ARCHIVO_METRICAS):
+        """Escribe el archivo de métricas de forma atómica."""
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(ruta_tmp, "w") as archivo:
+            archivo.write(self.texto_prometheus())
+        os.replace(ruta_tmp, ruta)
+
+
+# Registro compartido por todo el proceso
+REGISTRO = RegistroMetricas()
+
+
+class Cronometro:
+    """
+    Acumula la duración de fases con nombre:
+
+        cronometro = Cronometro()
+        with cronometro.fase("escritura_config"):
+            ...
+    """
+
+    def __init__(self):
+        self.fases = {}
+
+    @contextlib.contextmanager
+    def fase(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nombre] = self.fases.get(nombre, 0.0) + time.perf_counter() - inicio
@@ -0,0 +1,406 @@
+"""
+Prueba de carga: sesiones simultáneas de estudiantes recorriendo la aplicación.
+
+Cada sesión simulada es un `AppTest` de Streamlit que ejecuta el `main()` real
+de `app.py` en el mismo proceso, de modo que todas comparten la cola de
+render, las cachés y la memo como las sesiones de un servidor. Las sesiones
+envían el formulario de la moneda y el de regresión y piden interpretaciones,
+con una pausa opcional entre acciones. Manim y Gemini se reemplazan por
+simuladores locales con latencia fija o muestreada (`simulacion.py`), o se
+usan los backends reales para medir la máquina de render.
+
+Las sesiones corren en un runtime de Streamlit dentro del proceso, no en un
+servidor real: no se miden el websocket, la serialización de los mensajes ni
+el navegador. Para ello `preparar_streamlit_concurrente` modifica internos de
+`AppTest` que cambian entre versiones, así que la prueba exige la versión de
+Streamlit fijada en requirements.txt (`VERSION_STREAMLIT`).
+
+Al terminar se informa el rendimiento (acciones por segundo), las latencias
+p50/p95/p99 de cada acción, los errores, la profundidad de la cola de render
+y el pico de memoria residente, y se guarda todo en JSON para comparar
+corridas (por ejemplo, antes y después de cambiar la caché o los workers).
+
+Uso:
+
+    python prueba_carga.py --sesiones 100 --acciones 5 --rampa 30 \\
+        --latencia-render lognormal:3,0.5 --latencia-interpretacion 0.02 --salida carga.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Script de la aplicación que recorren las sesiones
+SCRIPT_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Percentiles informados para cada acción
+PERCENTILES = [50, 95, 99]
+
+# La tabla por defecto de la sección de regresión tiene 5 filas: admite grados 1 a 4
+GRADOS_TABLA_POR_DEFECTO = 4
+
+# Intervalo de muestreo de la cola y de la memoria, en segundos
+INTERVALO_MUESTREO = 0.2
+
+# Versión de Streamlit cuyos internos modifica `preparar_streamlit_concurrente`
+# (la misma que fija requirements.txt)
+VERSION_STREAMLIT = "1.65"
+
+
+def configurar_entorno(args):
+    """
+    Fija las variables de entorno de la aplicación antes de importarla: los
+    backends (simulados o reales), sus latencias, los límites de la cola y
+    los directorios de trabajo, dentro de `args.directorio`.
+    """
+    os.environ["RENDER_BACKEND"] = args.backend_render
+    os.environ["RENDER_STUB_LATENCY"] = args.latencia_render
+    os.environ["INTERPRETATION_BACKEND"] = args.backend_interpretacion
+    os.environ["INTERPRETATION_STUB_LATENCY"] = args.latencia_interpretacion
+    if args.max_workers is not None:
+        os.environ["RENDER_MAX_WORKERS"] = str(args.max_workers)
+    if args.profundidad_cola is not None:
+        os.environ["RENDER_QUEUE_DEPTH"] = str(args.profundidad_cola)
+    os.environ.setdefault("METRICS_LOG_LEVEL", "WARNING")
+
+    # Las rutas relativas de la app (caché, trabajos, métricas) quedan en el directorio de la prueba
+    os.makedirs(args.directorio, exist_ok=True)
+    os.chdir(args.directorio)
+
+
+def streamlit_compatible():
+    """Indica si la versión instalada de Streamlit es `VERSION_STREAMLIT`."""
+    import streamlit
+
+    return streamlit.__version__.split(".")[:2] == VERSION_STREAMLIT.split(".")
+
+
+def preparar_streamlit_concurrente():
+    """
+    Permite ejecutar varios `AppTest` a la vez en hilos del mismo proceso,
+    como las sesiones de un servidor de Streamlit. `AppTest` está pensado
+    para una prueba a la vez: en cada ejecución crea un runtime simulado
+    global y lo borra al terminar, activa y restaura la opción
+    `global.appTest` y compila el script otra vez (compilar en varios hilos
+    a la vez falla de forma intermitente en CPython 3.11). Aquí la opción
+    queda activa, todas las ejecuciones comparten la caché del script
+    compilado, como en el servidor, y si otra sesión ya borró el runtime
+    simulado se usa el último que se creó.
+
+    Usa internos de `AppTest` y de `Runtime` (`patch_config_options`,
+    `ScriptCache`, `Runtime._instance`) verificados con `VERSION_STREAMLIT`.
+    """
+    from contextlib import nullcontext
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda opciones: nullcontext()
+
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+    ultimo = {}
+    instancia_original = Runtime.instance.__func__
+
+    def instancia(cls):
+        if cls._instance is not None:
+            ultimo["runtime"] = cls._instance
+        return ultimo["runtime"] if cls._instance is None and ultimo else instancia_original(cls)
+
+    Runtime.instance = classmethod(instancia)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(ultimo))
+
+
+def rss_actual():
+    """Memoria residente actual del proceso, en bytes (0 si no se puede leer)."""
+    try:
+        with open("/proc/self/statm") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def rss_maximo():
+    """
+    Pico de memoria residente del proceso y de sus hijos terminados (por
+    ejemplo, los renders de la CLI), en bytes.
+    """
+    # En Linux ru_maxrss está en KB; en macOS, en bytes
+    factor = 1 if sys.platform == "darwin" else 1024
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * factor
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * factor
+    return propio, hijos
+
+
+class Monitor:
+    """Muestrea en segundo plano la profundidad de la cola de render y la memoria."""
+
+    def __init__(self, registro, intervalo=INTERVALO_MUESTREO):
+        self.registro = registro
+        self.intervalo = intervalo
+        self.cola = []
+        self.rss = []
+        self._detenido = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detenido.set()
+        self._hilo.join()
+
+    def _muestrear(self):
+        while not self._detenido.wait(self.intervalo):
+            self.cola.append(self.registro.medidor("render_cola_profundidad") or 0)
+            self.rss.append(rss_actual())
+
+
+class Sesion:
+    """
+    Un estudiante simulado: abre la aplicación y realiza acciones al azar,
+    midiendo la duración de cada ejecución del script que desencadenan.
+    """
+
+    def __init__(self, indice, args, mediciones, lock):
+        self.indice = indice
+        self.args = args
+        self.rng = random.Random(args.semilla * 1_000_003 + indice)
+        self.pausa = None
+        self.mediciones = mediciones
+        self.lock = lock
+        self.at = None
+
+    def medir(self, accion, ejecutar):
+        inicio = time.perf_counter()
+        error = None
+        try:
+            ejecutar()
+            if self.at.exception:
+                error = self.at.exception[0].message
+            elif self.at.error:
+                error = self.at.error[0].value
+        except Exception as e:
+            error = repr(e)
+        self.registrar(accion, inicio, time.perf_counter() - inicio, error)
+
+    def registrar(self, accion, inicio, segundos, error=None):
+        with self.lock:
+            self.mediciones.append({
+                "sesion": self.indice,
+                "accion": accion,
+                "inicio": inicio,
+                "segundos": segundos,
+                "error": error,
+            })
+
+    def _boton(self, etiqueta):
+        return next(b for b in self.at.button if b.label == etiqueta)
+
+    def _selector(self, etiqueta):
+        return next(s for s in self.at.selectbox if s.label == etiqueta)
+
+    def moneda(self):
+        # Un conjunto acotado de casos distintos, para que la caché y la memo trabajen como en clase
+        caso = self.rng.randrange(self.args.variedad)
+        n = 10 + caso
+        x = random.Random(caso).randint(0, n)
+        self.at.number_input[0].set_value(n)
+        self.at.number_input[1].set_value(x)
+        self.medir("moneda", lambda: self._boton("Generar el gráfico ").click().run())
+        if self.rng.random() < self.args.proporcion_interpretacion:
+            self.medir("interpretacion_moneda", lambda: self.at.button(key="mle_interpret_btn").click().run())
+
+    def regresion(self):
+        modelo = self._selector("Selecciona el modelo de regresión")
+        metodo = self._selector("Método de ajuste")
+        casos = list(itertools.product(modelo.options[:GRADOS_TABLA_POR_DEFECTO], metodo.options))
+        opcion_modelo, opcion_metodo = casos[self.rng.randrange(min(len(casos), self.args.variedad))]
+        modelo.select(opcion_modelo)
+        metodo.select(opcion_metodo)
+        self.medir("regresion", lambda: self.at.button(key="generate_regression").click().run())
+        if self.rng.random() < self.args.proporcion_interpretacion:
+            self.medir("interpretacion_regresion", lambda: self.at.button(key="regression_interpret_btn").click().run())
+
+    def ejecutar(self):
+        from simulacion import muestreador_latencia
+        from streamlit.testing.v1 import AppTest
+
+        self.pausa = muestreador_latencia(self.args.pausa, self.rng.random())
+        self.at = AppTest.from_file(SCRIPT_APP, default_timeout=self.args.timeout)
+        self.medir("carga", self.at.run)
+        for _ in range(self.args.acciones):
+            time.sleep(self.pausa())
+            accion = self.regresion if self.rng.random() < self.args.proporcion_regresion else self.moneda
+            try:
+                accion()
+            except (StopIteration, IndexError, KeyError) as e:
+                # La ejecución anterior no dejó la página completa: se registra y se recarga
+                self.registrar(accion.__name__, time.perf_counter(), 0.0, f"Página incompleta: {e!r}")
+                self.medir("carga", self.at.run)
+
+
+def percentiles(segundos):
+    valores = np.percentile(segundos, PERCENTILES) if segundos else [float("nan")] * len(PERCENTILES)
+    return {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, valores)}
+
+
+def resumir(mediciones, duracion, monitor):
+    """Rendimiento, latencias por acción, errores, cola y memoria de la corrida."""
+    acciones = {}
+    for accion in sorted({m["accion"] for m in mediciones}):
+        propias = [m for m in mediciones if m["accion"] == accion]
+        correctas = [m["segundos"] for m in propias if m["error"] is None]
+        acciones[accion] = {
+            "total": len(propias),
+            "errores": len(propias) - len(correctas),
+            "media": round(float(np.mean(correctas)), 4) if correctas else None,
+            "maximo": round(max(correctas), 4) if correctas else None,
+            **percentiles(correctas),
+        }
+    errores = {}
+    for m in mediciones:
+        if m["error"] is not None:
+            errores[m["error"]] = errores.get(m["error"], 0) + 1
+    todas = [m["segundos"] for m in mediciones if m["error"] is None]
+    pico_propio, pico_hijos = rss_maximo()
+    return {
+        "duracion_segundos": round(duracion, 3),
+        "acciones_totales": len(mediciones),
+        "acciones_por_segundo": round(len(mediciones) / duracion, 3) if duracion > 0 else None,
+        "latencia": percentiles(todas),
+        "acciones": acciones,
+        "errores": dict(sorted(errores.items(), key=lambda e: -e[1])[:10]),
+        "cola_render": {
+            "maximo": max(monitor.cola, default=0),
+            "media": round(float(np.mean(monitor.cola)), 3) if monitor.cola else 0,
+        },
+        "memoria": {
+            "rss_pico_mb": round(pico_propio / 2**20, 1),
+            "rss_pico_muestreado_mb": round(max(monitor.rss, default=0) / 2**20, 1),
+            "rss_pico_hijos_mb": round(pico_hijos / 2**20, 1),
+        },
+    }
+
+
+def imprimir(resumen):
+    print(
+        f"\n{resumen['acciones_totales']} acciones en {resumen['duracion_segundos']:.1f} s "
+        f"({resumen['acciones_por_segundo']} acciones/s)"
+    )
+    print(f"{'acción':26}{'total':>7}{'errores':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}")
+    for accion, datos in resumen["acciones"].items():
+        print(
+            f"{accion:26}{datos['total']:>7}{datos['errores']:>9}"
+            + "".join(f"{datos[c] if datos[c] is not None else float('nan'):>9.3f}" for c in ["p50", "p95", "p99", "maximo"])
+        )
+    cola, memoria = resumen["cola_render"], resumen["memoria"]
+    print(f"Cola de render: máximo {cola['maximo']}, media {cola['media']}")
+    print(f"Memoria residente: pico {memoria['rss_pico_mb']} MB (hijos: {memoria['rss_pico_hijos_mb']} MB)")
+    print(f"Caché de render: {resumen['cache_render_aciertos']:.0%} de aciertos")
+    for error, cantidad in resumen["errores"].items():
+        print(f"  {cantidad} × {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones simultáneas de la aplicación.")
+    parser.add_argument("--sesiones", type=int, default=20, help="Sesiones simultáneas.")
+    parser.add_argument("--acciones", type=int, default=5, help="Acciones por sesión (además de abrir la página).")
+    parser.add_argument("--rampa", type=float, default=5, help="Segundos en los que se reparten los inicios de sesión.")
+    parser.add_argument("--pausa", default="0", help="Pausa entre acciones de una sesión (número o distribución).")
+    parser.add_argument("--proporcion-regresion", type=float, default=0.5, help="Fracción de acciones de regresión.")
+    parser.add_argument("--proporcion-interpretacion", type=float, default=0.5,
+                        help="Probabilidad de pedir la interpretación tras cada gráfico.")
+    parser.add_argument("--variedad", type=int, default=20,
+                        help="Casos distintos de la moneda y modelos de regresión entre los que se elige.")
+    parser.add_argument("--backend-render", default="stub", choices=["stub", "workers", "cli"],
+                        help="stub simula Manim; workers y cli renderizan de verdad.")
+    parser.add_argument("--latencia-render", default="lognormal:2,0.5",
+                        help="Latencia del render simulado: número, uniforme:a,b, exponencial:media o lognormal:mediana,sigma.")
+    parser.add_argument("--backend-interpretacion", default="local", choices=["local", "gemini"],
+                        help="local simula Gemini (gemini requiere la clave en los secretos de Streamlit).")
+    parser.add_argument("--latencia-interpretacion", default="0.02",
+                        help="Latencia por palabra de la interpretación simulada (mismo formato).")
+    parser.add_argument("--max-workers", type=int, help="Renders simultáneos (RENDER_MAX_WORKERS).")
+    parser.add_argument("--profundidad-cola", type=int, help="Trabajos en espera permitidos (RENDER_QUEUE_DEPTH).")
+    parser.add_argument("--timeout", type=float, default=600, help="Tiempo máximo de cada ejecución del script.")
+    parser.add_argument("--directorio", help="Directorio de trabajo (por defecto, uno temporal y vacío).")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de las acciones al azar.")
+    parser.add_argument("--salida", default="prueba_carga.json", help="Ruta del JSON de resultados.")
+    args = parser.parse_args()
+
+    args.salida = os.path.abspath(args.salida)
+    args.directorio = os.path.abspath(args.directorio or tempfile.mkdtemp(prefix="prueba_carga_"))
+    configurar_entorno(args)
+
+    # Después de configurar el entorno: la app comparte estos módulos con la prueba
+    from metricas import REGISTRO
+
+    import streamlit
+
+    if not streamlit_compatible():
+        parser.error(
+            f"la prueba requiere Streamlit {VERSION_STREAMLIT}.x (instalada: {streamlit.__version__}); "
+            "instala la versión de requirements.txt"
+        )
+    preparar_streamlit_concurrente()
+
+    mediciones = []
+    lock = threading.Lock()
+    monitor = Monitor(REGISTRO)
+    sesiones = [Sesion(i, args, mediciones, lock) for i in range(args.sesiones)]
+    hilos = [threading.Thread(target=s.ejecutar, name=f"sesion-{s.indice}", daemon=True) for s in sesiones]
+
+    print(
+        f"{args.sesiones} sesiones × {args.acciones} acciones · render {args.backend_render} "
+        f"({args.latencia_render}) · interpretación {args.backend_interpretacion} · directorio {args.directorio}",
+        file=sys.stderr,
+    )
+    # Una ejecución previa, sin medir, importa los módulos de la app como al arrancar el servidor
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_file(SCRIPT_APP, default_timeout=args.timeout).run()
+
+    monitor.iniciar()
+    inicio = time.perf_counter()
+    for i, hilo in enumerate(hilos):
+        hilo.start()
+        if args.sesiones > 1:
+            time.sleep(args.rampa / (args.sesiones - 1) if i < args.sesiones - 1 else 0)
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    monitor.detener()
+
+    resumen = resumir(mediciones, duracion, monitor)
+    resumen["cache_render_aciertos"] = REGISTRO.tasa_aciertos_cache()
+    salida = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "maquina": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parametros": vars(args),
+        "resumen": resumen,
+        "mediciones": [{**m, "inicio": round(m["inicio"] - inicio, 4), "segundos": round(m["segundos"], 4)} for m in mediciones],
+    }
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(salida, archivo, ensure_ascii=False, indent=2)
+    imprimir(resumen)
+    print(f"Resultados guardados en {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
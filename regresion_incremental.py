@@ -0,0 +1,216 @@
+import os
+import time
+
+import numpy as np
+
+# Filas por bloque al leer archivos grandes
+TAMANO_BLOQUE = int(os.environ.get("REGRESSION_CHUNK_ROWS", 200_000))
+
+# Filas que se conservan como muestra representativa para graficar. Con
+# archivos grandes la escena dibuja la muestra como densidad, así que
+# conviene que sea bastante mayor que el umbral de agregación
+TAMANO_MUESTRA = int(os.environ.get("REGRESSION_SAMPLE_ROWS", 5000))
+
+
+def matriz_cambio_base(centro, escala, grado):
+    """
+    Matriz que lleva coeficientes en u = (x − centro) / escala (de menor a
+    mayor grado) a coeficientes en x de mayor a menor grado, como `np.polyfit`.
+    """
+    u = np.poly1d([1 / escala, -centro / escala])
+    filas = []
+    for k in range(grado + 1):
+        coeficientes = (u ** k).coeffs if k else np.array([1.0])
+        filas.append(np.concatenate([np.zeros(grado + 1 - len(coeficientes)), coeficientes]))
+    return np.array(filas)
+
+
+class AcumuladorMinimosCuadrados:
+    """
+    Ajuste polinomial por mínimos cuadrados a partir de estadísticos
+    suficientes (XᵀWX, XᵀWy, yᵀWy), que se actualizan por bloques de filas.
+
+    La memoria usada no depende del número de filas, las filas pueden
+    agregarse o quitarse (por ejemplo, al editar la tabla) y los coeficientes
+    coinciden con los de `np.polyfit` dentro de la tolerancia numérica.
+
+    Para el condicionamiento, x se centra y escala con el primer bloque
+    recibido antes de construir la base de potencias.
+    """
+
+    def __init__(self, grado, centro=None, escala=None):
+        self.grado = grado
+        self.centro = centro
+        self.escala = escala
+        self.n = 0
+        self.suma_pesos = 0.0
+        self.xtx = np.zeros((grado + 1, grado + 1))
+        self.xty = np.zeros(grado + 1)
+        self.yty = 0.0
+        self.segundos = 0.0
+
+    def _base(self, x):
+        if self.centro is None:
+            self.centro = float(np.mean(x))
+            rango = float(np.max(np.abs(x - self.centro)))
+            self.escala = rango if rango > 0 else 1.0
+        u = (x - self.centro) / self.escala
+        # Columnas de mayor a menor grado, como en np.polyfit
+        return np.vander(u, self.grado + 1)
+
+    def _actualizar(self, x, y, pesos, signo):
+        inicio = time.perf_counter()
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if len(x) != len(y):
+            raise ValueError("Las columnas x e y deben tener la misma longitud.")
+        if len(x) == 0:
+            return
+        w = np.ones_like(x) if pesos is None else np.asarray(pesos, dtype=float).ravel()
+
+        V = self._base(x)
+        Vw = V * w[:, None]
+        self.xtx += signo * (Vw.T @ V)
+        self.xty += signo * (Vw.T @ y)
+        self.yty += signo * float(np.dot(w * y, y))
+        self.n += signo * len(x)
+        self.suma_pesos += signo * float(w.sum())
+        self.segundos += time.perf_counter() - inicio
+
+    def agregar(self, x, y, pesos=None):
+        """Incorpora un bloque de filas (con pesos opcionales)."""
+        self._actualizar(x, y, pesos, 1)
+
+    def quitar(self, x, y, pesos=None):
+        """Descuenta filas agregadas previamente (por ejemplo, al editarlas)."""
+        self._actualizar(x, y, pesos, -1)
+
+    def _coeficientes_escalados(self):
+        if self.n < self.grado + 1:
+            raise ValueError(
+                f"Se necesitan al menos {self.grado + 1} filas para ajustar un polinomio de grado {self.grado}."
+            )
+        try:
+            return np.linalg.solve(self.xtx, self.xty)
+        except np.linalg.LinAlgError:
+            return np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+
+    def coeficientes(self):
+        """
+        Coeficientes del polinomio en x, de mayor a menor grado (mismo
+        orden que `np.polyfit`).
+        """
+        beta = self._coeficientes_escalados()
+        # Deshacer el cambio de variable u = (x - centro) / escala
+        u = np.poly1d([1 / self.escala, -self.centro / self.escala])
+        coeficientes = np.poly1d(beta)(u).coeffs
+        # poly1d elimina ceros iniciales; se rellenan para conservar el grado
+        return np.concatenate([np.zeros(self.grado + 1 - len(coeficientes)), coeficientes])
+
+    def suma_cuadrados_residuos(self):
+        """Suma (ponderada) de los cuadrados de los residuos del ajuste."""
+        beta = self._coeficientes_escalados()
+        return max(0.0, self.yty - 2 * beta @ self.xty + beta @ self.xtx @ beta)
+
+    def filas_por_segundo(self):
+        """Velocidad de acumulación medida hasta ahora."""
+        return self.n / self.segundos if self.segundos > 0 else float("nan")
+
+
+class MuestraReservorio:
+    """
+    Muestra aleatoria uniforme de tamaño fijo de un flujo de filas, usada
+    para graficar datasets que no caben en memoria. Cada fila recibe una
+    prioridad aleatoria y se conservan las de menor prioridad.
+    """
+
+    def __init__(self, tamano=TAMANO_MUESTRA, semilla=None):
+        self.tamano = tamano
+        self._rng = np.random.default_rng(semilla)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self._prioridades = np.empty(0)
+
+    def agregar(self, x, y):
+        x = np.concatenate([self.x, np.asarray(x, dtype=float).ravel()])
+        y = np.concatenate([self.y, np.asarray(y, dtype=float).ravel()])
+        prioridades = np.concatenate([self._prioridades, self._rng.random(len(x) - len(self.x))])
+        if len(x) > self.tamano:
+            conservar = np.argpartition(prioridades, self.tamano)[:self.tamano]
+            x, y, prioridades = x[conservar], y[conservar], prioridades[conservar]
+        self.x, self.y, self._prioridades = x, y, prioridades
+
+
+def leer_por_bloques(archivo, columnas, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Lee un CSV o Parquet por bloques de `tamano_bloque` filas y devuelve un
+    iterador de DataFrames con las columnas indicadas. `archivo` puede ser
+    una ruta o un archivo abierto (por ejemplo, el de `st.file_uploader`).
+    """
+    import pandas as pd
+
+    nombre = archivo if isinstance(archivo, str) else getattr(archivo, "name", "")
+    if nombre.lower().endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Para leer archivos Parquet instala el paquete `pyarrow`.") from None
+        for lote in pq.ParquetFile(archivo).iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(archivo, usecols=columnas, chunksize=tamano_bloque)
+
+
+def ajustar_por_bloques(bloques, grado, columna_x, columna_y, columna_pesos=None, al_procesar=None):
+    """
+    Ajusta un polinomio recorriendo una secuencia de DataFrames una sola vez.
+
+    Tras cada bloque se llama a `al_procesar(acumulador)` si se indicó, lo que
+    permite mostrar los coeficientes y la velocidad a medida que avanzan los
+    datos. Retorna una tupla (acumulador, muestra) con una muestra
+    representativa de las filas para graficar.
+    """
+    acumulador = AcumuladorMinimosCuadrados(grado)
+    # Semilla fija: el mismo archivo produce la misma muestra (y el mismo video en caché)
+    muestra = MuestraReservorio(semilla=0)
+    for bloque in bloques:
+        bloque = bloque.dropna(subset=[columna_x, columna_y])
+        pesos = bloque[columna_pesos].to_numpy() if columna_pesos else None
+        acumulador.agregar(bloque[columna_x].to_numpy(), bloque[columna_y].to_numpy(), pesos)
+        muestra.agregar(bloque[columna_x].to_numpy(), bloque[columna_y].to_numpy())
+        if al_procesar is not None:
+            al_procesar(acumulador)
+    return acumulador, muestra
+
+
+class AjusteIncrementalTabla:
+    """
+    Mantiene el ajuste de una tabla editable (como la de `st.data_editor`)
+    actualizándolo solo con las filas agregadas, borradas o modificadas
+    desde la versión anterior, en lugar de reajustar desde cero.
+    """
+
+    def __init__(self, grado, columna_x, columna_y):
+        self.grado = grado
+        self.columna_x = columna_x
+        self.columna_y = columna_y
+        self.acumulador = AcumuladorMinimosCuadrados(grado)
+        self._anterior = None
+
+    def actualizar(self, df):
+        """Aplica los cambios de `df` respecto a la versión anterior y devuelve el acumulador."""
+        nuevo = df[[self.columna_x, self.columna_y]].astype(float)
+        if self._anterior is None:
+            salientes = nuevo.iloc[0:0]
+            entrantes = nuevo
+        else:
+            anterior = self._anterior
+            comunes = anterior.index.intersection(nuevo.index)
+            modificadas = comunes[(anterior.loc[comunes] != nuevo.loc[comunes]).any(axis=1).to_numpy()]
+            salientes = anterior.loc[anterior.index.difference(nuevo.index).union(modificadas)]
+            entrantes = nuevo.loc[nuevo.index.difference(anterior.index).union(modificadas)]
+
+        self.acumulador.quitar(salientes[self.columna_x], salientes[self.columna_y])
+        self.acumulador.agregar(entrantes[self.columna_x], entrantes[self.columna_y])
+        self._anterior = nuevo.copy()
+        return self.acumulador
@@ -0,0 +1,195 @@
+import os
+import time
+
+import numpy as np
+
+from regresion_incremental import TAMANO_BLOQUE, AcumuladorMinimosCuadrados
+
+# Iteraciones máximas y tolerancia (cambio relativo de los coeficientes) de IRLS
+ITERACIONES_ROBUSTAS = int(os.environ.get("ROBUST_MAX_ITER", 50))
+TOLERANCIA_ROBUSTA = float(os.environ.get("ROBUST_TOLERANCE", 1e-8))
+
+# Por debajo de este peso robusto una fila se considera atípica (y se resalta)
+UMBRAL_ATIPICO = float(os.environ.get("ROBUST_OUTLIER_WEIGHT", 0.5))
+
+# Factor que lleva la mediana de |r| a la desviación típica bajo normalidad
+FACTOR_MAD = 0.6744897501960817
+
+# Escala de los residuos, relativa al mayor |y|, por debajo de la cual se
+# consideran ruido de redondeo: el ajuste actual ya pasa por los datos
+ESCALA_RELATIVA_MINIMA = 1e-9
+
+# Histograma logarítmico de |r| con el que se estima la mediana por bloques:
+# cubre 12 órdenes de magnitud por debajo de la raíz del error cuadrático
+# medio con un error relativo menor a 0,2 %
+CASILLAS_ESCALA = 16384
+DECADAS_ESCALA = 12
+
+
+def pesos_huber(r, c=1.345):
+    """Pesos de Huber para residuos estandarizados: 1 dentro de ±c, c/|r| fuera."""
+    a = np.abs(r)
+    return np.where(a <= c, 1.0, c / np.maximum(a, c))
+
+
+def pesos_tukey(r, c=4.685):
+    """Pesos bicuadrados de Tukey: (1 − (r/c)²)² dentro de ±c, 0 fuera."""
+    u = np.clip(np.abs(r) / c, 0.0, 1.0)
+    return (1 - u**2) ** 2
+
+
+# Métodos robustos disponibles: función de pesos con su constante de ajuste
+# (95 % de eficiencia bajo normalidad)
+METODOS_ROBUSTOS = {
+    "huber": pesos_huber,
+    "tukey": pesos_tukey,
+}
+
+
+def bloques_de_arreglos(X, Y, pesos=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Devuelve una función que, en cada llamada, recorre los arreglos por
+    bloques de (x, y, pesos), como `ajustar_robusto` espera de un archivo.
+    """
+    X = np.asarray(X, dtype=float).ravel()
+    Y = np.asarray(Y, dtype=float).ravel()
+    W = None if pesos is None else np.asarray(pesos, dtype=float).ravel()
+
+    def recorrer():
+        for inicio in range(0, len(X), tamano_bloque):
+            fin = inicio + tamano_bloque
+            yield X[inicio:fin], Y[inicio:fin], None if W is None else W[inicio:fin]
+    return recorrer
+
+
+class HistogramaEscala:
+    """
+    Mediana aproximada de |r| con memoria fija: un histograma de log|r|
+    sobre un rango que termina en `maximo`, que se llena por bloques.
+    """
+
+    def __init__(self, maximo):
+        self.log_maximo = np.log(maximo)
+        self.log_minimo = self.log_maximo - DECADAS_ESCALA * np.log(10)
+        self.ancho = (self.log_maximo - self.log_minimo) / CASILLAS_ESCALA
+        self.conteos = np.zeros(CASILLAS_ESCALA + 1, dtype=np.int64)
+
+    def agregar(self, r):
+        with np.errstate(divide="ignore"):
+            log_r = np.log(np.abs(r))
+        casillas = np.clip((log_r - self.log_minimo) / self.ancho, 0, CASILLAS_ESCALA).astype(np.int64)
+        self.conteos += np.bincount(casillas, minlength=CASILLAS_ESCALA + 1)
+
+    def mediana(self):
+        acumulados = np.cumsum(self.conteos)
+        casilla = int(np.searchsorted(acumulados, acumulados[-1] / 2))
+        return float(np.exp(self.log_minimo + (casilla + 0.5) * self.ancho))
+
+
+class AjusteRobusto:
+    """
+    Resultado de un ajuste por mínimos cuadrados ponderados iterativos
+    (IRLS): coeficientes, escala robusta de los residuos y diagnóstico.
+    """
+
+    def __init__(self, metodo, acumulador, escala, iteraciones, convergio, segundos):
+        self.metodo = metodo
+        self.acumulador = acumulador
+        self.escala = escala
+        self.iteraciones = iteraciones
+        self.convergio = convergio
+        self.segundos = segundos
+
+    @property
+    def n(self):
+        return self.acumulador.n
+
+    def coeficientes(self):
+        return self.acumulador.coeficientes()
+
+    def pesos(self, x, y):
+        """Pesos robustos de las filas dadas según el ajuste final."""
+        x = np.asarray(x, dtype=float).ravel()
+        r = np.asarray(y, dtype=float).ravel() - np.polyval(self.coeficientes(), x)
+        return METODOS_ROBUSTOS[self.metodo](r / self.escala)
+
+    def filas_por_segundo(self):
+        return self.n * self.iteraciones / self.segundos if self.segundos > 0 else float("nan")
+
+
+def _residuos(acumulador, beta, x, y):
+    u = (x - acumulador.centro) / acumulador.escala
+    return y - np.polyval(beta, u)
+
+
+def ajustar_robusto(recorrer, grado, metodo="huber", iteraciones=ITERACIONES_ROBUSTAS,
+                    tolerancia=TOLERANCIA_ROBUSTA, al_iterar=None):
+    """
+    Ajuste polinomial robusto (Huber o Tukey) por mínimos cuadrados
+    ponderados iterativos, por bloques: `recorrer()` devuelve en cada
+    llamada un iterador nuevo de bloques (x, y, pesos), con pesos por fila
+    opcionales (None).
+
+    Cada iteración recorre los datos una sola vez: con los coeficientes
+    actuales calcula los residuos, los pondera con la escala robusta
+    (MAD / 0,6745) estimada en la pasada anterior y acumula el sistema
+    ponderado en un `AcumuladorMinimosCuadrados`, a la vez que llena el
+    histograma de |r| con el que se estima la escala de la pasada
+    siguiente. La memoria no depende del número de filas.
+
+    Tras cada iteración se llama a `al_iterar(ajuste)` si se indicó.
+    Retorna un `AjusteRobusto`.
+    """
+    if metodo not in METODOS_ROBUSTOS:
+        raise ValueError(f"Método robusto desconocido: {metodo}. Opciones: {', '.join(METODOS_ROBUSTOS)}")
+    funcion_pesos = METODOS_ROBUSTOS[metodo]
+    inicio = time.perf_counter()
+
+    # Punto de partida: mínimos cuadrados (ponderados, si hay pesos)
+    acumulador = AcumuladorMinimosCuadrados(grado)
+    for x, y, w in recorrer():
+        acumulador.agregar(x, y, w)
+    beta = acumulador._coeficientes_escalados()
+    rms = np.sqrt(acumulador.suma_cuadrados_residuos() / max(acumulador.suma_pesos, 1e-300))
+    escala = None
+    convergio = False
+    magnitud = 0.0
+
+    for iteracion in range(1, iteraciones + 1):
+        # La mediana de |r| nunca supera √2 veces la raíz del error cuadrático medio
+        histograma = HistogramaEscala(max(np.sqrt(2) * rms, 1e-300) * 4)
+        siguiente = AcumuladorMinimosCuadrados(grado, acumulador.centro, acumulador.escala)
+        for x, y, w in recorrer():
+            x = np.asarray(x, dtype=float).ravel()
+            y = np.asarray(y, dtype=float).ravel()
+            r = _residuos(acumulador, beta, x, y)
+            histograma.agregar(r)
+            if len(y):
+                magnitud = max(magnitud, float(np.max(np.abs(y))))
+            # En la primera pasada solo se estima la escala de los residuos
+            if escala is not None:
+                pesos = funcion_pesos(r / escala)
+                if w is not None:
+                    pesos = pesos * np.asarray(w, dtype=float).ravel()
+                siguiente.agregar(x, y, pesos)
+
+        escala_nueva = histograma.mediana() / FACTOR_MAD
+        if escala is not None:
+            beta_nuevo = siguiente._coeficientes_escalados()
+            cambio = np.max(np.abs(beta_nuevo - beta)) / max(np.max(np.abs(beta)), 1e-300)
+            beta = beta_nuevo
+            acumulador = siguiente
+            convergio = cambio < tolerancia
+        escala = escala_nueva if escala_nueva > 0 else max(rms, 1e-300)
+        if escala <= ESCALA_RELATIVA_MINIMA * magnitud:
+            # Ajuste exacto (por ejemplo, tantos coeficientes como filas): no hay
+            # atípicos que descontar, y con la escala mínima las filas pesan 1
+            escala = max(ESCALA_RELATIVA_MINIMA * magnitud, 1e-300)
+            convergio = True
+
+        ajuste = AjusteRobusto(metodo, acumulador, escala, iteracion, convergio, time.perf_counter() - inicio)
+        if al_iterar is not None:
+            al_iterar(ajuste)
+        if convergio:
+            break
+    return ajuste
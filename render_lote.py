@@ -0,0 +1,160 @@
+"""
+Renderiza en lote, sin interfaz, las escenas descritas en un archivo JSONL.
+
+Cada línea del archivo describe una escena, por ejemplo:
+
+    {"escena": "LikelihoodFunction", "n": 10, "x": 7}
+    {"escena": "RegressionFunction", "X": [1, 2, 3, 4, 5], "Y": [5, 7.5, 10, 11, 12], "grado": 1}
+
+Los renders se reparten entre procesos de Manim en paralelo y los videos se
+guardan en la caché de render, de modo que la aplicación los sirve al
+instante. Al terminar se escribe un manifiesto JSON con la ruta, la duración
+y el resultado de cada escena.
+
+Uso:
+
+    python render_lote.py escenas.jsonl --procesos 8 --manifiesto manifiesto.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from cache_render import CacheRender
+from calidades import NIVEL_OBJETIVO, NIVELES_POR_NOMBRE
+from regresion_incremental import AcumuladorMinimosCuadrados
+from trabajos_render import ColaRender
+
+
+def config_desde_entrada(entrada):
+    """
+    Construye la configuración de la escena igual que la aplicación, para que
+    los videos del lote compartan la clave de caché con los de la app.
+
+    Retorna una tupla (escena, config, calidad).
+    """
+    escena = entrada.get("escena")
+    calidad = entrada.get("calidad", NIVEL_OBJETIVO)
+
+    if escena == "LikelihoodFunction":
+        config = {
+            "n": int(entrada["n"]),
+            "x": int(entrada["x"])
+        }
+    elif escena == "RegressionFunction":
+        X = np.array(entrada["X"], dtype=float)
+        Y = np.array(entrada["Y"], dtype=float)
+        grado = int(entrada.get("grado", 1))
+        coeficientes = entrada.get("coeficientes")
+        if coeficientes is None:
+            # El mismo ajuste que la tabla de la aplicación (misma base y orden de las filas)
+            acumulador = AcumuladorMinimosCuadrados(grado)
+            acumulador.agregar(X, Y)
+            coeficientes = acumulador.coeficientes().tolist()
+        config = {
+            "X": X.tolist(),
+            "Y": Y.tolist(),
+            "grado": grado,
+            "coeficientes": list(coeficientes)
+        }
+    else:
+        raise ValueError(f"Escena desconocida: {escena}")
+
+    return escena, config, calidad
+
+
+def leer_entradas(ruta):
+    """Lee el archivo JSONL ignorando líneas vacías; retorna (número_de_línea, entrada)."""
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if linea.strip():
+                yield numero, json.loads(linea)
+
+
+def renderizar_lote(ruta_entradas, procesos, calidades=None):
+    """
+    Encola todas las escenas del archivo y espera a que terminen.
+
+    Retorna la lista de registros del manifiesto, uno por línea del archivo.
+    """
+    entradas = list(leer_entradas(ruta_entradas))
+    cola = ColaRender(cache=CacheRender(), max_concurrentes=procesos, max_cola=max(len(entradas), 1))
+
+    registros = []
+    pendientes = []
+    for numero, entrada in entradas:
+        registro = {"linea": numero, "escena": entrada.get("escena")}
+        try:
+            escena, config, calidad = config_desde_entrada(entrada)
+            for nivel in calidades or [calidad]:
+                trabajo = cola.enviar(escena, config, nivel)
+                pendientes.append((dict(registro, calidad=nivel), trabajo))
+        except Exception as e:
+            registros.append(dict(registro, estado="fallido", error=str(e)))
+
+    for registro, trabajo in pendientes:
+        trabajo.esperar()
+        duracion = (trabajo.finalizado - trabajo.iniciado) if trabajo.iniciado else 0.0
+        registro.update({
+            "clave": trabajo.clave,
+            "estado": trabajo.estado,
+            "desde_cache": trabajo.desde_cache,
+            "video": trabajo.video_path if trabajo.exito else None,
+            "segundos": round(duracion, 3),
+        })
+        if not trabajo.exito:
+            registro["error"] = trabajo.mensaje
+        registros.append(registro)
+        print(
+            f"[{registro['estado']}] línea {registro['linea']} {registro['escena']} "
+            f"({registro['calidad']}) {registro['segundos']:.1f}s",
+            file=sys.stderr,
+        )
+
+    if cola.pool is not None:
+        cola.pool.detener()
+    return sorted(registros, key=lambda r: r["linea"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderiza en lote escenas descritas en un archivo JSONL.")
+    parser.add_argument("entradas", help="Archivo JSONL con una escena por línea.")
+    parser.add_argument(
+        "--procesos", type=int, default=os.cpu_count() or 1,
+        help="Renders simultáneos (por defecto, todos los núcleos)."
+    )
+    parser.add_argument(
+        "--calidad", action="append", choices=list(NIVELES_POR_NOMBRE),
+        help="Nivel de calidad a generar; puede repetirse. Por defecto, el de cada línea o el nivel objetivo."
+    )
+    parser.add_argument("--manifiesto", default="manifiesto.json", help="Ruta del manifiesto JSON de salida.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    registros = renderizar_lote(args.entradas, args.procesos, args.calidad)
+    fallidos = [r for r in registros if r["estado"] != "terminado"]
+
+    manifiesto = {
+        "entradas": os.path.abspath(args.entradas),
+        "procesos": args.procesos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "total": len(registros),
+        "fallidos": len(fallidos),
+        "renders": registros,
+    }
+    with open(args.manifiesto, "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=2)
+
+    print(
+        f"{len(registros) - len(fallidos)}/{len(registros)} renders correctos en {manifiesto['segundos']:.1f}s. "
+        f"Manifiesto: {args.manifiesto}",
+        file=sys.stderr,
+    )
+    sys.exit(1 if fallidos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Render de una sola escena repartido entre varios procesos.
+
+Las animaciones de una escena de Manim se reproducen en secuencia en un solo
+núcleo. Con `-n i,i` (o `from_animation_number`/`upto_animation_number`)
+Manim ejecuta `construct` completo pero solo codifica la animación i; las
+demás se saltan llevando los mobjects a su estado final, que es barato. Cada
+animación se renderiza así como un tramo independiente en su propio
+directorio, los tramos se reparten entre los procesos disponibles y al final
+se unen sin recodificar (concat de ffmpeg con `-c copy`): todos comparten
+códec, resolución y tasa de cuadros, así que la unión no pierde calidad.
+
+Manim no permite cortar una animación por rangos de cuadros, de modo que la
+unidad de reparto es la animación. La cantidad de animaciones no se conoce de
+antemano (depende de los parámetros): los tramos se piden en orden y el
+primero que no produce video marca el final de la escena.
+"""
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from entrega_video import FFMPEG, TIMEOUT_FFMPEG
+
+# Procesos entre los que se reparte un render (1 desactiva el reparto)
+TRAMOS_RENDER = int(os.environ.get("RENDER_CHUNK_WORKERS", 1))
+
+# Hilos del codificador por proceso de Manim (0: los que elija el códec). Con
+# varios procesos por render conviene limitarlos para no sobresuscribir la CPU
+HILOS_CODIFICADOR = int(os.environ.get("RENDER_ENCODER_THREADS", 0))
+
+# Directorio de cada tramo dentro del directorio del trabajo
+PREFIJO_TRAMO = "tramo_"
+ARCHIVO_LISTA = "tramos.txt"
+
+
+def opciones_codificador(hilos=HILOS_CODIFICADOR):
+    """Opciones del codificador de video de Manim que fijan sus hilos."""
+    return {"threads": str(hilos)} if hilos > 0 else {}
+
+
+def flags_codificador(hilos=HILOS_CODIFICADOR):
+    """Los mismos ajustes que `opciones_codificador`, como flags de la CLI."""
+    return [f"--encoder-option={clave}={valor}" for clave, valor in opciones_codificador(hilos).items()]
+
+
+def opciones_tramo(indice):
+    """Configuración de Manim que renderiza solo la animación `indice`."""
+    return {"from_animation_number": indice, "upto_animation_number": indice}
+
+
+def flags_tramo(indice):
+    return ["-n", f"{indice},{indice}"]
+
+
+def ffmpeg_disponible():
+    """Indica si ffmpeg está instalado (es necesario para unir los tramos)."""
+    try:
+        subprocess.run([FFMPEG, "-version"], check=True, capture_output=True, timeout=10)
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+
+
+def unir_tramos(rutas, destino):
+    """
+    Une los videos de los tramos, en orden, copiando los paquetes sin volver
+    a codificarlos. Retorna una tupla (éxito, mensaje).
+    """
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    lista = os.path.join(os.path.dirname(destino) or ".", ARCHIVO_LISTA)
+    with open(lista, "w") as archivo:
+        for ruta in rutas:
+            # Comillas simples escapadas según la sintaxis del demuxer concat
+            ruta_escapada = os.path.abspath(ruta).replace("'", "'\\''")
+            archivo.write(f"file '{ruta_escapada}'\n")
+    try:
+        subprocess.run(
+            [FFMPEG, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", lista, "-c", "copy", destino],
+            check=True, capture_output=True, text=True, timeout=TIMEOUT_FFMPEG,
+        )
+        return True, f"{len(rutas)} tramos unidos."
+    except subprocess.CalledProcessError as e:
+        return False, f"No se pudieron unir los tramos: {e.stderr}"
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return False, f"No se pudieron unir los tramos: {e}"
+
+
+def renderizar_por_tramos(renderizar_tramo, directorio, destino, procesos=TRAMOS_RENDER):
+    """
+    Renderiza una escena animación por animación en `procesos` hilos y une
+    los tramos en `destino`.
+
+    `renderizar_tramo(indice, directorio_tramo)` renderiza solo la animación
+    `indice` y retorna una tupla (éxito, ruta_del_video, logs, fases); si la
+    escena tiene menos animaciones, el render termina bien sin video.
+
+    Retorna una tupla (éxito, mensaje, fases_por_tramo).
+    """
+    lock = threading.Lock()
+    estado = {"siguiente": 0, "final": None, "error": None}
+    videos = {}
+    fases = {}
+    logs = {}
+
+    def trabajar():
+        while True:
+            with lock:
+                indice = estado["siguiente"]
+                if estado["error"] is not None or (estado["final"] is not None and indice >= estado["final"]):
+                    return
+                estado["siguiente"] += 1
+
+            exito, ruta, log, fases_tramo = renderizar_tramo(indice, os.path.join(directorio, f"{PREFIJO_TRAMO}{indice}"))
+            with lock:
+                fases[indice] = fases_tramo
+                if not exito:
+                    estado["error"] = estado["error"] or log
+                    return
+                if ruta and os.path.exists(ruta):
+                    videos[indice] = ruta
+                    logs[indice] = log
+                else:
+                    # Sin video: la escena tiene `indice` animaciones
+                    estado["final"] = indice if estado["final"] is None else min(estado["final"], indice)
+                    return
+
+    with ThreadPoolExecutor(max_workers=max(procesos, 1), thread_name_prefix="tramo") as executor:
+        for futuro in [executor.submit(trabajar) for _ in range(max(procesos, 1))]:
+            futuro.result()
+
+    if estado["error"] is not None:
+        return False, estado["error"], fases
+    total = estado["final"]
+    if not total:
+        return False, "La escena no contiene animaciones.", fases
+    faltantes = [i for i in range(total) if i not in videos]
+    if faltantes:
+        return False, f"Faltan los tramos {faltantes}.", fases
+
+    exito, mensaje = unir_tramos([videos[i] for i in range(total)], destino)
+    return exito, "\n".join([logs[i] for i in range(total)] + [mensaje]), fases
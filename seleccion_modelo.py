@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+
+from regresion_incremental import TAMANO_BLOQUE, leer_por_bloques, matriz_cambio_base
+
+# Grado máximo que se ofrece y se compara
+GRADO_MAXIMO = int(os.environ.get("REGRESSION_MAX_DEGREE", 6))
+
+# Pliegues de la validación cruzada
+PLIEGUES_CV = int(os.environ.get("REGRESSION_CV_FOLDS", 5))
+
+
+class EstadisticosPliegues:
+    """
+    Estadísticos suficientes (BᵀB, Bᵀy, yᵀy y filas) de cada pliegue de la
+    validación cruzada, para una base B de polinomios de hasta
+    `grado_maximo`. Con ellos se ajustan y validan todos los grados sin
+    volver a recorrer los datos.
+
+    Las filas se asignan a los pliegues al azar a medida que llegan, así que
+    pueden agregarse por bloques (por ejemplo, al leer un archivo).
+    """
+
+    def __init__(self, grado_maximo, pliegues=PLIEGUES_CV, semilla=0):
+        m = grado_maximo + 1
+        self.grado_maximo = grado_maximo
+        self.pliegues = pliegues
+        self.btb = np.zeros((pliegues, m, m))
+        self.bty = np.zeros((pliegues, m))
+        self.yty = np.zeros(pliegues)
+        self.filas = np.zeros(pliegues, dtype=np.int64)
+        self.centro = None
+        self.escala = None
+        self._rng = np.random.default_rng(semilla)
+
+    def agregar_base(self, B, y, pliego):
+        """Acumula filas ya expresadas en la base, con su pliegue asignado."""
+        for f in range(self.pliegues):
+            filas = pliego == f
+            Bf = B[filas]
+            self.btb[f] += Bf.T @ Bf
+            self.bty[f] += Bf.T @ y[filas]
+            self.yty[f] += float(y[filas] @ y[filas])
+            self.filas[f] += int(filas.sum())
+
+    def agregar(self, x, y):
+        """
+        Acumula un bloque de filas en la base de potencias de x centrado y
+        escalado con el primer bloque recibido.
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if len(x) == 0:
+            return
+        if self.centro is None:
+            self.centro = float(np.mean(x))
+            rango = float(np.max(np.abs(x - self.centro)))
+            self.escala = rango if rango > 0 else 1.0
+        B = np.vander((x - self.centro) / self.escala, self.grado_maximo + 1, increasing=True)
+        self.agregar_base(B, y, self._rng.integers(0, self.pliegues, len(x)))
+
+
+def _resolver_en_lote(A, b):
+    try:
+        return np.linalg.solve(A, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # Algún pliegue sin suficientes valores distintos de x para ese grado
+        return np.einsum("...ij,...j->...i", np.linalg.pinv(A), b)
+
+
+def comparar_desde_estadisticos(estadisticos, grado_maximo=None):
+    """
+    Compara los grados 1 … `grado_maximo` a partir de los estadísticos de
+    los pliegues.
+
+    Los ajustes de todos los grados salen de una sola factorización: con la
+    Cholesky BᵀB = LLᵀ, α = L⁻¹Bᵀy son los coeficientes en la base
+    ortonormal y RSS_d = yᵀy − Σ_{j≤d} α_j². La validación cruzada resuelve,
+    para cada grado, los sistemas de entrenamiento de todos los pliegues en
+    lote y evalúa su error con los estadísticos del pliegue de validación.
+
+    Retorna un diccionario con arreglos por grado: grado, rss, r2, aic, bic,
+    ecm_cv, coeficientes_base (coeficientes de cada grado en la base B) y el
+    grado recomendado (mínimo error de validación cruzada).
+    """
+    grado_maximo = estadisticos.grado_maximo if grado_maximo is None else grado_maximo
+    m = grado_maximo + 1
+    btb_f = estadisticos.btb[:, :m, :m]
+    bty_f = estadisticos.bty[:, :m]
+    btb = btb_f.sum(axis=0)
+    bty = bty_f.sum(axis=0)
+    yty = float(estadisticos.yty.sum())
+    n = int(estadisticos.filas.sum())
+
+    # Ajuste de todos los grados con una sola factorización
+    L = np.linalg.cholesky(btb)
+    alfa = np.linalg.solve(L, bty)
+    rss_acumulada = np.maximum(yty - np.cumsum(alfa**2), 0.0)
+    tss = rss_acumulada[0]  # El ajuste de grado 0 es la media
+    grados = np.arange(1, m)
+    rss = np.maximum(rss_acumulada[1:], tss * 1e-15 + 1e-300)
+
+    # Coeficientes de cada grado en la base B: Lᵀ[:d+1, :d+1] c = α[:d+1]
+    coeficientes_base = [np.linalg.solve(L.T[:d + 1, :d + 1], alfa[:d + 1]) for d in grados]
+
+    # Validación cruzada: entrenar sin el pliegue f y validar en él
+    ecm_cv = np.empty(len(grados))
+    for i, d in enumerate(grados):
+        k = d + 1
+        G_f = btb_f[:, :k, :k]
+        b_f = bty_f[:, :k]
+        c = _resolver_en_lote(btb[:k, :k] - G_f, bty[:k] - b_f)
+        sse = (
+            estadisticos.yty
+            - 2 * np.einsum("fi,fi->f", c, b_f)
+            + np.einsum("fi,fij,fj->f", c, G_f, c)
+        )
+        ecm_cv[i] = max(float(sse.sum()), 0.0) / n
+
+    parametros = grados + 2  # coeficientes más la varianza del error
+    log_verosimilitud = n * np.log(rss / n)
+    return {
+        "grado": grados,
+        "rss": rss,
+        "r2": 1 - rss / tss if tss > 0 else np.ones(len(grados)),
+        "aic": log_verosimilitud + 2 * parametros,
+        "bic": log_verosimilitud + parametros * np.log(n),
+        "ecm_cv": ecm_cv,
+        "coeficientes_base": coeficientes_base,
+        "recomendado": int(grados[np.argmin(ecm_cv)]),
+    }
+
+
+def grado_maximo_posible(X, grado_maximo=GRADO_MAXIMO):
+    """Grado máximo comparable: cada ajuste necesita más valores distintos de x que coeficientes."""
+    return max(1, min(grado_maximo, len(np.unique(X)) - 2))
+
+
+def comparar_grados(X, Y, grado_maximo=GRADO_MAXIMO, pliegues=PLIEGUES_CV, semilla=0):
+    """
+    Compara en una sola pasada los polinomios de grado 1 … `grado_maximo`
+    ajustados a X e Y: R², AIC, BIC y error cuadrático medio de validación
+    cruzada de k pliegues, y recomienda un grado.
+
+    La base es ortonormal (la Q de la factorización QR de la matriz de
+    potencias de x centrado y escalado), lo que mantiene bien condicionados
+    los ajustes de grado alto. Además de lo que devuelve
+    `comparar_desde_estadisticos`, el diccionario incluye `coeficientes`:
+    los de cada grado en x, de mayor a menor grado, como `np.polyfit`.
+    """
+    X = np.asarray(X, dtype=float).ravel()
+    Y = np.asarray(Y, dtype=float).ravel()
+    if len(X) != len(Y):
+        raise ValueError("Las columnas x e y deben tener la misma longitud.")
+    if len(np.unique(X)) < 3:
+        raise ValueError("Se necesitan al menos 3 valores distintos de x para comparar grados.")
+
+    grado_maximo = grado_maximo_posible(X, grado_maximo)
+    pliegues = min(pliegues, len(X))
+    centro = float(np.mean(X))
+    rango = float(np.max(np.abs(X - centro)))
+    escala = rango if rango > 0 else 1.0
+    V = np.vander((X - centro) / escala, grado_maximo + 1, increasing=True)
+    Q, R = np.linalg.qr(V)
+
+    estadisticos = EstadisticosPliegues(grado_maximo, pliegues, semilla)
+    pliego = np.random.default_rng(semilla).permutation(len(X)) % pliegues
+    estadisticos.agregar_base(Q, Y, pliego)
+    resultado = comparar_desde_estadisticos(estadisticos)
+
+    # De la base Q a potencias de u (V = QR) y de ahí a potencias de x
+    resultado["coeficientes"] = [
+        np.linalg.solve(R[:d + 1, :d + 1], c) @ matriz_cambio_base(centro, escala, d)
+        for d, c in zip(resultado["grado"], resultado["coeficientes_base"])
+    ]
+    return resultado
+
+
+def comparar_grados_archivo(archivo, columna_x, columna_y, grado_maximo=GRADO_MAXIMO,
+                            pliegues=PLIEGUES_CV, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Compara los grados leyendo el archivo una sola vez por bloques. La base
+    son las potencias de x centrado y escalado con el primer bloque, que se
+    ortonormalizan con la factorización de Cholesky de sus estadísticos.
+    """
+    estadisticos = EstadisticosPliegues(grado_maximo, pliegues)
+    for bloque in leer_por_bloques(archivo, [columna_x, columna_y], tamano_bloque):
+        bloque = bloque.dropna()
+        estadisticos.agregar(bloque[columna_x].to_numpy(dtype=float), bloque[columna_y].to_numpy(dtype=float))
+    if estadisticos.filas.sum() < grado_maximo + 2:
+        raise ValueError("El archivo no tiene suficientes filas para comparar los grados.")
+    return comparar_desde_estadisticos(estadisticos)
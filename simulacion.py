@@ -0,0 +1,59 @@
+import os
+import random
+import time
+
+# Latencia del backend de render simulado (RENDER_BACKEND=stub); ver `muestreador_latencia`
+LATENCIA_RENDER_SIMULADO = os.environ.get("RENDER_STUB_LATENCY", "1")
+
+# Encabezado de un MP4 mínimo: la aplicación solo comprueba que el video exista
+_VIDEO_SIMULADO = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+
+def muestreador_latencia(especificacion, semilla=None):
+    """
+    Devuelve una función sin argumentos que entrega una latencia en segundos
+    según la especificación:
+
+    - `0.5`: latencia fija.
+    - `uniforme:0.5,2`: uniforme entre los dos valores.
+    - `exponencial:1`: exponencial con la media indicada.
+    - `lognormal:1,0.5`: lognormal con la mediana y la desviación (del logaritmo) indicadas.
+    """
+    rng = random.Random(semilla)
+    nombre, _, parametros = str(especificacion).partition(":")
+    if not parametros:
+        fija = float(nombre)
+        return lambda: fija
+    valores = [float(v) for v in parametros.split(",")]
+    if nombre == "uniforme" and len(valores) == 2:
+        return lambda: rng.uniform(*valores)
+    if nombre == "exponencial" and len(valores) == 1:
+        return lambda: rng.expovariate(1 / valores[0])
+    if nombre == "lognormal" and len(valores) == 2:
+        mediana, sigma = valores
+        return lambda: mediana * rng.lognormvariate(0, sigma)
+    raise ValueError(
+        f"Latencia no válida: {especificacion}. Usa un número, 'uniforme:a,b', 'exponencial:media' o 'lognormal:mediana,sigma'."
+    )
+
+
+class RenderSimulado:
+    """
+    Backend de render sin Manim para pruebas de carga: espera una latencia
+    (fija o muestreada) y deja un video de marcador en la ruta donde Manim
+    lo habría escrito, de modo que la cola, la caché y la aplicación siguen
+    su camino habitual.
+    """
+
+    def __init__(self, latencia=LATENCIA_RENDER_SIMULADO):
+        self.latencia = muestreador_latencia(latencia)
+
+    def renderizar(self, trabajo):
+        """Retorna una tupla (éxito, mensaje, ruta_del_video), como `ColaRender._renderizar`."""
+        segundos = self.latencia()
+        time.sleep(segundos)
+        video_path = trabajo.ruta_video()
+        os.makedirs(os.path.dirname(video_path), exist_ok=True)
+        with open(video_path, "wb") as archivo:
+            archivo.write(_VIDEO_SIMULADO + trabajo.clave.encode("ascii"))
+        return True, f"Render simulado en {segundos:.3f} s.", video_path
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+# Renders e interpretaciones simulados: las pruebas no necesitan Manim ni Gemini
+os.environ["RENDER_BACKEND"] = "stub"
+os.environ["RENDER_STUB_LATENCY"] = "0"
+os.environ["INTERPRETATION_BACKEND"] = "local"
+os.environ["INTERPRETATION_STUB_LATENCY"] = "0"
+
+import trabajos_render
+
+SCRIPT_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def directorio_de_trabajo(tmp_path_factory):
+    """
+    Directorio de trabajo de la aplicación (caché, trabajos, métricas). Es
+    uno para toda la sesión: la cola y las cachés de `st.cache_resource` se
+    comparten entre las pruebas del proceso y sus rutas son relativas.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("app"))
+        yield
+
+
+@pytest.fixture
+def configuraciones(monkeypatch):
+    """Registra la configuración de cada escena que la aplicación encola."""
+    enviadas = []
+    enviar = trabajos_render.ColaRender.enviar
+
+    def registrar(self, escena, config, *args, **kwargs):
+        enviadas.append((escena, config))
+        return enviar(self, escena, config, *args, **kwargs)
+
+    monkeypatch.setattr(trabajos_render.ColaRender, "enviar", registrar)
+    return enviadas
@@ -0,0 +1,41 @@
+import io
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from agregacion import UMBRAL_AGREGACION, agrega_escena
+from conftest import SCRIPT_APP
+
+
+def subir_y_generar(filas):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 10, filas)
+    datos = pd.DataFrame({"Producción (x)": x, "Horas Trabajadas (y)": 2 * x + 1 + rng.normal(0, 1, filas)})
+    contenido = io.BytesIO()
+    datos.to_csv(contenido, index=False)
+
+    at = AppTest.from_file(SCRIPT_APP, default_timeout=120).run()
+    next(r for r in at.radio if "Cargar Archivo (CSV/Parquet)" in r.options).set_value("Cargar Archivo (CSV/Parquet)").run()
+    at.file_uploader[0].set_value(("datos.csv", contenido.getvalue(), "text/csv"))
+    at.button(key="generate_regression").click().run()
+    assert not at.exception
+    assert not at.error, [e.value for e in at.error]
+    return at
+
+
+def test_archivo_grande_se_dibuja_agregado(configuraciones):
+    subir_y_generar(20_000)
+    escenas = [config for escena, config in configuraciones if escena == "RegressionFunction"]
+    assert escenas
+    for config in escenas:
+        # La escena recibe una muestra, pero la dibuja como densidad
+        assert len(config["X"]) < 20_000
+        assert agrega_escena(config)
+
+
+def test_archivo_chico_se_dibuja_punto_por_punto(configuraciones):
+    subir_y_generar(UMBRAL_AGREGACION // 5)
+    escenas = [config for escena, config in configuraciones if escena == "RegressionFunction"]
+    assert escenas
+    assert not any(agrega_escena(config) for config in escenas)
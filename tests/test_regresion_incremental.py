@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from regresion_incremental import AcumuladorMinimosCuadrados
+
+
+@pytest.mark.parametrize("grado", [1, 2, 3, 5])
+def test_coincide_con_polyfit_por_bloques(grado):
+    rng = np.random.default_rng(grado)
+    x = rng.uniform(-5, 15, 10_000)
+    y = np.polyval(rng.normal(size=grado + 1), x) + rng.normal(0, 5, x.size)
+
+    acumulador = AcumuladorMinimosCuadrados(grado)
+    for inicio in range(0, len(x), 1_234):
+        acumulador.agregar(x[inicio:inicio + 1_234], y[inicio:inicio + 1_234])
+
+    esperado = np.polyfit(x, y, grado)
+    # En grados altos los coeficientes en x están mal condicionados (también
+    # los de polyfit): se comparan las curvas ajustadas
+    np.testing.assert_allclose(
+        np.polyval(acumulador.coeficientes(), x), np.polyval(esperado, x), rtol=0, atol=1e-8 * np.max(np.abs(y))
+    )
+    if grado <= 2:
+        np.testing.assert_allclose(acumulador.coeficientes(), esperado, rtol=1e-8)
+    residuos = y - np.polyval(esperado, x)
+    assert acumulador.suma_cuadrados_residuos() == pytest.approx(np.sum(residuos**2), rel=1e-6)
+
+
+def test_coincide_con_polyfit_ponderado_y_al_quitar_filas():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 10, 1_000)
+    y = 3 * x**2 - 2 * x + 1 + rng.normal(0, 1, x.size)
+    w = rng.uniform(0.1, 2, x.size)
+
+    acumulador = AcumuladorMinimosCuadrados(2)
+    acumulador.agregar(x, y, w)
+    # np.polyfit pondera los residuos sin elevar al cuadrado: se pasa √w
+    np.testing.assert_allclose(acumulador.coeficientes(), np.polyfit(x, y, 2, w=np.sqrt(w)), rtol=1e-8)
+
+    acumulador.quitar(x[:300], y[:300], w[:300])
+    np.testing.assert_allclose(
+        acumulador.coeficientes(), np.polyfit(x[300:], y[300:], 2, w=np.sqrt(w[300:])), rtol=1e-8
+    )
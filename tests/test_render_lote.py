@@ -0,0 +1,26 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from app import opciones_modelo
+from cache_render import clave_render
+from conftest import SCRIPT_APP
+from render_lote import config_desde_entrada
+
+# Tabla por defecto de la sección de regresión
+X_POR_DEFECTO = [1, 2, 3, 4, 5]
+Y_POR_DEFECTO = [5, 7.5, 10, 11, 12]
+
+
+@pytest.mark.parametrize("grado", [1, 2, 3, 4])
+def test_lote_comparte_clave_con_la_app(configuraciones, grado):
+    at = AppTest.from_file(SCRIPT_APP, default_timeout=120).run()
+    next(s for s in at.selectbox if "Lineal" in s.options).set_value(opciones_modelo(grado)[grado - 1]).run()
+    at.button(key="generate_regression").click().run()
+    assert not at.exception
+    assert not at.error, [e.value for e in at.error]
+
+    config_app = next(config for escena, config in configuraciones if escena == "RegressionFunction")
+    escena, config_lote, _ = config_desde_entrada(
+        {"escena": "RegressionFunction", "X": X_POR_DEFECTO, "Y": Y_POR_DEFECTO, "grado": grado}
+    )
+    assert clave_render(escena, config_lote, []) == clave_render("RegressionFunction", config_app, [])
@@ -0,0 +1,419 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_latex import DIRECTORIO_CACHE_LATEX
+from cache_render import clave_render
+from cache_segmentos import DIRECTORIO_CACHE_SEGMENTOS, DIRECTORIO_TEXTOS
+from calidades import NIVEL_OBJETIVO, obtener_nivel
+from entrega_video import optimizar_mp4
+from instrumentacion import VARIABLE_ARCHIVO_FASES, VARIABLE_INICIO_PROCESO
+from metricas import REGISTRO, Cronometro
+from render_tramos import (
+    TRAMOS_RENDER,
+    ffmpeg_disponible,
+    flags_codificador,
+    flags_tramo,
+    opciones_codificador,
+    opciones_tramo,
+    renderizar_por_tramos,
+)
+
+# Límites de la cola de render (configurables por variables de entorno)
+DIRECTORIO_TRABAJOS = os.environ.get("RENDER_JOBS_DIR", os.path.join("media", "jobs"))
+MAX_RENDERS_CONCURRENTES = int(os.environ.get("RENDER_MAX_WORKERS", 2))
+MAX_COLA = int(os.environ.get("RENDER_QUEUE_DEPTH", 20))
+TIMEOUT_RENDER = float(os.environ.get("RENDER_TIMEOUT", 300))
+
+# "workers": procesos persistentes con Manim ya importado; "cli": un proceso `manim` por render;
+# "stub": renders simulados sin Manim, para pruebas de carga
+BACKEND_RENDER = os.environ.get("RENDER_BACKEND", "workers")
+
+# Ruta absoluta al script de escenas, para poder ejecutarlo desde cualquier directorio
+SCRIPT_MANIM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manim.py")
+
+# Script que precalienta la caché compartida de LaTeX
+SCRIPT_CACHE_LATEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_latex.py")
+
+# Archivo de configuración que lee cada escena de manim.py
+ARCHIVOS_CONFIG = {
+    "LikelihoodFunction": "config.json",
+    "RegressionFunction": "config_regression.json",
+}
+
+# Archivo donde el proceso de la CLI deja la duración de sus fases
+ARCHIVO_FASES = "fases.json"
+
+# Estados posibles de un trabajo
+EN_COLA = "en_cola"
+EJECUTANDO = "ejecutando"
+TERMINADO = "terminado"
+FALLIDO = "fallido"
+
+
+class ColaLlena(Exception):
+    """Se lanza cuando la cola de render alcanzó su profundidad máxima."""
+
+
+def run_manim(scene_name, flags, directorio, timeout=TIMEOUT_RENDER):
+    """
+    Ejecuta el script de Manim para generar el video de la escena especificada
+    dentro del directorio de trabajo indicado. El proceso guarda la duración
+    de sus fases en `fases.json` dentro del mismo directorio.
+    """
+    env = dict(
+        os.environ,
+        **{
+            VARIABLE_ARCHIVO_FASES: os.path.join(os.path.abspath(directorio), ARCHIVO_FASES),
+            VARIABLE_INICIO_PROCESO: repr(time.time()),
+            # El proceso corre dentro del directorio del trabajo: las cachés
+            # compartidas se le pasan con rutas absolutas
+            "LATEX_CACHE_DIR": os.path.abspath(DIRECTORIO_CACHE_LATEX),
+            "RENDER_SEGMENT_CACHE_DIR": os.path.abspath(DIRECTORIO_CACHE_SEGMENTOS),
+            "TEXT_CACHE_DIR": os.path.abspath(DIRECTORIO_TEXTOS),
+        },
+    )
+    command = [
+        "manim",
+        *flags,                # Flags de calidad
+        SCRIPT_MANIM,          # Ruta al script de Manim
+        scene_name             # Nombre de la clase de la escena
+    ]
+
+    try:
+        result = subprocess.run(
+            command, check=True, capture_output=True, text=True, cwd=directorio, timeout=timeout, env=env
+        )
+        return True, result.stdout
+    except subprocess.CalledProcessError as e:
+        return False, e.stderr
+    except subprocess.TimeoutExpired:
+        return False, f"El render superó el tiempo máximo de {timeout:.0f} segundos."
+
+
+class TrabajoRender:
+    """
+    Un render de una escena con su propia configuración y su propio
+    directorio de trabajo, de modo que trabajos concurrentes no se pisan.
+    """
+
+    def __init__(self, escena, config, nivel, clave, directorio_base=DIRECTORIO_TRABAJOS):
+        self.id = uuid.uuid4().hex
+        self.escena = escena
+        self.config = config
+        self.nivel = nivel
+        self.flags = [nivel.flag]
+        self.clave = clave
+        self.directorio = os.path.join(directorio_base, self.id)
+        self.estado = EN_COLA
+        self.exito = False
+        self.desde_cache = False
+        self.video_path = None
+        self.mensaje = ""
+        self.creado = time.time()
+        self.iniciado = None
+        self.finalizado = None
+        self.cronometro = Cronometro()
+        self._evento = threading.Event()
+
+    @property
+    def terminado(self):
+        return self._evento.is_set()
+
+    @property
+    def fases(self):
+        """Duración en segundos de cada fase del render."""
+        return self.cronometro.fases
+
+    def esperar(self, timeout=None):
+        """Espera a que el trabajo termine; devuelve True si terminó."""
+        return self._evento.wait(timeout)
+
+    def preparar(self, directorio=None):
+        """Crea el directorio de trabajo (u otro, como el de un tramo) y escribe allí la configuración."""
+        directorio = directorio or self.directorio
+        os.makedirs(directorio, exist_ok=True)
+        config_path = os.path.join(directorio, ARCHIVOS_CONFIG[self.escena])
+        with self.cronometro.fase("escritura_config"):
+            with open(config_path, "w") as config_file:
+                json.dump(self.config, config_file)
+
+    def leer_fases_cli(self):
+        """Incorpora las fases que midió el proceso de la CLI, si las escribió."""
+        try:
+            with open(os.path.join(self.directorio, ARCHIVO_FASES)) as archivo:
+                self.fases.update(json.load(archivo))
+        except (OSError, ValueError):
+            pass
+
+    def ruta_video(self, directorio=None):
+        """Ruta donde Manim deja el video dentro del directorio de trabajo (o de un tramo)."""
+        return os.path.join(
+            directorio or self.directorio, "media", "videos", "manim", self.nivel.subdirectorio, f"{self.escena}.mp4"
+        )
+
+    def limpiar(self):
+        """Elimina el directorio de trabajo."""
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def finalizar(self, exito, mensaje, video_path=None):
+        self.exito = exito
+        self.mensaje = mensaje
+        self.video_path = video_path
+        self.estado = TERMINADO if exito else FALLIDO
+        self.finalizado = time.time()
+        self._evento.set()
+
+
+class ColaRender:
+    """
+    Cola acotada de trabajos de render ejecutados por un número máximo de
+    procesos de Manim concurrentes: workers persistentes (backend "workers")
+    o un proceso de la CLI por trabajo (backend "cli"); el backend "stub"
+    simula los renders con una latencia configurable. Con `tramos` mayor que
+    1, cada render se reparte animación por animación entre ese número de
+    procesos y los tramos se unen sin recodificar.
+
+    Si se indica una caché, los aciertos se resuelven sin encolar nada y los
+    videos generados se guardan en ella. Solicitudes idénticas que llegan
+    mientras un render está en curso se agrupan en el mismo trabajo.
+    """
+
+    def __init__(
+        self,
+        cache=None,
+        max_concurrentes=MAX_RENDERS_CONCURRENTES,
+        max_cola=MAX_COLA,
+        timeout=TIMEOUT_RENDER,
+        directorio=DIRECTORIO_TRABAJOS,
+        backend=BACKEND_RENDER,
+        tramos=TRAMOS_RENDER,
+    ):
+        self.cache = cache
+        self.max_concurrentes = max_concurrentes
+        self.max_cola = max_cola
+        self.timeout = timeout
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        self._pendientes = []
+        self._ejecutando = []
+        self._en_curso = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrentes, thread_name_prefix="render")
+
+        # Unir los tramos requiere ffmpeg; sin él se renderiza de una sola vez
+        self.tramos = tramos if tramos > 1 and ffmpeg_disponible() else 1
+
+        # Un worker precalentado por cada render concurrente permitido (o por
+        # cada tramo, si son más); cada worker precalienta la caché de LaTeX
+        # al arrancar
+        self.pool = None
+        self.simulador = None
+        if backend == "workers":
+            from worker_manim import PoolManim
+            self.pool = PoolManim(max(max_concurrentes, self.tramos))
+        elif backend == "stub":
+            from simulacion import RenderSimulado
+            self.simulador = RenderSimulado()
+        else:
+            threading.Thread(target=self._precalentar_latex, daemon=True).start()
+
+    @staticmethod
+    def _precalentar_latex():
+        """Precalienta la caché de LaTeX en un proceso aparte (backend "cli")."""
+        try:
+            subprocess.run([sys.executable, SCRIPT_CACHE_LATEX], capture_output=True, timeout=TIMEOUT_RENDER)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def en_cache(self, escena, config, calidad=NIVEL_OBJETIVO):
+        """Indica si el video ya está en la caché, sin afectar sus contadores."""
+        if self.cache is None:
+            return False
+        nivel = obtener_nivel(calidad)
+        return self.cache.contiene(clave_render(escena, config, [nivel.flag]))
+
+    def enviar(self, escena, config, calidad=NIVEL_OBJETIVO):
+        """
+        Encola un render en el nivel de calidad indicado y devuelve su
+        TrabajoRender. Lanza ColaLlena si la cola ya tiene la profundidad
+        máxima de trabajos en espera.
+        """
+        if escena not in ARCHIVOS_CONFIG:
+            raise ValueError(f"Escena desconocida: {escena}")
+
+        nivel = obtener_nivel(calidad)
+        clave = clave_render(escena, config, [nivel.flag])
+        with self._lock:
+            trabajo = self._en_curso.get(clave)
+            if trabajo is not None:
+                return trabajo
+
+            trabajo = TrabajoRender(escena, config, nivel, clave, self.directorio)
+            if self.cache is not None:
+                video_cacheado = self.cache.obtener(clave)
+                if video_cacheado is not None:
+                    trabajo.desde_cache = True
+                    trabajo.finalizar(True, "Video servido desde la caché.", video_cacheado)
+
+            if not trabajo.desde_cache:
+                if len(self._pendientes) >= self.max_cola:
+                    raise ColaLlena(
+                        "El servidor está ocupado generando otros videos. Inténtalo de nuevo en unos minutos."
+                    )
+                self._pendientes.append(trabajo)
+                self._en_curso[clave] = trabajo
+                en_cola = len(self._pendientes)
+
+        if trabajo.desde_cache:
+            self._registrar_metricas(trabajo)
+        else:
+            REGISTRO.fijar("render_cola_profundidad", en_cola, ayuda="Trabajos esperando en la cola.")
+            self._executor.submit(self._ejecutar, trabajo)
+        return trabajo
+
+    def posicion(self, trabajo):
+        """
+        Posición del trabajo en la cola: 0 si se está ejecutando, 1 si es el
+        siguiente en ejecutarse, etc. None si ya terminó.
+        """
+        with self._lock:
+            if trabajo in self._pendientes:
+                return self._pendientes.index(trabajo) + 1
+            if trabajo in self._ejecutando:
+                return 0
+        return None
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "en_cola": len(self._pendientes),
+                "ejecutando": len(self._ejecutando),
+                "max_concurrentes": self.max_concurrentes,
+                "max_cola": self.max_cola,
+                "tramos": self.tramos,
+            }
+
+    def _renderizar(self, trabajo):
+        """Ejecuta el render del trabajo; retorna (éxito, mensaje, ruta_del_video)."""
+        if self.simulador is not None:
+            with trabajo.cronometro.fase("render_simulado"):
+                return self.simulador.renderizar(trabajo)
+
+        if self.tramos > 1:
+            return self._renderizar_por_tramos(trabajo)
+
+        if self.pool is None:
+            trabajo.preparar()
+            with trabajo.cronometro.fase("proceso_manim"):
+                success, message = run_manim(
+                    trabajo.escena, trabajo.flags + flags_codificador(), trabajo.directorio, self.timeout
+                )
+            trabajo.leer_fases_cli()
+            return success, message, trabajo.ruta_video()
+
+        os.makedirs(trabajo.directorio, exist_ok=True)
+        success, video_path, logs, fases = self.pool.renderizar(
+            trabajo.escena, trabajo.config, trabajo.directorio, trabajo.nivel.calidad_manim, self.timeout,
+            self._opciones_manim(),
+        )
+        trabajo.fases.update(fases)
+        return success, logs, video_path or trabajo.ruta_video()
+
+    @staticmethod
+    def _opciones_manim(opciones=None):
+        """Opciones de Manim para los workers, con los hilos del codificador si se limitaron."""
+        opciones = dict(opciones or {})
+        if opciones_codificador():
+            opciones["video_encoder_options"] = opciones_codificador()
+        return opciones or None
+
+    def _renderizar_por_tramos(self, trabajo):
+        """
+        Renderiza cada animación del trabajo como un tramo aparte, repartiendo
+        los tramos entre los procesos, y los une en la ruta habitual del video.
+        """
+        def renderizar_tramo(indice, directorio):
+            if self.pool is None:
+                trabajo.preparar(directorio)
+                exito, mensaje = run_manim(
+                    trabajo.escena, trabajo.flags + flags_tramo(indice) + flags_codificador(), directorio, self.timeout
+                )
+                return exito, trabajo.ruta_video(directorio), mensaje, {}
+            os.makedirs(directorio, exist_ok=True)
+            return self.pool.renderizar(
+                trabajo.escena, trabajo.config, directorio, trabajo.nivel.calidad_manim, self.timeout,
+                self._opciones_manim(opciones_tramo(indice)),
+            )
+
+        with trabajo.cronometro.fase("render_tramos"):
+            success, message, _ = renderizar_por_tramos(
+                renderizar_tramo, trabajo.directorio, trabajo.ruta_video(), self.tramos
+            )
+        return success, message, trabajo.ruta_video()
+
+    def _registrar_metricas(self, trabajo):
+        """Registra el trabajo terminado y actualiza el archivo de métricas."""
+        REGISTRO.registrar_render({
+            "trabajo": trabajo.id,
+            "escena": trabajo.escena,
+            "calidad": trabajo.nivel.nombre,
+            "estado": trabajo.estado,
+            "desde_cache": trabajo.desde_cache,
+            "cola_segundos": round(trabajo.iniciado - trabajo.creado, 4) if trabajo.iniciado else None,
+            "total_segundos": round(trabajo.finalizado - trabajo.creado, 4),
+            "fases": {fase: round(segundos, 4) for fase, segundos in trabajo.fases.items()},
+        })
+        estadisticas = self.estadisticas()
+        REGISTRO.fijar("render_cola_profundidad", estadisticas["en_cola"], ayuda="Trabajos esperando en la cola.")
+        REGISTRO.fijar("render_ejecutando", estadisticas["ejecutando"], ayuda="Renders en ejecución.")
+        if self.cache is not None:
+            cache = self.cache.estadisticas()
+            REGISTRO.fijar("render_cache_entradas", cache["entradas"], ayuda="Videos guardados en la caché.")
+            REGISTRO.fijar("render_cache_bytes", cache["bytes"], ayuda="Tamaño de la caché de videos.")
+        try:
+            REGISTRO.escribir()
+        except OSError:
+            pass
+
+    def _ejecutar(self, trabajo):
+        with self._lock:
+            self._pendientes.remove(trabajo)
+            self._ejecutando.append(trabajo)
+        trabajo.estado = EJECUTANDO
+        trabajo.iniciado = time.time()
+
+        video_path = None
+        try:
+            success, message, video_path = self._renderizar(trabajo)
+            if success and not os.path.exists(video_path):
+                success, message = False, f"El render terminó sin generar el video: {video_path}"
+
+            if success:
+                # El índice del MP4 al inicio, para reproducir mientras se descarga
+                with trabajo.cronometro.fase("optimizacion_web"):
+                    video_path = optimizar_mp4(video_path)
+
+            # Sin caché el video se sirve desde el directorio de trabajo; en
+            # cualquier otro caso el directorio se elimina
+            if success and self.cache is not None:
+                with trabajo.cronometro.fase("guardado_cache"):
+                    video_path = self.cache.guardar(trabajo.clave, video_path, escena=trabajo.escena)
+                trabajo.limpiar()
+            elif not success:
+                trabajo.limpiar()
+        except Exception as e:
+            success, message = False, f"Error al ejecutar el render: {e}"
+            trabajo.limpiar()
+        finally:
+            with self._lock:
+                self._ejecutando.remove(trabajo)
+                self._en_curso.pop(trabajo.clave, None)
+
+        trabajo.finalizar(success, message, video_path)
+        self._registrar_metricas(trabajo)
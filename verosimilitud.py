@@ -0,0 +1,441 @@
+import numpy as np
+
+# Por debajo de este valor de log L(p̂) la curva sin normalizar es ilegible
+# (o directamente 0.0 en punto flotante), así que se normaliza automáticamente.
+UMBRAL_LOG_NORMALIZACION = np.log(1e-8)
+
+
+def validar_parametros(n, x):
+    """
+    Verifica que n y x definan un experimento binomial válido.
+    """
+    if n < 1:
+        raise ValueError("El número de lanzamientos (n) debe ser al menos 1.")
+    if x < 0 or x > n:
+        raise ValueError("El número de caras obtenidas (x) no puede ser mayor que el número de lanzamientos (n).")
+
+
+def log_verosimilitud(p, n, x):
+    """
+    Log-verosimilitud binomial log L(p) = x·log(p) + (n - x)·log(1 - p),
+    evaluada de forma vectorizada sobre un arreglo de valores de p.
+
+    Se trabaja en escala logarítmica para que no haya subdesbordamiento con
+    n grande, y se usa la convención 0·log(0) = 0 en los extremos.
+    """
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        termino_caras = np.where(x > 0, x * np.log(p), 0.0)
+        termino_sellos = np.where(n - x > 0, (n - x) * np.log1p(-p), 0.0)
+    return termino_caras + termino_sellos
+
+
+def log_verosimilitud_maxima(n, x):
+    """Valor de log L(p̂), con p̂ = x / n."""
+    return float(log_verosimilitud(x / n, n, x))
+
+
+def malla_verosimilitud(n, x, puntos=400):
+    """
+    Malla de valores de p en [0, 1] para graficar L(p).
+
+    Además de una malla uniforme, se agrega una malla densa alrededor de p̂
+    (± 8 errores estándar), ya que para n grande la curva es tan angosta que
+    una malla uniforme no la resolvería.
+    """
+    p_hat = x / n
+    error_estandar = np.sqrt(p_hat * (1 - p_hat) / n) if 0 < x < n else 1 / n
+    malla_uniforme = np.linspace(0, 1, puntos)
+    malla_densa = np.linspace(
+        max(0.0, p_hat - 8 * error_estandar),
+        min(1.0, p_hat + 8 * error_estandar),
+        puntos,
+    )
+    return np.unique(np.concatenate([malla_uniforme, malla_densa, [p_hat]]))
+
+
+def verosimilitud_en_malla(n, x, puntos=400, normalizar=None):
+    """
+    Evalúa la verosimilitud en una malla de p con una sola llamada vectorizada.
+
+    Si `normalizar` es True se devuelve L(p) / L(p̂), que vale 1 en el máximo y
+    es estable para cualquier n. Si es None, se normaliza automáticamente
+    cuando L(p̂) es demasiado pequeño para graficarse sin normalizar.
+
+    Retorna una tupla (malla_p, valores, normalizado).
+    """
+    validar_parametros(n, x)
+    malla = malla_verosimilitud(n, x, puntos)
+    log_l = log_verosimilitud(malla, n, x)
+    log_l_max = log_verosimilitud_maxima(n, x)
+
+    if normalizar is None:
+        normalizar = log_l_max < UMBRAL_LOG_NORMALIZACION
+
+    if normalizar:
+        valores = np.exp(log_l - log_l_max)
+    else:
+        valores = np.exp(log_l)
+    return malla, valores, bool(normalizar)
+
+
+# --- Otras familias ----------------------------------------------------------
+#
+# Cada familia estima su parámetro a partir de estadísticos suficientes
+# (sumas por conjunto de datos), de modo que cientos de conjuntos se estiman
+# en una sola llamada vectorizada: los datos concatenados se reducen por
+# conjunto con `np.add.reduceat` y tanto el MLE como la log-verosimilitud
+# (perfil) se calculan sobre arreglos con una fila por conjunto.
+
+# Coeficientes de la aproximación de Lanczos (g = 7, 9 términos)
+_LANCZOS_G = 7
+_LANCZOS = np.array([
+    0.99999999999980993, 676.5203681218851, -1259.1392167224028,
+    771.32342877765313, -176.61502916214059, 12.507343278686905,
+    -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7,
+])
+
+# Iteraciones máximas y tolerancia relativa del método de Newton
+ITERACIONES_NEWTON = 50
+TOLERANCIA_NEWTON = 1e-12
+
+
+def log_gamma(z):
+    """log Γ(z) vectorizado para z > 0 (aproximación de Lanczos)."""
+    z = np.asarray(z, dtype=float)
+    # Para z < 0.5 se usa log Γ(z) = log Γ(z + 1) − log z
+    pequeno = z < 0.5
+    w = np.where(pequeno, z + 1, z) - 1
+    serie = _LANCZOS[0] + sum(c / (w + i) for i, c in enumerate(_LANCZOS[1:], start=1))
+    t = w + _LANCZOS_G + 0.5
+    resultado = 0.5 * np.log(2 * np.pi) + (w + 0.5) * np.log(t) - t + np.log(serie)
+    return np.where(pequeno, resultado - np.log(z), resultado)
+
+
+def digamma(z):
+    """ψ(z) = d/dz log Γ(z) vectorizado para z > 0 (serie asintótica)."""
+    z = np.asarray(z, dtype=float)
+    resultado = np.zeros_like(z)
+    # Recurrencia ψ(z) = ψ(z + 1) − 1/z hasta que z >= 6
+    for _ in range(6):
+        pequeno = z < 6
+        resultado -= np.where(pequeno, 1 / z, 0.0)
+        z = np.where(pequeno, z + 1, z)
+    inv2 = 1 / z**2
+    return resultado + np.log(z) - 0.5 / z - inv2 * (
+        1 / 12 - inv2 * (1 / 120 - inv2 * (1 / 252 - inv2 * (1 / 240 - inv2 / 132)))
+    )
+
+
+def trigamma(z):
+    """ψ'(z) vectorizado para z > 0 (serie asintótica)."""
+    z = np.asarray(z, dtype=float)
+    resultado = np.zeros_like(z)
+    # Recurrencia ψ'(z) = ψ'(z + 1) + 1/z² hasta que z >= 6
+    for _ in range(6):
+        pequeno = z < 6
+        resultado += np.where(pequeno, 1 / z**2, 0.0)
+        z = np.where(pequeno, z + 1, z)
+    inv = 1 / z
+    inv2 = inv**2
+    return resultado + inv + inv2 / 2 + inv * inv2 * (
+        1 / 6 - inv2 * (1 / 30 - inv2 * (1 / 42 - inv2 * (1 / 30 - inv2 * 5 / 66)))
+    )
+
+
+def agrupar(conjuntos):
+    """
+    Concatena una lista de conjuntos de datos. Retorna una tupla
+    (valores, inicios), con el índice donde empieza cada conjunto.
+    """
+    conjuntos = [np.asarray(c, dtype=float).ravel() for c in conjuntos]
+    longitudes = np.array([len(c) for c in conjuntos])
+    inicios = np.concatenate([[0], np.cumsum(longitudes)[:-1]]).astype(np.int64)
+    return np.concatenate(conjuntos) if conjuntos else np.array([]), inicios
+
+
+def agrupar_por_etiqueta(etiquetas, valores):
+    """
+    Ordena las filas por su etiqueta de conjunto (por ejemplo, el estudiante)
+    sin bucles de Python. Retorna una tupla (etiquetas_unicas, valores, inicios).
+    """
+    etiquetas = np.asarray(etiquetas)
+    orden = np.argsort(etiquetas, kind="stable")
+    unicas, inicios = np.unique(etiquetas[orden], return_index=True)
+    return unicas, np.asarray(valores, dtype=float)[orden], inicios
+
+
+def _validar_conjuntos(valores, inicios):
+    valores = np.asarray(valores, dtype=float).ravel()
+    inicios = np.zeros(1, dtype=np.int64) if inicios is None else np.asarray(inicios, dtype=np.int64)
+    n = np.diff(np.append(inicios, len(valores)))
+    if len(valores) == 0 or np.any(n <= 0):
+        raise ValueError("Cada conjunto de datos debe tener al menos una observación.")
+    if not np.all(np.isfinite(valores)):
+        raise ValueError("Los datos deben ser números finitos.")
+    return valores, inicios, n
+
+
+def _sumas(valores, inicios):
+    return np.add.reduceat(valores, inicios)
+
+
+class Familia:
+    """
+    Familia de distribuciones con un parámetro de interés. Las subclases
+    definen los estadísticos suficientes, el MLE (cerrado o por Newton), la
+    log-verosimilitud perfil del parámetro de interés y su error estándar.
+    Todos los métodos trabajan con arreglos de una fila por conjunto.
+    """
+
+    nombre = ""
+    parametro = ""           # Parámetro de interés (el que se grafica)
+    simbolo = ""             # Símbolo en LaTeX
+    dominio = (-np.inf, np.inf)
+    claves = ("n", "s")      # Nombres de los estadísticos suficientes
+
+    def validar(self, valores):
+        pass
+
+    def estadisticos(self, valores, inicios=None):
+        """Estadísticos suficientes de cada conjunto: un diccionario de arreglos."""
+        valores, inicios, n = _validar_conjuntos(valores, inicios)
+        self.validar(valores)
+        return self._estadisticos(valores, inicios, n.astype(float))
+
+    def mle(self, estadisticos):
+        """Estimaciones de máxima verosimilitud: un diccionario de arreglos."""
+        raise NotImplementedError
+
+    def log_verosimilitud(self, theta, estadisticos):
+        """
+        Log-verosimilitud perfil del parámetro de interés (los demás
+        parámetros en su MLE condicional), evaluada en `theta` de forma
+        (conjuntos, puntos) o compatible por broadcasting.
+        """
+        raise NotImplementedError
+
+    def error_estandar(self, estimaciones, estadisticos):
+        raise NotImplementedError
+
+
+class Bernoulli(Familia):
+    nombre = "binomial"
+    parametro = "p"
+    simbolo = "p"
+    dominio = (0.0, 1.0)
+
+    def validar(self, valores):
+        if not np.all((valores == 0) | (valores == 1)):
+            raise ValueError("Los lanzamientos deben ser 0 (sello) o 1 (cara).")
+
+    def _estadisticos(self, valores, inicios, n):
+        return {"n": n, "s": _sumas(valores, inicios)}
+
+    def mle(self, estadisticos):
+        return {"p": estadisticos["s"] / estadisticos["n"]}
+
+    def log_verosimilitud(self, theta, estadisticos):
+        return log_verosimilitud(theta, estadisticos["n"][:, None], estadisticos["s"][:, None])
+
+    def error_estandar(self, estimaciones, estadisticos):
+        p = estimaciones["p"]
+        return np.sqrt(p * (1 - p) / estadisticos["n"])
+
+
+class Poisson(Familia):
+    nombre = "poisson"
+    parametro = "lambda"
+    simbolo = r"\lambda"
+    dominio = (0.0, np.inf)
+    claves = ("n", "s", "log_factoriales")
+
+    def validar(self, valores):
+        if np.any(valores < 0) or np.any(valores != np.round(valores)):
+            raise ValueError("Los conteos de Poisson deben ser enteros no negativos.")
+
+    def _estadisticos(self, valores, inicios, n):
+        return {
+            "n": n,
+            "s": _sumas(valores, inicios),
+            "log_factoriales": _sumas(log_gamma(valores + 1), inicios),
+        }
+
+    def mle(self, estadisticos):
+        return {"lambda": estadisticos["s"] / estadisticos["n"]}
+
+    def log_verosimilitud(self, theta, estadisticos):
+        s = estadisticos["s"][:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            termino = np.where(s > 0, s * np.log(theta), 0.0)
+        return termino - estadisticos["n"][:, None] * theta - estadisticos["log_factoriales"][:, None]
+
+    def error_estandar(self, estimaciones, estadisticos):
+        return np.sqrt(estimaciones["lambda"] / estadisticos["n"])
+
+
+class Exponencial(Familia):
+    nombre = "exponencial"
+    parametro = "lambda"
+    simbolo = r"\lambda"
+    dominio = (0.0, np.inf)
+
+    def validar(self, valores):
+        if np.any(valores < 0):
+            raise ValueError("Los tiempos de la distribución exponencial deben ser no negativos.")
+
+    def _estadisticos(self, valores, inicios, n):
+        s = _sumas(valores, inicios)
+        if np.any(s <= 0):
+            raise ValueError("Cada conjunto necesita al menos un tiempo positivo.")
+        return {"n": n, "s": s}
+
+    def mle(self, estadisticos):
+        return {"lambda": estadisticos["n"] / estadisticos["s"]}
+
+    def log_verosimilitud(self, theta, estadisticos):
+        return estadisticos["n"][:, None] * np.log(theta) - theta * estadisticos["s"][:, None]
+
+    def error_estandar(self, estimaciones, estadisticos):
+        return estimaciones["lambda"] / np.sqrt(estadisticos["n"])
+
+
+class Normal(Familia):
+    nombre = "normal"
+    parametro = "mu"
+    simbolo = r"\mu"
+    claves = ("n", "s", "ss_centrada")
+
+    def _estadisticos(self, valores, inicios, n):
+        # Con todos los valores iguales σ̂ = 0 y la verosimilitud no está acotada
+        if np.any(np.maximum.reduceat(valores, inicios) == np.minimum.reduceat(valores, inicios)):
+            raise ValueError("Cada conjunto de la distribución normal necesita al menos dos valores distintos.")
+        s = _sumas(valores, inicios)
+        # Suma de cuadrados centrada en la media de cada conjunto (sin cancelación)
+        desvios = valores - np.repeat(s / n, n.astype(np.int64))
+        return {"n": n, "s": s, "ss_centrada": _sumas(desvios**2, inicios)}
+
+    def mle(self, estadisticos):
+        n = estadisticos["n"]
+        return {"mu": estadisticos["s"] / n, "sigma": np.sqrt(estadisticos["ss_centrada"] / n)}
+
+    def log_verosimilitud(self, theta, estadisticos):
+        # Con σ²(μ) = SS/n + (μ − μ̂)², la log-verosimilitud perfil es −n/2·(log 2πσ²(μ) + 1)
+        n = estadisticos["n"][:, None]
+        mu = (estadisticos["s"] / estadisticos["n"])[:, None]
+        varianza = estadisticos["ss_centrada"][:, None] / n + (theta - mu) ** 2
+        with np.errstate(divide="ignore"):
+            return -n / 2 * (np.log(2 * np.pi * varianza) + 1)
+
+    def error_estandar(self, estimaciones, estadisticos):
+        return estimaciones["sigma"] / np.sqrt(estadisticos["n"])
+
+
+class Gamma(Familia):
+    nombre = "gamma"
+    parametro = "k"
+    simbolo = "k"
+    dominio = (0.0, np.inf)
+    claves = ("n", "s", "s_log")
+
+    def validar(self, valores):
+        if np.any(valores <= 0):
+            raise ValueError("Los datos de la distribución gamma deben ser positivos.")
+
+    def _estadisticos(self, valores, inicios, n):
+        return {"n": n, "s": _sumas(valores, inicios), "s_log": _sumas(np.log(valores), inicios)}
+
+    def mle(self, estadisticos):
+        """
+        La forma k resuelve log k − ψ(k) = log x̄ − media(log x) por Newton
+        (en log k, para mantenerla positiva), todos los conjuntos a la vez; la
+        tasa es β = k / x̄.
+        """
+        media = estadisticos["s"] / estadisticos["n"]
+        brecha = np.log(media) - estadisticos["s_log"] / estadisticos["n"]
+        # Conjuntos con todos los valores iguales: k → ∞
+        brecha = np.maximum(brecha, 1e-12)
+        # Punto de partida de Minka, ya muy cercano a la solución
+        k = (3 - brecha + np.sqrt((brecha - 3) ** 2 + 24 * brecha)) / (12 * brecha)
+        for _ in range(ITERACIONES_NEWTON):
+            f = np.log(k) - digamma(k) - brecha
+            derivada = 1 / k - trigamma(k)
+            paso = f / (k * derivada)
+            k = k * np.exp(-paso)
+            if np.all(np.abs(paso) < TOLERANCIA_NEWTON):
+                break
+        return {"k": k, "beta": k / media}
+
+    def log_verosimilitud(self, theta, estadisticos):
+        # Con β(k) = k / x̄, β·Σx = k·n
+        n = estadisticos["n"][:, None]
+        media = (estadisticos["s"] / estadisticos["n"])[:, None]
+        return n * theta * np.log(theta / media) - n * log_gamma(theta) + (theta - 1) * estadisticos["s_log"][:, None] - n * theta
+
+    def error_estandar(self, estimaciones, estadisticos):
+        k = estimaciones["k"]
+        return 1 / np.sqrt(estadisticos["n"] * (trigamma(k) - 1 / k))
+
+
+FAMILIAS = {familia.nombre: familia for familia in (Bernoulli(), Poisson(), Exponencial(), Normal(), Gamma())}
+
+
+def obtener_familia(nombre):
+    """Devuelve la familia con el nombre dado."""
+    try:
+        return FAMILIAS[nombre]
+    except KeyError:
+        raise ValueError(f"Familia desconocida: {nombre}. Opciones: {', '.join(FAMILIAS)}") from None
+
+
+def estimar_mle(nombre, valores, inicios=None):
+    """
+    Estima por máxima verosimilitud todos los conjuntos de datos en una sola
+    llamada. `valores` son los datos concatenados e `inicios` el índice donde
+    empieza cada conjunto (ver `agrupar`); sin `inicios` hay un solo conjunto.
+
+    Retorna un diccionario de arreglos (una entrada por conjunto) con los
+    estadísticos suficientes, las estimaciones y el error estándar del
+    parámetro de interés.
+    """
+    familia = obtener_familia(nombre)
+    estadisticos = familia.estadisticos(valores, inicios)
+    estimaciones = familia.mle(estadisticos)
+    return {
+        **estadisticos,
+        **estimaciones,
+        "error_estandar": familia.error_estandar(estimaciones, estadisticos),
+    }
+
+
+def superficie_verosimilitud(nombre, estadisticos, puntos=400):
+    """
+    Evalúa la verosimilitud perfil normalizada L(θ)/L(θ̂) de todos los
+    conjuntos con una sola llamada vectorizada, cada uno en su propia malla
+    (θ̂ ± 8 errores estándar, recortada al dominio del parámetro).
+
+    `estadisticos` son arreglos, o escalares para un solo conjunto.
+    Retorna una tupla (malla, valores), ambas de forma (conjuntos, puntos).
+    """
+    familia = obtener_familia(nombre)
+    estadisticos = {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in estadisticos.items()}
+    estimaciones = familia.mle(estadisticos)
+    theta_hat = estimaciones[familia.parametro]
+    error = familia.error_estandar(estimaciones, estadisticos)
+    # Conjuntos degenerados (error nulo): un ancho proporcional al valor
+    error = np.where(error > 0, error, np.maximum(np.abs(theta_hat), 1.0) / np.sqrt(estadisticos["n"]))
+
+    inferior_dominio, superior_dominio = familia.dominio
+    inferior = np.maximum(theta_hat - 8 * error, inferior_dominio)
+    superior = np.minimum(theta_hat + 8 * error, superior_dominio)
+    if inferior_dominio == 0.0:
+        # Evitar θ = 0 donde la log-verosimilitud de algunas familias es −∞
+        inferior = np.maximum(inferior, np.minimum(theta_hat, superior) * 1e-3)
+    t = np.linspace(0.0, 1.0, puntos)
+    malla = inferior[:, None] + (superior - inferior)[:, None] * t[None, :]
+
+    log_l = familia.log_verosimilitud(malla, estadisticos)
+    log_l_max = familia.log_verosimilitud(theta_hat[:, None], estadisticos)
+    with np.errstate(invalid="ignore"):
+        valores = np.exp(np.minimum(log_l - log_l_max, 0.0))
+    return malla, np.nan_to_num(valores)
@@ -0,0 +1,169 @@
+import numpy as np
+
+from agregacion import celdas_densidad, requiere_agregacion, residuos_representativos
+from flujo_lanzamientos import densidad_beta_en_malla
+from verosimilitud import obtener_familia, superficie_verosimilitud, verosimilitud_en_malla
+
+# Colores equivalentes a los de las escenas de Manim (BLUE, RED, GREEN)
+COLOR_CURVA = "#58C4DD"
+COLOR_PUNTOS = "#FC6255"
+COLOR_ERRORES = "#83C167"
+
+
+def grafico_verosimilitud(n, x):
+    """
+    Especificación Vega-Lite de la función de verosimilitud, calculada con los
+    mismos datos que la escena LikelihoodFunction.
+    """
+    malla_p, valores, normalizado = verosimilitud_en_malla(n, x)
+    titulo_y = "L(p) / L(p̂)" if normalizado else "L(p)"
+
+    return {
+        "width": "container",
+        "title": f"n = {n}, x = {x}",
+        "data": {"values": [{"p": float(p), "L": float(l)} for p, l in zip(malla_p, valores)]},
+        "layer": [
+            {
+                "mark": {"type": "line", "color": COLOR_CURVA},
+                "encoding": {
+                    "x": {"field": "p", "type": "quantitative", "title": "p", "scale": {"domain": [0, 1]}},
+                    "y": {"field": "L", "type": "quantitative", "title": titulo_y},
+                },
+            },
+            {
+                "mark": {"type": "rule", "strokeDash": [4, 4], "color": "gray"},
+                "encoding": {"x": {"datum": x / n}},
+            },
+        ],
+    }
+
+
+def grafico_verosimilitud_familia(familia, estadisticos):
+    """
+    Especificación Vega-Lite de la verosimilitud perfil normalizada de una
+    familia, calculada con los mismos datos que la escena LikelihoodFunction.
+    """
+    distribucion = obtener_familia(familia)
+    parametro = distribucion.parametro
+    malla, valores = superficie_verosimilitud(familia, estadisticos)
+    estimacion = float(distribucion.mle({k: np.atleast_1d(v) for k, v in estadisticos.items()})[parametro][0])
+
+    return {
+        "width": "container",
+        "title": f"{familia}, n = {int(estadisticos['n'])}",
+        "data": {"values": [{parametro: float(t), "L": float(l)} for t, l in zip(malla[0], valores[0])]},
+        "layer": [
+            {
+                "mark": {"type": "line", "color": COLOR_CURVA},
+                "encoding": {
+                    "x": {"field": parametro, "type": "quantitative", "title": parametro},
+                    "y": {"field": "L", "type": "quantitative", "title": f"L({parametro}) / L({parametro}̂)"},
+                },
+            },
+            {
+                "mark": {"type": "rule", "strokeDash": [4, 4], "color": "gray"},
+                "encoding": {"x": {"datum": estimacion}},
+            },
+        ],
+    }
+
+
+def grafico_posterior_beta(alfa, beta, intervalo=None, puntos=400):
+    """
+    Especificación Vega-Lite de la densidad posterior Beta(alfa, beta) de p,
+    con el intervalo de credibilidad sombreado si se proporciona.
+    """
+    malla_p, densidad = densidad_beta_en_malla(alfa, beta, puntos)
+    capas = [
+        {
+            "mark": {"type": "area", "color": COLOR_CURVA, "opacity": 0.3, "line": {"color": COLOR_CURVA}},
+            "encoding": {
+                "x": {"field": "p", "type": "quantitative", "title": "p"},
+                "y": {"field": "densidad", "type": "quantitative", "title": "Densidad posterior"},
+            },
+        },
+    ]
+    if intervalo is not None:
+        capas.append({
+            "data": {"values": [{"inferior": intervalo[0], "superior": intervalo[1]}]},
+            "mark": {"type": "rect", "color": "gray", "opacity": 0.2},
+            "encoding": {"x": {"field": "inferior", "type": "quantitative"}, "x2": {"field": "superior"}},
+        })
+    return {
+        "width": "container",
+        "title": f"Beta({alfa:g}, {beta:g})",
+        "data": {"values": [{"p": float(p), "densidad": float(d)} for p, d in zip(malla_p, densidad)]},
+        "layer": capas,
+    }
+
+
+def grafico_regresion(X, Y, coeficientes, puntos_curva=200, filas_totales=None):
+    """
+    Especificación Vega-Lite de la regresión: puntos de datos, curva ajustada
+    y segmentos de error, con los mismos datos que la escena RegressionFunction.
+    Si X e Y son una muestra, `filas_totales` es el tamaño del dataset
+    completo y decide si los puntos se agregan.
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    polinomio = np.poly1d(coeficientes)
+
+    x_curva = np.linspace(X.min() - 1, X.max() + 1, puntos_curva)
+    y_curva = polinomio(x_curva)
+
+    eje_x = {"field": "x", "type": "quantitative", "title": "Producción (x)"}
+    eje_y = {"field": "y", "type": "quantitative", "title": "Horas Trabajadas (y)"}
+
+    # Con muchas filas se grafican celdas de densidad y errores representativos,
+    # igual que en la escena
+    if requiere_agregacion(filas_totales or len(X)):
+        x_celdas, y_celdas, conteos = celdas_densidad(
+            X, Y, (X.min() - 1, X.max() + 1), (Y.min() - 5, Y.max() + 5)
+        )
+        puntos = [
+            {"x": float(x), "y": float(y), "conteo": float(c)}
+            for x, y, c in zip(x_celdas, y_celdas, conteos)
+        ]
+        capa_puntos = {
+            "data": {"name": "puntos"},
+            "mark": {"type": "square", "size": 40, "color": COLOR_PUNTOS},
+            "encoding": {
+                "x": eje_x,
+                "y": eje_y,
+                "opacity": {"field": "conteo", "type": "quantitative", "scale": {"type": "log"}, "legend": None},
+            },
+        }
+        X_errores, Y_errores, Y_pred_errores = residuos_representativos(X, Y, coeficientes)
+    else:
+        puntos = [{"x": float(x), "y": float(y)} for x, y in zip(X, Y)]
+        capa_puntos = {
+            "data": {"name": "puntos"},
+            "mark": {"type": "circle", "size": 60, "color": COLOR_PUNTOS, "opacity": 1},
+            "encoding": {"x": eje_x, "y": eje_y},
+        }
+        X_errores, Y_errores, Y_pred_errores = X, Y, polinomio(X)
+
+    return {
+        "width": "container",
+        "datasets": {
+            "puntos": puntos,
+            "errores": [
+                {"x": float(x), "y": float(y), "y_pred": float(y_pred)}
+                for x, y, y_pred in zip(X_errores, Y_errores, Y_pred_errores)
+            ],
+            "curva": [{"x": float(x), "y": float(y)} for x, y in zip(x_curva, y_curva)],
+        },
+        "layer": [
+            {
+                "data": {"name": "errores"},
+                "mark": {"type": "rule", "strokeDash": [4, 4], "color": COLOR_ERRORES},
+                "encoding": {"x": eje_x, "y": eje_y, "y2": {"field": "y_pred"}},
+            },
+            {
+                "data": {"name": "curva"},
+                "mark": {"type": "line", "color": COLOR_CURVA},
+                "encoding": {"x": eje_x, "y": eje_y},
+            },
+            capa_puntos,
+        ],
+    }
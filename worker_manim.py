@@ -0,0 +1,191 @@
+import contextlib
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+
+# Ruta absoluta al script de escenas
+SCRIPT_MANIM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manim.py")
+
+# Módulo con las escenas, cargado una sola vez por proceso worker
+_escenas = None
+
+# Duración de la importación de Manim, informada solo en el primer render del proceso
+_importacion_pendiente = None
+
+
+def importar_escenas():
+    """
+    Importa el paquete Manim y el script de escenas una sola vez por proceso.
+
+    El script de escenas se llama `manim.py`, igual que el paquete. Para que
+    `from manim import *` resuelva al paquete instalado, este se importa con el
+    directorio del proyecto fuera de `sys.path`, y el script se carga con otro
+    nombre de módulo.
+    """
+    global _escenas, _importacion_pendiente
+    if _escenas is not None:
+        return _escenas
+
+    inicio = time.perf_counter()
+    directorio = os.path.dirname(SCRIPT_MANIM)
+    sys_path_original = list(sys.path)
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != directorio]
+    try:
+        import manim  # noqa: F401
+    finally:
+        sys.path[:] = sys_path_original
+
+    spec = importlib.util.spec_from_file_location("escenas_manim", SCRIPT_MANIM)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    _escenas = modulo
+    _importacion_pendiente = time.perf_counter() - inicio
+    return _escenas
+
+
+def renderizar(escena, parametros, directorio, calidad, opciones=None):
+    """
+    Renderiza una escena en el proceso actual a partir de parámetros en memoria.
+    `opciones` permite sobrescribir otras claves de la configuración de Manim
+    (por ejemplo `{"dry_run": True}` para no escribir el video).
+
+    Retorna una tupla (éxito, ruta_del_video, logs, fases), donde `fases` es
+    un diccionario con la duración en segundos de cada fase del render.
+    """
+    global _importacion_pendiente
+    escenas = importar_escenas()
+    from manim import config, logger, tempconfig
+
+    from instrumentacion import iniciar_medicion, instrumentar_manim, terminar_medicion
+
+    instrumentar_manim()
+    cronometro = iniciar_medicion()
+    if _importacion_pendiente is not None:
+        cronometro.fases["importacion_manim"] = _importacion_pendiente
+        _importacion_pendiente = None
+
+    captura = io.StringIO()
+    handler = logging.StreamHandler(captura)
+    logger.addHandler(handler)
+    try:
+        with contextlib.redirect_stdout(captura), contextlib.redirect_stderr(captura):
+            with tempconfig({
+                "input_file": SCRIPT_MANIM,
+                "media_dir": os.path.join(directorio, "media"),
+                "quality": calidad,
+                "preview": False,
+                "progress_bar": "none",
+                **(opciones or {}),
+            }):
+                with cronometro.fase("render_escena"):
+                    scene = getattr(escenas, escena)(parametros=parametros)
+                    scene.render()
+                video_path = None if config.dry_run else str(scene.renderer.file_writer.movie_file_path)
+        return True, video_path, captura.getvalue(), terminar_medicion()
+    except Exception:
+        return False, None, captura.getvalue() + traceback.format_exc(), terminar_medicion()
+    finally:
+        logger.removeHandler(handler)
+
+
+def _bucle_worker(conexion):
+    """
+    Bucle principal de un proceso worker: importa Manim, precalienta la
+    caché de LaTeX y atiende renders.
+    """
+    importar_escenas()
+    from cache_latex import precalentar_cache_latex
+
+    precalentar_cache_latex()
+    while True:
+        try:
+            solicitud = conexion.recv()
+        except EOFError:
+            break
+        if solicitud is None:
+            break
+        conexion.send(renderizar(*solicitud))
+
+
+class WorkerManim:
+    """
+    Proceso persistente que mantiene Manim importado y renderiza escenas
+    recibidas por una tubería, sin lanzar la CLI en cada solicitud.
+    """
+
+    def __init__(self, contexto):
+        self._contexto = contexto
+        self._proceso = None
+        self._conexion = None
+        self._iniciar()
+
+    def _iniciar(self):
+        self._conexion, extremo = self._contexto.Pipe()
+        self._proceso = self._contexto.Process(target=_bucle_worker, args=(extremo,), daemon=True)
+        self._proceso.start()
+        extremo.close()
+
+    def _reiniciar(self):
+        self.detener()
+        self._iniciar()
+
+    def renderizar(self, escena, parametros, directorio, calidad, timeout=None, opciones=None):
+        """
+        Envía un render al proceso worker y espera el resultado. Si se supera
+        el tiempo máximo, el proceso se termina y se reemplaza por uno nuevo.
+        """
+        if not self._proceso.is_alive():
+            self._reiniciar()
+
+        try:
+            self._conexion.send((escena, parametros, directorio, calidad, opciones))
+            if not self._conexion.poll(timeout):
+                self._reiniciar()
+                return False, None, f"El render superó el tiempo máximo de {timeout:.0f} segundos.", {}
+            return self._conexion.recv()
+        except (EOFError, OSError):
+            self._reiniciar()
+            return False, None, "El proceso de render terminó inesperadamente.", {}
+
+    def detener(self):
+        try:
+            self._conexion.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._proceso.join(timeout=1)
+        if self._proceso.is_alive():
+            self._proceso.terminate()
+            self._proceso.join()
+        self._conexion.close()
+
+
+class PoolManim:
+    """
+    Conjunto de procesos WorkerManim precalentados. Cada render toma un
+    worker libre y lo devuelve al terminar.
+    """
+
+    def __init__(self, num_workers):
+        # "spawn" evita duplicar con fork los hilos del servidor de Streamlit
+        contexto = multiprocessing.get_context("spawn")
+        self.workers = [WorkerManim(contexto) for _ in range(num_workers)]
+        self._libres = queue.Queue()
+        for worker in self.workers:
+            self._libres.put(worker)
+
+    def renderizar(self, escena, parametros, directorio, calidad, timeout=None, opciones=None):
+        worker = self._libres.get()
+        try:
+            return worker.renderizar(escena, parametros, directorio, calidad, timeout, opciones)
+        finally:
+            self._libres.put(worker)
+
+    def detener(self):
+        for worker in self.workers:
+            worker.detener()